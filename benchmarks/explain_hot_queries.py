@@ -0,0 +1,210 @@
+"""
+EXPLAIN the pipeline's hot queries before and after the index migrations.
+
+Seeds a scratch schema in a local Postgres with representative volumes,
+runs EXPLAIN (ANALYZE, BUFFERS) on every hot query, applies the CREATE INDEX
+statements of sql/migrations, runs ANALYZE and explains the queries again.
+
+Uses psql, so it needs nothing beyond a Postgres client:
+
+    createdb globnuz_bench
+    python benchmarks/explain_hot_queries.py --dsn postgresql://localhost/globnuz_bench
+
+Everything is created in the schema given by --schema (dropped first), so the
+script never touches real tables.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "migrations")
+
+# Columns the hot queries touch, without any index besides the primary and unique keys
+SCHEMA_SQL = """
+CREATE TABLE news_articles (
+    id SERIAL PRIMARY KEY,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    description TEXT NOT NULL,
+    newspaper_id INT NOT NULL,
+    theme TEXT NOT NULL,
+    theme_tags TEXT[],
+    external_link TEXT NOT NULL,
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    country_id CHAR(2) NOT NULL,
+    location TEXT,
+    language TEXT NOT NULL,
+    translated BOOLEAN DEFAULT FALSE,
+    translated_date TIMESTAMP WITH TIME ZONE,
+    translation_claimed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE news_articles_raw (
+    id SERIAL PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    newspaper_id INT NOT NULL,
+    external_link TEXT NOT NULL UNIQUE,
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    ai_processed BOOLEAN DEFAULT FALSE,
+    ai_processed_date TIMESTAMP WITH TIME ZONE,
+    canonical_raw_id INT,
+    ai_claimed_at TIMESTAMP WITH TIME ZONE,
+    ai_claimed_by TEXT
+);
+
+CREATE TABLE news_articles_translated (
+    id SERIAL PRIMARY KEY,
+    original_article_id INT NOT NULL REFERENCES news_articles(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    description TEXT NOT NULL,
+    location TEXT,
+    language_translated CHAR(2) NOT NULL,
+    UNIQUE (original_article_id, language_translated)
+);
+
+CREATE TABLE theme_tags (
+    id SERIAL PRIMARY KEY,
+    article_id INT NOT NULL,
+    tag TEXT NOT NULL
+);
+
+CREATE INDEX idx_news_articles_date ON news_articles(publication_date);
+CREATE INDEX idx_theme_tags_article_id ON theme_tags(article_id);
+"""
+
+# Steady state: most rows processed/translated, a small backlog of fresh ones
+SEED_SQL = """
+INSERT INTO news_articles_raw (title, description, newspaper_id, external_link, publication_date, ai_processed)
+SELECT 'Raw title ' || i, 'Raw description ' || i, 1 + i % 10, 'https://example.com/raw/' || i,
+       now() - (i || ' minutes')::interval, i > {raw_backlog}
+FROM generate_series(1, {raw_rows}) AS i;
+
+INSERT INTO news_articles (title, description, newspaper_id, theme, theme_tags, external_link,
+                           publication_date, country_id, language, translated)
+SELECT 'Title ' || i, 'Description ' || i, 1 + i % 10,
+       (ARRAY['geopolitic', 'economy', 'society', 'culture', 'science', 'health', 'environment'])[1 + i % 7],
+       ARRAY['tag' || (i % 500), 'tag' || (i % 37), 'tag' || (i % 11)],
+       'https://example.com/' || i, now() - (i || ' minutes')::interval,
+       (ARRAY['FR', 'US', 'GB', 'DE', 'UA', 'CN', 'IN', 'BR', 'ZA', 'AU'])[1 + i % 10],
+       'FR', i > {translation_backlog}
+FROM generate_series(1, {article_rows}) AS i;
+
+INSERT INTO news_articles_translated (original_article_id, title, description, language_translated)
+SELECT a.id, a.title, a.description, l.lang
+FROM news_articles a CROSS JOIN (VALUES ('EN'), ('FR'), ('HI'), ('ES'), ('ZH')) AS l(lang)
+WHERE a.translated;
+
+INSERT INTO theme_tags (article_id, tag)
+SELECT a.id, unnest(a.theme_tags) FROM news_articles a;
+
+ANALYZE;
+"""
+
+HOT_QUERIES = {
+    "raw articles to enrich (send-rss-feed-to-ai.py)": """
+        SELECT id, title, description FROM news_articles_raw
+        WHERE NOT ai_processed ORDER BY publication_date DESC LIMIT 100""",
+    "articles to translate (translate-ai-news-fr-en.py)": """
+        SELECT id FROM news_articles WHERE NOT translated AND id > 0 ORDER BY id LIMIT 50""",
+    "French feed page (newsService.getNewsEvents)": """
+        SELECT t.*, a.publication_date FROM news_articles_translated t
+        JOIN news_articles a ON a.id = t.original_article_id
+        WHERE t.language_translated = 'FR'
+        ORDER BY a.publication_date DESC LIMIT 20""",
+    "French feed filtered by theme": """
+        SELECT t.*, a.publication_date FROM news_articles_translated t
+        JOIN news_articles a ON a.id = t.original_article_id
+        WHERE t.language_translated = 'FR' AND a.theme IN ('health', 'science')
+        ORDER BY a.publication_date DESC LIMIT 20""",
+    "news by theme (newsService.getNewsByTheme)": """
+        SELECT * FROM news_articles WHERE theme = 'economy' ORDER BY publication_date DESC LIMIT 50""",
+    "articles with a tag (theme_tags array)": """
+        SELECT id FROM news_articles WHERE theme_tags @> ARRAY['tag42']""",
+    "articles with a tag (theme_tags table)": """
+        SELECT article_id FROM theme_tags WHERE tag = 'tag42'""",
+}
+
+CREATE_INDEX_RE = re.compile(r"CREATE INDEX IF NOT EXISTS .*?;", re.DOTALL | re.IGNORECASE)
+BENCHMARK_TABLES = ("news_articles", "news_articles_raw", "news_articles_translated", "theme_tags")
+
+
+def run_psql(dsn: str, schema: str, sql: str) -> str:
+    """Run SQL through psql with the scratch schema first on the search path"""
+    script = f"SET search_path TO {schema}, public;\n{sql}"
+    result = subprocess.run(
+        ["psql", dsn, "-X", "-q", "-A", "-t", "-v", "ON_ERROR_STOP=1"],
+        input=script, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"psql failed:\n{result.stderr}")
+    return result.stdout
+
+
+def migration_indexes() -> list:
+    """CREATE INDEX statements of every migration on the benchmarked tables, in file order"""
+    statements = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if name.endswith(".sql"):
+            with open(os.path.join(MIGRATIONS_DIR, name)) as migration:
+                for statement in CREATE_INDEX_RE.findall(migration.read()):
+                    table = re.search(r"\bON\s+(\w+)", statement).group(1)
+                    if table in BENCHMARK_TABLES:
+                        statements.append(statement)
+    return statements
+
+
+def explain_all(dsn: str, schema: str) -> dict:
+    plans = {}
+    for name, query in HOT_QUERIES.items():
+        plans[name] = run_psql(dsn, schema, f"EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) {query};").strip()
+    return plans
+
+
+def execution_time(plan: str) -> str:
+    match = re.search(r"Execution Time: ([\d.]+ ms)", plan)
+    return match.group(1) if match else "?"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the pipeline's hot queries before and after the index migrations")
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL", "postgresql://localhost/postgres"),
+                        help="Local Postgres to seed (never production)")
+    parser.add_argument("--schema", default="globnuz_bench", help="Scratch schema, dropped and recreated")
+    parser.add_argument("--raw-rows", type=int, default=200000)
+    parser.add_argument("--article-rows", type=int, default=100000)
+    parser.add_argument("--raw-backlog", type=int, default=500, help="Unprocessed raw articles")
+    parser.add_argument("--translation-backlog", type=int, default=200, help="Untranslated articles")
+    args = parser.parse_args()
+
+    print(f"Seeding schema {args.schema}...")
+    run_psql(args.dsn, "public", f"DROP SCHEMA IF EXISTS {args.schema} CASCADE; CREATE SCHEMA {args.schema};")
+    run_psql(args.dsn, args.schema, SCHEMA_SQL)
+    run_psql(args.dsn, args.schema, SEED_SQL.format(
+        raw_rows=args.raw_rows, article_rows=args.article_rows,
+        raw_backlog=args.raw_backlog, translation_backlog=args.translation_backlog
+    ))
+
+    before = explain_all(args.dsn, args.schema)
+
+    indexes = migration_indexes()
+    print(f"Applying {len(indexes)} migration indexes...")
+    run_psql(args.dsn, args.schema, "\n".join(indexes) + "\nANALYZE;")
+
+    after = explain_all(args.dsn, args.schema)
+
+    for name in HOT_QUERIES:
+        print(f"\n=== {name}: {execution_time(before[name])} -> {execution_time(after[name])}")
+        print("--- before")
+        print(before[name])
+        print("--- after")
+        print(after[name])
+
+    run_psql(args.dsn, "public", f"DROP SCHEMA {args.schema} CASCADE;")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Feed corpus and synthetic data of the pipeline benchmark.
+
+fixtures/feeds holds one feed per newspaper seeded by sql/create_tables.sql,
+in the layout its outlet publishes (namespaces, CDATA, media:content or
+media:thumbnail, enclosures, content:encoded, RFC 822 dates in several zones),
+plus an RSS 1.0 (RDF) and an Atom sample: every seeded outlet publishes
+RSS 2.0. The committed files are hand-written replicas with neutral
+placeholder stories, so the corpus is stable from one run to the next.
+Refresh them from the live feeds with:
+
+    python benchmarks/feeds.py --record
+
+synthetic_feed scales a feed up to any number of items in any of the three
+formats, and synthetic_articles generates the raw and enriched rows the
+enrichment and translation stages start from. Both are deterministic for a
+given seed.
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, "fixtures", "feeds")
+CREATE_TABLES_SQL = os.path.join(BENCHMARKS_DIR, "..", "sql", "create_tables.sql")
+
+# Fixture of each newspaper of sql/create_tables.sql, by name
+OUTLET_FIXTURES = {
+    "The New York Times": "nytimes_world.xml",
+    "The Guardian": "guardian_world.xml",
+    "The Wall Street Journal": "wsj_world.xml",
+    "BBC News": "bbc_world.xml",
+    "Reuters": "reuters_world.xml",  # No feed URL in the seed data; the fixture keeps the agency in the corpus
+    "Associated Press (AP)": "ap_world.xml",
+    "CNN": "cnn_world.xml",
+    "Al Jazeera": "aljazeera_all.xml",
+    "Le Monde": "lemonde_une.xml",
+    "El País": "elpais_internacional.xml",
+}
+FORMAT_SAMPLES = ["sample_rdf.xml", "sample_atom.xml"]
+FEED_FORMATS = ["RSS", "RDF", "ATOM"]
+
+SEEDED_NEWSPAPER_RE = re.compile(r"\('((?:[^']|'')*)', '(\w+)', '(?:[^']|'')*', (?:'([^']*)'|NULL)\)")
+
+SYNTHETIC_BASE_DATE = datetime(2025, 3, 27, 12, 0, tzinfo=timezone.utc)
+SYNTHETIC_HOST = "https://news.example.org"
+LANGUAGES = ["EN", "FR", "ES"]
+
+# Vocabulary of the synthetic stories, per language: subjects, verb phrases before a place, detail sentences
+WORDS = {
+    "EN": (["Ministers", "Researchers", "Farmers", "Investors", "Rescue teams", "Voters", "Health officials",
+            "Engineers", "Students", "Fishermen", "Judges", "Negotiators"],
+           ["agree on a new plan for", "warn of shortages in", "protest rising costs in", "report progress in",
+            "call for talks over", "prepare for storms in", "count the damage in", "celebrate a record year in"],
+           ["Officials counted {n} people at the scene.", "The plan would cost {n} million over five years.",
+            "Talks are due to resume in {n} days.", "Local media reported {n} complaints since Monday.",
+            "A spokesperson promised an update before {n} o'clock.", "Prices rose by {n} percent in a year."]),
+    "FR": (["Les ministres", "Les chercheurs", "Les agriculteurs", "Les investisseurs", "Les secours", "Les électeurs",
+            "Les autorités sanitaires", "Les ingénieurs", "Les étudiants", "Les pêcheurs", "Les juges", "Les négociateurs"],
+           ["s'accordent sur un plan pour", "alertent sur des pénuries à", "protestent contre la hausse des prix à",
+            "annoncent des progrès à", "appellent au dialogue à", "se préparent aux tempêtes à",
+            "évaluent les dégâts à", "célèbrent une année record à"],
+           ["Les autorités ont compté {n} personnes sur place.", "Le plan coûterait {n} millions sur cinq ans.",
+            "Les discussions doivent reprendre dans {n} jours.", "La presse locale fait état de {n} plaintes depuis lundi.",
+            "Un porte-parole a promis un point avant {n} heures.", "Les prix ont augmenté de {n} % en un an."]),
+    "ES": (["Los ministros", "Los investigadores", "Los agricultores", "Los inversores", "Los equipos de rescate",
+            "Los votantes", "Las autoridades sanitarias", "Los ingenieros", "Los estudiantes", "Los pescadores",
+            "Los jueces", "Los negociadores"],
+           ["acuerdan un nuevo plan para", "advierten de escasez en", "protestan por la subida de precios en",
+            "informan de avances en", "piden diálogo en", "se preparan para las tormentas en",
+            "evalúan los daños en", "celebran un año récord en"],
+           ["Las autoridades contaron {n} personas en el lugar.", "El plan costaría {n} millones en cinco años.",
+            "Las conversaciones se reanudarán en {n} días.", "La prensa local informa de {n} quejas desde el lunes.",
+            "Un portavoz prometió novedades antes de las {n}.", "Los precios subieron un {n} % en un año."]),
+}
+# (city, country code, latitude, longitude); few places, many stories, as in real news
+PLACES = [
+    ("Paris", "FR", 48.8566, 2.3522), ("Madrid", "ES", 40.4168, -3.7038), ("Berlin", "DE", 52.52, 13.405),
+    ("Nairobi", "KE", -1.2921, 36.8219), ("Lima", "PE", -12.0464, -77.0428), ("Hanoi", "VN", 21.0278, 105.8342),
+    ("Cairo", "EG", 30.0444, 31.2357), ("Toronto", "CA", 43.6532, -79.3832), ("Mumbai", "IN", 19.076, 72.8777),
+    ("Sydney", "AU", -33.8688, 151.2093), ("Oslo", "NO", 59.9139, 10.7522), ("Dakar", "SN", 14.7167, -17.4677),
+]
+# Columns of a synthetic article the ingestion stage stores in news_articles_raw
+RAW_COLUMNS = ["title", "description", "author", "image", "external_link", "publication_date", "newspaper_id"]
+THEMES = ["geopolitic", "economy", "society", "culture", "science", "health", "environment"]
+
+
+def load_fixtures(include_samples: bool = True) -> Dict[str, bytes]:
+    """The committed feeds, by file name"""
+    names = list(OUTLET_FIXTURES.values()) + (FORMAT_SAMPLES if include_samples else [])
+    fixtures = {}
+    for name in names:
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as feed:
+            fixtures[name] = feed.read()
+    return fixtures
+
+
+def seeded_newspapers() -> List[Dict[str, Optional[str]]]:
+    """Name, country and feed URL of the newspapers sql/create_tables.sql inserts"""
+    with open(CREATE_TABLES_SQL, encoding="utf-8") as sql:
+        content = sql.read()
+    insert = content[content.index("INSERT INTO Newspapers"):]
+    insert = insert[:insert.index(";\n")]
+    return [{"name": name.replace("''", "'"), "country_id": country_id, "rss_feed_url": url}
+            for name, country_id, url in SEEDED_NEWSPAPER_RE.findall(insert)]
+
+
+def _story(rng: random.Random, language: str, number: int) -> Dict[str, str]:
+    subjects, verbs, details = WORDS[language]
+    city = PLACES[rng.randrange(len(PLACES))][0]
+    title = f"{rng.choice(subjects)} {rng.choice(verbs)} {city} ({number})"
+    description = " ".join(detail.format(n=rng.randrange(2, 999)) for detail in rng.sample(details, 3))
+    return {"title": title, "description": f"{title}. {description}", "location": city}
+
+
+def _rfc822(date: datetime) -> str:
+    return date.strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+
+def synthetic_feed(feed_type: str = "RSS", items: int = 100, seed: int = 0, language: str = "EN") -> bytes:
+    """
+    A feed of the given format ('RSS', 'RDF' or 'ATOM') with unique links, dates
+    newest first and an image per item, as the fixtures carry them
+    """
+    rng = random.Random(f"{feed_type}-{seed}")
+    base = f"{SYNTHETIC_HOST}/{feed_type.lower()}/{seed}"
+    entries = []
+    for number in range(items):
+        story = _story(rng, language, number)
+        link = f"{base}/{number:06d}-{hashlib.sha1(story['title'].encode()).hexdigest()[:10]}"
+        date = SYNTHETIC_BASE_DATE - timedelta(minutes=7 * number + rng.randrange(7))
+        image = f"{SYNTHETIC_HOST}/img/{seed}/{number}.jpg"
+        title, description = escape(story["title"]), escape(story["description"])
+        image_html = escape(f'<img src="{image}"/>')
+        if feed_type == "RDF":
+            entries.append(
+                f'<item rdf:about="{link}"><title>{title}</title><link>{link}</link>'
+                f"<description>{image_html} {description}</description>"
+                f"<dc:creator>Newsroom</dc:creator><dc:date>{date.isoformat()}</dc:date>"
+                f"<dc:subject>{rng.choice(THEMES)}</dc:subject><dc:language>{language.lower()}</dc:language></item>")
+        elif feed_type == "ATOM":
+            entries.append(
+                f'<entry><title type="html">{title}</title><link rel="alternate" href="{link}"/>'
+                f"<id>{link}</id><published>{date.strftime('%Y-%m-%dT%H:%M:%SZ')}</published>"
+                f"<updated>{date.strftime('%Y-%m-%dT%H:%M:%SZ')}</updated><author><name>Newsroom</name></author>"
+                f'<category term="{rng.choice(THEMES)}"/><summary type="html">{description}</summary>'
+                f'<content type="html">{image_html}{escape("<p>")}{description}{escape("</p>")}</content></entry>')
+        else:
+            entries.append(
+                f"<item><title>{title}</title><link>{link}</link><description>{description}</description>"
+                f'<dc:creator>Newsroom</dc:creator><pubDate>{_rfc822(date)}</pubDate><guid isPermaLink="true">{link}</guid>'
+                f"<category>{rng.choice(THEMES)}</category>"
+                f'<media:content url="{image}" medium="image" width="1024" height="576"/></item>')
+    body = "\n".join(entries)
+    if feed_type == "RDF":
+        document = (f'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/" '
+                    f'xmlns:dc="http://purl.org/dc/elements/1.1/">\n<channel rdf:about="{base}"><title>Synthetic {seed}</title>'
+                    f"<link>{base}</link><description>Synthetic RDF feed</description></channel>\n{body}\n</rdf:RDF>")
+    elif feed_type == "ATOM":
+        document = (f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Synthetic {seed}</title><id>{base}</id>'
+                    f"<updated>{SYNTHETIC_BASE_DATE.strftime('%Y-%m-%dT%H:%M:%SZ')}</updated>\n{body}\n</feed>")
+    else:
+        document = (f'<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/">'
+                    f"<channel><title>Synthetic {seed}</title><link>{base}</link><description>Synthetic RSS feed</description>"
+                    f"<language>{language.lower()}</language><lastBuildDate>{_rfc822(SYNTHETIC_BASE_DATE)}</lastBuildDate>\n"
+                    f"{body}\n</channel></rss>")
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n' + document + "\n").encode("utf-8")
+
+
+def synthetic_articles(count: int, seed: int = 0, duplicate_ratio: float = 0.1,
+                       newspaper_ids: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Raw articles as the ingestion stage stores them, with the fields the enrichment
+    adds under "enriched". About duplicate_ratio of them retell an earlier story,
+    like outlets covering the same event.
+    """
+    rng = random.Random(f"articles-{seed}")
+    newspaper_ids = newspaper_ids or list(range(1, len(OUTLET_FIXTURES) + 1))
+    articles = []
+    for number in range(count):
+        language = rng.choice(LANGUAGES)
+        if articles and rng.random() < duplicate_ratio:
+            original = rng.choice(articles)
+            story = {**original, "title": original["title"] + " - update"}
+            language = original["enriched"]["language"]
+        else:
+            story = _story(rng, language, number)
+        city = story["location"]
+        _, country_id, latitude, longitude = next(place for place in PLACES if place[0] == city)
+        date = SYNTHETIC_BASE_DATE - timedelta(minutes=3 * number)
+        articles.append({
+            "title": story["title"],
+            "description": story["description"],
+            "author": "Newsroom",
+            "image": f"{SYNTHETIC_HOST}/img/articles/{number}.jpg",
+            "external_link": f"{SYNTHETIC_HOST}/articles/{seed}/{number:06d}",
+            "publication_date": date.isoformat(),
+            "newspaper_id": rng.choice(newspaper_ids),
+            "location": city,
+            "enriched": {
+                "subtitle": story["description"].split(". ", 1)[-1],
+                "theme": rng.choice(THEMES),
+                "theme_tags": rng.sample(THEMES, 3),
+                "country_id": country_id,
+                "language": language,
+                "minimal_age": 0,
+                "latitude": latitude,
+                "longitude": longitude,
+            },
+        })
+    return articles
+
+
+def record(timeout: float = 30) -> int:
+    """Overwrite each outlet's fixture with its live feed; returns the number of feeds recorded"""
+    recorded = 0
+    for newspaper in seeded_newspapers():
+        fixture = OUTLET_FIXTURES.get(newspaper["name"])
+        if not fixture or not newspaper["rss_feed_url"]:
+            print(f"Skipping {newspaper['name']}: no feed URL in the seed data")
+            continue
+        req = urllib.request.Request(newspaper["rss_feed_url"], headers={"User-Agent": "globnuz-benchmark/1.0"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                content = response.read()
+        except OSError as e:
+            print(f"Could not record {newspaper['name']} ({newspaper['rss_feed_url']}): {e}")
+            continue
+        with open(os.path.join(FIXTURES_DIR, fixture), "wb") as feed:
+            feed.write(content)
+        print(f"Recorded {newspaper['name']}: {len(content)} bytes into {fixture}")
+        recorded += 1
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the feed fixtures or print a synthetic feed")
+    parser.add_argument("--record", action="store_true", help="Refresh the fixtures from the outlets' live feeds")
+    parser.add_argument("--format", choices=FEED_FORMATS, default="RSS", help="Format of the synthetic feed")
+    parser.add_argument("--items", type=int, default=100, help="Items of the synthetic feed")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic feed")
+    args = parser.parse_args()
+
+    if args.record:
+        sys.exit(0 if record() else 1)
+    sys.stdout.buffer.write(synthetic_feed(args.format, args.items, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Offline throughput benchmark of the pipeline scripts.
+
+Runs get-rss-news-raw.py, send-rss-feed-to-ai.py and translate-ai-news-fr-en.py
+end to end against the local stubs of stub_servers.py: feeds come from the
+fixture corpus plus scaled-up synthetic feeds (feeds.py), Supabase is a
+PostgREST stub over an in-memory SQLite database, and OpenAI and DeepL are
+stubs with configurable latency and rate limits. Nothing leaves the machine.
+
+Each stage runs its Lambda handler in a fresh child process, so module-level
+caches start cold and the peak RSS is the stage's own. Reported per stage:
+items per second, p50/p99 latency of the stage's unit of work (a feed, an
+OpenAI batch, a translation page) and peak RSS.
+
+    python benchmarks/run_pipeline_benchmark.py --output bench.json
+    python benchmarks/run_pipeline_benchmark.py --baseline bench.json --max-regression 0.15
+
+With --baseline, the exit status is 1 when a stage's throughput dropped by
+more than --max-regression from the baseline's, so it can gate a deploy.
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BENCHMARKS_DIR, "..", "src", "python")
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import feeds  # noqa: E402
+from stub_servers import DeepLStub, FeedStub, OpenAIStub, PostgRESTStub  # noqa: E402
+
+# Per stage: script, Lambda event, (owner, function) timed as the unit of work, unit name
+STAGES = {
+    "get-rss-news-raw": ("get-rss-news-raw.py", {"all_newspapers": True}, ("RSSProcessor", "process"), "feed"),
+    "send-rss-feed-to-ai": ("send-rss-feed-to-ai.py", {}, ("NewsProcessor", "process_articles_with_chatgpt"), "batch"),
+    "translate-ai-news-fr-en": ("translate-ai-news-fr-en.py", {}, (None, "translate_articles"), "page"),
+}
+
+# Columns of news_articles the translation stage starts from
+ARTICLE_COLUMNS = ["title", "author", "description", "image", "external_link", "publication_date", "newspaper_id",
+                   "location"]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile, 0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+# Child: one stage in its own process
+
+def load_script(filename: str):
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace("-", "_"), os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_child(stage: str) -> Dict[str, Any]:
+    """Run a stage's Lambda handler with the environment the parent set, timing each unit of work"""
+    filename, event, (owner_name, function_name), _ = STAGES[stage]
+    sys.path.insert(0, SCRIPTS_DIR)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        module = load_script(filename)
+        logging.disable(logging.CRITICAL)  # The scripts log every row; the benchmark measures the work
+
+        latencies = []
+        lock = threading.Lock()
+        owner = getattr(module, owner_name) if owner_name else module
+        original = getattr(owner, function_name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+        setattr(owner, function_name, timed)
+        started = time.perf_counter()
+        response = module.lambda_handler(event, None)
+        wall_seconds = time.perf_counter() - started
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024  # Bytes on macOS, KiB elsewhere
+    return {"status": response.get("statusCode"), "body": response.get("body"), "wall_seconds": wall_seconds,
+            "latencies": latencies, "peak_rss_mb": peak_rss_mb}
+
+
+# Parent: stubs, seeding and reporting
+
+def seed_newspapers(postgrest: PostgRESTStub, feed_stub: FeedStub, synthetic_feeds: int, items_per_feed: int) -> None:
+    """Every seeded outlet on its fixture (Reuters too), the format samples, then the synthetic feeds"""
+    outlets = {newspaper["name"]: newspaper for newspaper in feeds.seeded_newspapers()}
+    rows = []
+    for name, fixture in feeds.OUTLET_FIXTURES.items():
+        rows.append({"name": name, "country_id": outlets.get(name, {}).get("country_id") or "US",
+                     "description": name, "rss_feed_url": f"{feed_stub.url}/feeds/{fixture}"})
+    for fixture in feeds.FORMAT_SAMPLES:
+        rows.append({"name": fixture, "country_id": "US", "description": "Format sample",
+                     "rss_feed_url": f"{feed_stub.url}/feeds/{fixture}"})
+    for number in range(synthetic_feeds):
+        feed_type = feeds.FEED_FORMATS[number % len(feeds.FEED_FORMATS)].lower()
+        rows.append({"name": f"Synthetic {number}", "country_id": "US", "description": "Synthetic feed",
+                     "rss_feed_url": f"{feed_stub.url}/synthetic/{feed_type}-{items_per_feed}-{number}.xml"})
+    postgrest.store.insert("newspapers", rows)
+
+
+def seed_raw_articles(postgrest: PostgRESTStub, count: int, seed: int) -> None:
+    rows = [{column: article[column] for column in feeds.RAW_COLUMNS} for article in feeds.synthetic_articles(count, seed)]
+    postgrest.store.insert("news_articles_raw", rows)
+
+
+def seed_articles(postgrest: PostgRESTStub, count: int, seed: int) -> None:
+    rows = [{**{column: article[column] for column in ARTICLE_COLUMNS}, **article["enriched"]}
+            for article in feeds.synthetic_articles(count, seed)]
+    postgrest.store.insert("news_articles", rows)
+
+
+def run_stage(stage: str, args, run: int) -> Dict[str, Any]:
+    """Seed fresh stubs for one run of a stage, run it in a child process and count what it wrote"""
+    stub_options = lambda prefix: {  # noqa: E731
+        "latency": getattr(args, f"{prefix}_latency_ms") / 1000,
+        "jitter": getattr(args, f"{prefix}_jitter_ms") / 1000,
+        "requests_per_minute": getattr(args, f"{prefix}_rpm") or None,
+    }
+    with PostgRESTStub(**stub_options("postgrest")) as postgrest, FeedStub(**stub_options("feed")) as feed_stub, \
+            OpenAIStub(**stub_options("openai")) as openai, DeepLStub(**stub_options("deepl")) as deepl, \
+            tempfile.TemporaryDirectory() as scratch:
+        env = {
+            **os.environ,
+            "PYTHONPATH": SCRIPTS_DIR,
+            "STORAGE_BACKEND": "supabase",
+            "SUPABASE_URL": postgrest.url,
+            "SUPABASE_KEY": "benchmark",
+            "SUPABASE_API_KEY": "benchmark",
+            "SUPABASE_TABLE_EVENTS_RAW": "news_articles_raw",
+            "RSS_MAX_ENTRIES_PER_FEED": "0",
+            "RSS_MAX_PER_HOST": "1000",  # Every feed is on the one stub host; publishers are separate hosts
+            "OPENAI_API_URL": f"{openai.url}/v1/chat/completions",
+            "OPENAI_API_KEY": "benchmark",
+            "AI_MAX_ARTICLES_PER_RUN": str(args.articles),
+            "AI_REQUESTS_PER_MINUTE": str(args.openai_rpm or 1000000),
+            "AI_TOKENS_PER_MINUTE": str(args.openai_tpm),
+            "ENRICHMENT_CACHE_PATH": os.path.join(scratch, "enrichment-cache.sqlite3"),
+            "DEEPL_API_URL": f"{deepl.url}/v2/translate",
+            "DEEPL_API_KEY": "benchmark",
+        }
+        if stage == "get-rss-news-raw":
+            seed_newspapers(postgrest, feed_stub, args.synthetic_feeds, args.feed_items)
+        elif stage == "send-rss-feed-to-ai":
+            seed_raw_articles(postgrest, args.articles, args.seed + run)
+        else:
+            seed_articles(postgrest, args.articles, args.seed + run)
+
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", stage],
+                               env=env, capture_output=True, text=True)
+        if child.returncode != 0:
+            raise RuntimeError(f"{stage} failed:\n{child.stderr}")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+
+        if stage == "get-rss-news-raw":
+            result["items"] = postgrest.count("news_articles_raw")
+        elif stage == "send-rss-feed-to-ai":
+            result["items"] = postgrest.count("news_articles_raw", "WHERE ai_processed")
+        else:
+            result["items"] = postgrest.count("news_articles", "WHERE translated")
+        result["requests"] = {"postgrest": postgrest.requests, "feeds": feed_stub.requests,
+                              "openai": openai.requests, "deepl": deepl.requests}
+        result["throttled"] = postgrest.throttled + feed_stub.throttled + openai.throttled + deepl.throttled
+    return result
+
+
+def summarize(stage: str, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    latencies = [latency for run in runs for latency in run["latencies"]]
+    return {
+        "unit": STAGES[stage][3],
+        "runs": len(runs),
+        "items": runs[0]["items"],
+        "wall_seconds": statistics.median(run["wall_seconds"] for run in runs),
+        "throughput": statistics.median(run["items"] / run["wall_seconds"] for run in runs),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+        "requests": runs[-1]["requests"],
+        "throttled": sum(run["throttled"] for run in runs),
+        "status": [run["status"] for run in runs],
+    }
+
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'stage':<26}{'items':>8}{'seconds':>9}{'items/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'peak RSS MB':>13}{'429s':>6}  unit")
+    for stage, summary in results.items():
+        print(f"{stage:<26}{summary['items']:>8}{summary['wall_seconds']:>9.2f}{summary['throughput']:>10.1f}"
+              f"{summary['p50_ms']:>10.1f}{summary['p99_ms']:>10.1f}{summary['peak_rss_mb']:>13.1f}"
+              f"{summary['throttled']:>6}  {summary['unit']}")
+
+
+def regressions(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Stages whose throughput fell more than max_regression below the baseline's"""
+    found = []
+    for stage, summary in results.items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference:
+            continue
+        change = summary["throughput"] / reference["throughput"] - 1
+        line = f"{stage}: {reference['throughput']:.1f} -> {summary['throughput']:.1f} items/s ({change:+.1%})"
+        print(line)
+        if change < -max_regression:
+            found.append(line)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark of the pipeline scripts")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; throughput is their median")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic articles")
+    parser.add_argument("--synthetic-feeds", type=int, default=24, help="Synthetic feeds next to the fixtures")
+    parser.add_argument("--feed-items", type=int, default=250, help="Items per synthetic feed")
+    parser.add_argument("--articles", type=int, default=500, help="Articles to enrich and to translate")
+    for prefix, latency, jitter, service in [("postgrest", 5, 5, "Supabase"), ("feed", 50, 50, "feed"),
+                                             ("openai", 800, 400, "OpenAI"), ("deepl", 150, 100, "DeepL")]:
+        flag = prefix.replace("_", "-")
+        parser.add_argument(f"--{flag}-latency-ms", type=float, default=latency, help=f"{service} stub latency")
+        parser.add_argument(f"--{flag}-jitter-ms", type=float, default=jitter, help=f"{service} stub latency jitter")
+        parser.add_argument(f"--{flag}-rpm", type=int, default=0, help=f"{service} stub requests per minute, 0 for none")
+    parser.add_argument("--openai-tpm", type=int, default=2000000, help="Tokens per minute the enrichment paces itself to")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare throughput with")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="Tolerated throughput drop, as a fraction")
+    parser.add_argument("--child", choices=list(STAGES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child)))
+        return
+
+    results = {}
+    for stage in args.stages:
+        print(f"Running {stage}...", file=sys.stderr)
+        results[stage] = summarize(stage, [run_stage(stage, args, run) for run in range(args.repeat)])
+    print_report(results)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("stages", "output", "baseline", "max_regression", "child")}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"config": config, "stages": results}, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("config") != config:
+            print("Warning: the baseline ran with different options", file=sys.stderr)
+        if regressions(results, baseline, args.max_regression):
+            print(f"Throughput regressed by more than {args.max_regression:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
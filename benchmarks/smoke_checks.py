@@ -0,0 +1,234 @@
+"""
+Offline end-to-end checks of pipeline code paths the benchmark does not reach.
+
+Each check runs a script's real entry point against fresh stubs from
+stub_servers.py and fails with an AssertionError (or the script's own
+exception) when the path is broken. Nothing leaves the machine.
+
+    python benchmarks/smoke_checks.py            # every check
+    python benchmarks/smoke_checks.py feed-streaming feed-buffered
+"""
+import argparse
+import contextlib
+import logging
+import os
+import re
+import sys
+import tempfile
+import traceback
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+import feeds  # noqa: E402
+from run_pipeline_benchmark import SCRIPTS_DIR, load_script, seed_articles, seed_raw_articles  # noqa: E402
+from stub_servers import DeepLStub, FeedStub, OpenAIStub, PostgRESTStub  # noqa: E402
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+FEED_FIXTURE = "bbc_world.xml"
+TRANSLATION_ARTICLES = 60
+FEED_CAP = 3  # Fewer than the fixture's items, so a run leaves entries behind
+ENRICHMENT_ARTICLES = 40
+ENRICHMENT_FETCH_LIMIT = 10
+ENRICHMENT_MAX_ARTICLES = 25  # Not a multiple of the fetch limit, so the last page is a partial one
+
+
+def run_feed(module, postgrest: PostgRESTStub, rss_feed_url: str, feed_cache: dict):
+    """RSSProcessor.process() on one feed of newspaper 1, returning the processor"""
+    if not postgrest.store.select("newspapers", ["id"], {"id": "eq.1"}):
+        postgrest.store.insert("newspapers", [{"name": "Smoke", "country_id": "US", "description": "Smoke",
+                                               "rss_feed_url": rss_feed_url}])
+    processor = module.RSSProcessor(1, postgrest.url, "smoke", "news_articles_raw", rss_feed_url=rss_feed_url,
+                                    feed_cache=feed_cache)
+    processor.process()
+    assert processor.feed_chunks is None, "the feed body was left open"
+    assert processor.fetched_entries_count > 0, "no entries were parsed"
+    assert processor.failed_entries_count == 0, f"{processor.failed_entries_count} entries failed"
+    return processor
+
+
+def ingest_feed(feed_path: str, feed_cache: dict) -> None:
+    """Run one fixture feed through the ingestion and check its entries reached the raw table"""
+    os.environ["RSS_MAX_ENTRIES_PER_FEED"] = "0"
+    module = load_script("get-rss-news-raw.py")
+    with PostgRESTStub() as postgrest, FeedStub() as feed_stub:
+        processor = run_feed(module, postgrest, f"{feed_stub.url}{feed_path}", feed_cache)
+        stored = postgrest.count("news_articles_raw")
+        assert stored == processor.successful_entries_count > 0, \
+            f"{stored} raw rows stored for {processor.successful_entries_count} uploaded entries"
+
+
+def check_feed_streaming() -> None:
+    """A feed with an ETag is parsed while it downloads"""
+    ingest_feed(f"/feeds/{FEED_FIXTURE}", {})
+
+
+def check_feed_buffered() -> None:
+    """A feed without validators but with a stored content hash is read in full, hashed, then parsed"""
+    ingest_feed(f"/plain/feeds/{FEED_FIXTURE}", {"rss_content_hash": "stale"})
+
+
+def check_raw_link_dedup() -> None:
+    """Items whose publisher changed the pubDate are not stored a second time"""
+    os.environ["RSS_MAX_ENTRIES_PER_FEED"] = "0"
+    module = load_script("get-rss-news-raw.py")
+    with PostgRESTStub() as postgrest, FeedStub() as feed_stub:
+        path = f"/feeds/{FEED_FIXTURE}"
+        first = run_feed(module, postgrest, f"{feed_stub.url}{path}", {})
+        feed_stub.documents[path] = re.sub(rb"<pubDate>[^<]*</pubDate>", b"<pubDate>Mon, 31 Mar 2025 09:00:00 GMT</pubDate>",
+                                           feed_stub.documents[path])
+        second = run_feed(module, postgrest, f"{feed_stub.url}{path}", {})  # No feed cache: every item is parsed
+
+        stored = postgrest.count("news_articles_raw")
+        assert stored == first.successful_entries_count > 0, \
+            f"{stored} raw rows after re-dating {first.successful_entries_count} items"
+        assert second.successful_entries_count == 0, f"{second.successful_entries_count} re-dated items stored again"
+
+
+def check_feed_cap_and_backfill() -> None:
+    """Entries cut off by the per-feed cap, and items backfilled below the high-water mark, are ingested later"""
+    os.environ["RSS_MAX_ENTRIES_PER_FEED"] = str(FEED_CAP)
+    module = load_script("get-rss-news-raw.py")
+    with PostgRESTStub() as postgrest, FeedStub() as feed_stub:
+        path = f"/feeds/{FEED_FIXTURE}"
+        items = feed_stub.documents[path].count(b"<item>")
+        runs = 0
+        while True:
+            runs += 1
+            newspaper, = postgrest.store.select("newspapers", module.FEED_CACHE_COLUMNS, {"id": "eq.1"}) or [{}]
+            processor = module.RSSProcessor(1, postgrest.url, "smoke", "news_articles_raw",
+                                            rss_feed_url=f"{feed_stub.url}{path}", feed_cache=newspaper)
+            if runs == 1:
+                postgrest.store.insert("newspapers", [{"name": "Smoke", "country_id": "US", "description": "Smoke",
+                                                       "rss_feed_url": processor.rss_feed_url}])
+            processor.process()
+            if not processor.successful_entries_count or runs > items:
+                break
+        stored = postgrest.count("news_articles_raw")
+        assert stored == items, f"{stored} of {items} items stored after {runs} runs capped at {FEED_CAP}"
+
+        # A publisher adds an item dated before everything already ingested
+        backfill = (b"<item><title>Backfilled report</title><description>Added late</description><link>https://www.bbc.com/news/articles/backfill</link>"
+                    b"<pubDate>Mon, 06 Jan 2020 09:00:00 GMT</pubDate></item>")
+        feed_stub.documents[path] = feed_stub.documents[path].replace(b"<item>", backfill + b"<item>", 1)
+        newspaper, = postgrest.store.select("newspapers", module.FEED_CACHE_COLUMNS, {"id": "eq.1"})
+        processor = module.RSSProcessor(1, postgrest.url, "smoke", "news_articles_raw",
+                                        rss_feed_url=f"{feed_stub.url}{path}", feed_cache=newspaper)
+        processor.process()
+        assert processor.successful_entries_count == 1, "the backfilled item was taken for a known one"
+
+
+def check_translation_failure() -> None:
+    """Articles whose DeepL batch failed are neither stored nor marked translated, and their lease is released"""
+    with PostgRESTStub() as postgrest, DeepLStub(fail_targets={"FR"}) as deepl:
+        os.environ.update({"SUPABASE_URL": postgrest.url, "SUPABASE_API_KEY": "smoke",
+                           "DEEPL_API_URL": f"{deepl.url}/v2/translate", "DEEPL_API_KEY": "smoke"})
+        seed_articles(postgrest, TRANSLATION_ARTICLES, seed=1)
+        module = load_script("translate-ai-news-fr-en.py")
+        module.lambda_handler({}, None)
+
+        articles = postgrest.store.select("news_articles", ["id", "language", "translated", "translation_claimed_at"])
+        french = [article for article in articles if article["language"] == "FR"]
+        assert french and len(french) < len(articles), "the seed needs French and non-French articles"
+        for article in articles:
+            # Only French articles need no translation into French
+            assert bool(article["translated"]) == (article["language"] == "FR"), \
+                f"article {article['id']} in {article['language']}: translated={article['translated']}"
+            assert article["translation_claimed_at"] is None, f"article {article['id']} is still leased"
+        rows = postgrest.store.select("news_articles_translated", ["original_article_id"])
+        assert {row["original_article_id"] for row in rows} == {article["id"] for article in french}, \
+            "translation rows were written for articles DeepL failed on"
+
+
+def check_translation_outage() -> None:
+    """A run that can't read or lease the backlog fails instead of reporting nothing to translate"""
+    for fail_method in ("GET", "PATCH"):
+        with PostgRESTStub() as postgrest, DeepLStub() as deepl:
+            os.environ.update({"SUPABASE_URL": postgrest.url, "SUPABASE_API_KEY": "smoke",
+                               "DEEPL_API_URL": f"{deepl.url}/v2/translate", "DEEPL_API_KEY": "smoke"})
+            seed_articles(postgrest, TRANSLATION_ARTICLES, seed=1)
+            postgrest.fail_methods.add(fail_method)
+            module = load_script("translate-ai-news-fr-en.py")
+            response = module.lambda_handler({}, None)
+
+            assert response["statusCode"] == 500, f"{fail_method} failing: {response}"
+            translated = postgrest.count("news_articles", "WHERE translated")
+            assert translated == 0, f"{fail_method} failing: {translated} articles translated"
+
+
+def check_enrichment_run_cap() -> None:
+    """A run capped at max_articles leaves no unprocessed raw row leased behind it"""
+    with PostgRESTStub() as postgrest, OpenAIStub() as openai, tempfile.TemporaryDirectory() as scratch:
+        os.environ.update({"SUPABASE_URL": postgrest.url, "SUPABASE_KEY": "smoke",
+                           "SUPABASE_TABLE_EVENTS_RAW": "news_articles_raw",
+                           "OPENAI_API_URL": f"{openai.url}/v1/chat/completions", "OPENAI_API_KEY": "smoke",
+                           "AI_FETCH_LIMIT": str(ENRICHMENT_FETCH_LIMIT),
+                           "AI_MAX_ARTICLES_PER_RUN": str(ENRICHMENT_MAX_ARTICLES),
+                           "ENRICHMENT_CACHE_PATH": os.path.join(scratch, "enrichment-cache.sqlite3")})
+        seed_raw_articles(postgrest, ENRICHMENT_ARTICLES, seed=1)
+        module = load_script("send-rss-feed-to-ai.py")
+        module.lambda_handler({}, None)
+
+        processed = postgrest.count("news_articles_raw", "WHERE ai_processed")
+        leased = postgrest.count("news_articles_raw", "WHERE NOT ai_processed AND ai_claimed_at IS NOT NULL")
+        assert processed == ENRICHMENT_MAX_ARTICLES, f"{processed} raw rows processed, {ENRICHMENT_MAX_ARTICLES} expected"
+        assert leased == 0, f"{leased} raw rows claimed past max_articles are still leased"
+
+
+def check_enrichment_overlap() -> None:
+    """A batch whose raw rows another run partly processed inserts only the articles still pending"""
+    with PostgRESTStub() as postgrest:
+        seed_raw_articles(postgrest, 4, seed=1)
+        module = load_script("send-rss-feed-to-ai.py")
+        processor = module.NewsProcessor("smoke", postgrest.url, "smoke", "news_articles_raw", "news_articles")
+        raw_articles = postgrest.store.select("news_articles_raw", ["id", *feeds.RAW_COLUMNS])
+        enriched = [{"raw_id": article["id"], **{column: article[column] for column in feeds.RAW_COLUMNS},
+                     "theme": "society", "country_id": "US", "language": "EN"} for article in raw_articles]
+        assert processor.store_batch(raw_articles[:2], enriched[:2]) == 2  # The concurrent run
+        inserted = processor.store_batch(raw_articles, enriched)
+        assert inserted == 2, f"the overlapping batch reported {inserted} articles inserted"
+
+        links = [row["external_link"] for row in postgrest.store.select("news_articles", ["external_link"])]
+        assert sorted(links) == sorted(article["external_link"] for article in raw_articles), \
+            f"{len(links)} articles stored for {len(raw_articles)} raw rows"
+        pending = postgrest.count("news_articles_raw", "WHERE NOT ai_processed")
+        assert pending == 0, f"{pending} raw rows left unprocessed"
+
+
+CHECKS = {
+    "feed-streaming": check_feed_streaming,
+    "feed-buffered": check_feed_buffered,
+    "raw-link-dedup": check_raw_link_dedup,
+    "feed-cap-backfill": check_feed_cap_and_backfill,
+    "translation-failure": check_translation_failure,
+    "translation-outage": check_translation_outage,
+    "enrichment-run-cap": check_enrichment_run_cap,
+    "enrichment-overlap": check_enrichment_overlap,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checks", nargs="*", help=f"Checks to run, of {', '.join(CHECKS)} (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(unknown)}")
+    logging.disable(logging.CRITICAL)  # The scripts log and print every row; only the outcome matters here
+
+    failed = []
+    for name in args.checks or list(CHECKS):
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                CHECKS[name]()
+            print(f"ok      {name}")
+        except Exception:
+            failed.append(name)
+            print(f"FAILED  {name}\n{traceback.format_exc()}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Local HTTP stand-ins for the services the pipeline calls, for offline benchmarks.
+
+  - PostgRESTStub answers /rest/v1/... like Supabase, on an in-memory
+    SQLiteStore (src/python/storage.py): select/filters/order/limit, bulk
+    inserts with on_conflict and the Prefer header, PATCH, the RPCs the store
+    implements, the OpenAPI column listing and PostgREST's error bodies.
+  - OpenAIStub answers chat completions by echoing the articles of the user
+    message back as enriched articles, with the x-ratelimit-* headers.
+  - DeepLStub answers /v2/translate with one tagged translation per text.
+  - FeedStub serves the fixture feeds and synthetic feeds of feeds.py, with
+    or without ETags.
+
+Every stub takes a latency and jitter in seconds added to each response, and
+an optional requests-per-minute limit: requests over it get a 429 with
+Retry-After, as the real services send them. Servers run on 127.0.0.1, on a
+free port, in a daemon thread:
+
+    with OpenAIStub(latency=0.4, requests_per_minute=500) as openai:
+        os.environ["OPENAI_API_URL"] = openai.url + "/v1/chat/completions"
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "python"))
+
+from storage import SQLiteStore  # noqa: E402
+
+import feeds  # noqa: E402
+
+# Tables of the migrations the scripts use that SQLITE_SCHEMA leaves out
+STUB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_enrichment_cache (
+    cache_key TEXT PRIMARY KEY,
+    result JSON NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+SYNTHETIC_FEED_RE = re.compile(r"^/synthetic/(rss|rdf|atom)-(\d+)-(\d+)\.xml$")
+
+
+class TokenBucket:
+    """
+    Requests-per-minute limit with a burst of one second's worth of requests, so
+    short runs hit it too; take() returns 0 when a request may go, else the
+    seconds until it may
+    """
+
+    def __init__(self, requests_per_minute: int):
+        self.limit = float(requests_per_minute)
+        self.burst = max(1.0, self.limit / 60)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.limit / 60)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) * 60 / self.limit
+
+
+class StubServer:
+    """A ThreadingHTTPServer on a free local port; subclasses implement handle()"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, requests_per_minute: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.requests = 0
+        self.throttled = 0
+        self.counter_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = None
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, as the pooled client expects
+
+            def do_GET(self):
+                stub._dispatch(self, "GET")
+
+            def do_POST(self):
+                stub._dispatch(self, "POST")
+
+            def do_PATCH(self):
+                stub._dispatch(self, "PATCH")
+
+            def do_DELETE(self):
+                stub._dispatch(self, "DELETE")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _dispatch(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        with self.counter_lock:
+            self.requests += 1
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        wait = self.bucket.take() if self.bucket else 0.0
+        if wait:
+            with self.counter_lock:
+                self.throttled += 1
+            status, headers, payload = self.throttle(wait)
+        else:
+            delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if delay:
+                time.sleep(delay)
+            parts = urllib.parse.urlsplit(request.path)
+            try:
+                status, headers, payload = self.handle(method, parts.path, parts.query, request.headers, body)
+            except Exception as e:
+                status, headers, payload = 500, {}, {"message": f"{type(e).__name__}: {e}"}
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode() if payload is not None else b""
+            headers = {"Content-Type": "application/json", **headers}
+        request.send_response(status)
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def throttle(self, wait: float) -> Tuple[int, Dict[str, str], Any]:
+        return 429, {"Retry-After": f"{wait:.2f}"}, {"message": "Too many requests"}
+
+    def handle(self, method: str, path: str, query: str, headers, body: bytes) -> Tuple[int, Dict[str, str], Any]:
+        raise NotImplementedError
+
+    def start(self) -> "StubServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class PostgRESTStub(StubServer):
+    """/rest/v1 over an in-memory SQLiteStore, which the benchmark seeds and counts through .store;
+    requests on a table with a method in fail_methods get a 503"""
+
+    def __init__(self, store: Optional[SQLiteStore] = None, fail_methods=(), **kwargs):
+        super().__init__(**kwargs)
+        self.store = store or SQLiteStore(":memory:")
+        self.store.db.executescript(STUB_SCHEMA)
+        self.fail_methods = set(fail_methods)
+
+    @staticmethod
+    def error(status: int, code: str, message: str) -> Tuple[int, Dict[str, str], Any]:
+        return status, {}, {"code": code, "details": None, "hint": None, "message": message}
+
+    def handle(self, method, path, query, headers, body):
+        if not path.startswith("/rest/v1/"):
+            return self.error(404, "PGRST125", f"Invalid path specified in request URL: {path}")
+        table = path[len("/rest/v1/"):]
+        params = dict(urllib.parse.parse_qsl(query, keep_blank_values=True))
+        prefer = {option.strip() for option in (headers.get("Prefer") or "").split(",")}
+        columns = params.pop("select", "*").split(",")
+        payload = json.loads(body) if body else None
+        try:
+            if not table:
+                return self.openapi(params.get("table"))
+            if table.startswith("rpc/"):
+                return self.rpc(table[len("rpc/"):], payload or {}, columns if columns != ["*"] else None)
+            if method in self.fail_methods:
+                return self.error(503, "PGRST000", "Could not connect with the database")
+            if method == "GET":
+                order, limit = params.pop("order", None), params.pop("limit", None)
+                return 200, {}, self.store.select(table, columns, params, order=order, limit=limit)
+            returning = columns if "return=representation" in prefer else None
+            if method == "POST":
+                on_conflict = params.pop("on_conflict", None)
+                params.pop("columns", None)  # Rows are grouped by their keys anyway
+                rows = payload if isinstance(payload, list) else [payload]
+                inserted = self.store.insert(table, rows, on_conflict=on_conflict,
+                                             ignore_duplicates="resolution=ignore-duplicates" in prefer,
+                                             returning=returning)
+                return 201, {}, inserted if returning else None
+            if method == "PATCH":
+                updated = self.store.update(table, params, payload, returning=returning)
+                return 200, {}, updated if returning else None
+            return self.error(405, "PGRST117", f"Unsupported HTTP method: {method}")
+        except sqlite3.IntegrityError as e:
+            return self.error(409, "23505", f"duplicate key value violates unique constraint ({e})")
+        except sqlite3.OperationalError as e:
+            message = str(e)
+            missing_column = re.search(r"has no column named (\w+)", message)
+            if missing_column:
+                return self.error(400, "PGRST204", f"Could not find the '{missing_column.group(1)}' column "
+                                                   f"of '{table}' in the schema cache")
+            if message.startswith("no such table"):
+                return self.error(404, "42P01", f'relation "public.{table}" does not exist')
+            return self.error(400, "PGRST100", message)
+
+    def openapi(self, table: Optional[str]):
+        definitions = {}
+        if table:
+            try:
+                definitions[table] = {"properties": {column: {} for column in self.store.table_columns(table)}}
+            except sqlite3.OperationalError:
+                pass
+        return 200, {}, {"swagger": "2.0", "definitions": definitions}
+
+    def rpc(self, name: str, payload: Dict[str, Any], columns):
+        if name == "refresh_globe_cards":
+            # sql/migrations/011; the cards themselves are not part of the benchmark
+            return 200, {}, len(payload.get("article_ids") or [])
+        try:
+            return 200, {}, self.store.rpc(name, payload, columns)
+        except NotImplementedError:
+            return self.error(404, "PGRST202", f"Could not find the function public.{name} in the schema cache")
+
+    def count(self, table: str, where: str = "") -> int:
+        with self.store.lock:
+            return self.store.db.execute(f"SELECT count(*) FROM {table} {where}").fetchone()[0]
+
+
+class OpenAIStub(StubServer):
+    """Chat completions that return the articles of the user message as enriched articles"""
+
+    def throttle(self, wait):
+        status, headers, payload = super().throttle(wait)
+        headers.update(self.rate_limit_headers(0))
+        payload = {"error": {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}}
+        return status, headers, payload
+
+    def rate_limit_headers(self, remaining: int) -> Dict[str, str]:
+        if not self.bucket:
+            return {}
+        return {
+            "x-ratelimit-limit-requests": str(int(self.bucket.limit)),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{int(60000 / self.bucket.limit)}ms",
+        }
+
+    def handle(self, method, path, query, headers, body):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, {}, {"error": {"message": f"Unknown path {path}"}}
+        request = json.loads(body)
+        articles = json.loads(request["messages"][-1]["content"])
+        content = "```json\n" + json.dumps([self.enrich(article) for article in articles], ensure_ascii=False) + "\n```"
+        remaining = int(self.bucket.tokens) if self.bucket else 0
+        return 200, self.rate_limit_headers(remaining), {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(body) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(body) + len(content)) // 4},
+        }
+
+    @staticmethod
+    def enrich(article: Dict[str, Any]) -> Dict[str, Any]:
+        """The fields the model adds, picked from the title so a story always gets the same ones"""
+        title = article.get("title") or ""
+        digest = int(hashlib.sha1(title.encode()).hexdigest(), 16)
+        city, country_id, latitude, longitude = next(
+            (place for place in feeds.PLACES if place[0] in title), feeds.PLACES[digest % len(feeds.PLACES)])
+        language = next((language for language, (subjects, _, _) in feeds.WORDS.items()
+                         if any(title.startswith(subject) for subject in subjects)), "EN")
+        description = article.get("description") or title
+        return {
+            "raw_id": article.get("raw_id"),
+            "title": title,
+            "subtitle": description.partition(". ")[2] or title,
+            "description": description,
+            "author": article.get("author"),
+            "theme": feeds.THEMES[digest % len(feeds.THEMES)],
+            "theme_tags": [feeds.THEMES[(digest + step) % len(feeds.THEMES)] for step in (0, 2, 4)],
+            "location": city,
+            "language": language,
+            "country_id": country_id,
+            "minimal_age": 0,
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+
+
+class DeepLStub(StubServer):
+    """/v2/translate: each text comes back prefixed with its target language; requests into
+    fail_targets get DeepL's quota error"""
+
+    def __init__(self, fail_targets=(), **kwargs):
+        super().__init__(**kwargs)
+        self.fail_targets = set(fail_targets)
+
+    def handle(self, method, path, query, headers, body):
+        if method != "POST" or not path.endswith("/translate"):
+            return 404, {}, {"message": f"Unknown path {path}"}
+        params = urllib.parse.parse_qs(body.decode(), keep_blank_values=True)
+        if not params.get("auth_key"):
+            return 403, {}, {"message": "Authorization failure, check auth_key"}
+        target = params.get("target_lang", ["EN"])[0]
+        if target in self.fail_targets:
+            return 456, {}, {"message": "Quota exceeded"}
+        return 200, {}, {"translations": [{"detected_source_language": "EN", "text": f"[{target}] {text}"}
+                                          for text in params.get("text", [])]}
+
+
+class FeedStub(StubServer):
+    """/feeds/<fixture> and /synthetic/<format>-<items>-<seed>.xml, with ETag and If-None-Match;
+    the same paths under /plain come without validators, like a publisher that sends none"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.documents = {f"/feeds/{name}": content for name, content in feeds.load_fixtures().items()}
+        self.documents_lock = threading.Lock()
+
+    def document(self, path: str) -> Optional[bytes]:
+        with self.documents_lock:
+            if path not in self.documents:
+                match = SYNTHETIC_FEED_RE.match(path)
+                if not match:
+                    return None
+                feed_type, items, seed = match.groups()
+                self.documents[path] = feeds.synthetic_feed(feed_type.upper(), int(items), int(seed))
+            return self.documents[path]
+
+    def handle(self, method, path, query, headers, body):
+        plain = path.startswith("/plain/")
+        content = self.document(path[len("/plain"):] if plain else path)
+        if method != "GET" or content is None:
+            return 404, {"Content-Type": "text/plain"}, b"Not found"
+        if plain:
+            return 200, {"Content-Type": "application/rss+xml; charset=utf-8"}, content
+        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"Content-Type": "application/rss+xml; charset=utf-8", "ETag": etag}, content
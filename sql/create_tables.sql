@@ -1,5 +1,7 @@
+-- news_articles, news_articles_raw and news_articles_translated are partitioned by month of
+-- publication_date (see the partition functions below), so their keys include it
 CREATE TABLE news_articles (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     title TEXT NOT NULL,
     subtitle TEXT,
     description TEXT NOT NULL,
@@ -10,13 +12,19 @@ CREATE TABLE news_articles (
     image TEXT,
     external_link TEXT NOT NULL,
     publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
-    country_id CHAR(2) NOT NULL;
+    country_id CHAR(2) NOT NULL,
     location TEXT,
     language TEXT NOT NULL,
      minimal_age INT,
     latitude DOUBLE PRECISION,
-    longitude DOUBLE PRECISION
-);
+    longitude DOUBLE PRECISION,
+    translated BOOLEAN DEFAULT FALSE,
+    translated_date TIMESTAMP WITH TIME ZONE,
+    translation_claimed_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id, publication_date)
+) PARTITION BY RANGE (publication_date);
+
+CREATE INDEX idx_news_articles_untranslated ON news_articles(id) WHERE NOT translated;
 
 
 
@@ -29,38 +37,289 @@ ADD CONSTRAINT fk_country_id FOREIGN KEY (country_id)
 REFERENCES countries(id);
 
 CREATE TABLE news_articles_raw (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     title TEXT NOT NULL,
     author TEXT NOT NULL,
     description TEXT NOT NULL,
     newspaper_id INT NOT NULL,
     image TEXT,
-    external_link TEXT NOT NULL UNIQUE,
+    external_link TEXT NOT NULL,
     publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
     ai_processed BOOLEAN DEFAULT FALSE,
-    ai_processed_date TIMESTAMP WITH TIME ZONE
+    ai_processed_date TIMESTAMP WITH TIME ZONE,
+    canonical_raw_id INT,
+    ai_claimed_at TIMESTAMP WITH TIME ZONE,
+    ai_claimed_by TEXT,
+    PRIMARY KEY (id, publication_date),
+    UNIQUE (external_link, publication_date)
+) PARTITION BY RANGE (publication_date);
+
+CREATE INDEX idx_news_articles_raw_external_link ON news_articles_raw(external_link);
+
+CREATE INDEX idx_news_articles_raw_canonical ON news_articles_raw(canonical_raw_id) WHERE canonical_raw_id IS NOT NULL;
+CREATE INDEX idx_news_articles_raw_unprocessed ON news_articles_raw(publication_date DESC) WHERE NOT ai_processed;
+
+-- One row per raw link whatever its publication date, which the partitioned table's unique key
+-- includes: the trigger skips a raw row whose link is already here (sql/migrations/013)
+CREATE TABLE raw_links (
+    external_link TEXT PRIMARY KEY,
+    raw_id INT NOT NULL,  -- First raw row with this link
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,  -- Its publication date
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
 );
 
+CREATE INDEX idx_raw_links_publication_date ON raw_links(publication_date);
+
+CREATE OR REPLACE FUNCTION record_raw_link()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- A concurrent insert of the same link waits on the primary key, then sees the conflict
+    INSERT INTO raw_links (external_link, raw_id, publication_date)
+    VALUES (NEW.external_link, NEW.id, NEW.publication_date)
+    ON CONFLICT (external_link) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- Link already ingested, possibly under another publication date
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER news_articles_raw_link
+BEFORE INSERT ON news_articles_raw
+FOR EACH ROW EXECUTE FUNCTION record_raw_link();
+
+-- Leases up to batch_size unprocessed raw articles to one worker, skipping rows other workers hold
+CREATE OR REPLACE FUNCTION claim_raw_articles(batch_size INT, worker TEXT, lease_seconds INT DEFAULT 900,
+                                              exclude_ids INT[] DEFAULT '{}')
+RETURNS SETOF news_articles_raw
+LANGUAGE sql
+AS $$
+    WITH claimable AS (
+        SELECT id
+        FROM news_articles_raw
+        WHERE NOT ai_processed
+          AND (ai_claimed_at IS NULL OR ai_claimed_at < now() - make_interval(secs => lease_seconds))
+          AND NOT (id = ANY(exclude_ids))
+        ORDER BY publication_date DESC
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE news_articles_raw AS raw
+    SET ai_claimed_at = now(), ai_claimed_by = worker
+    FROM claimable
+    WHERE raw.id = claimable.id
+    RETURNING raw.*;
+$$;
+
 CREATE TABLE news_articles_translated (
-    id SERIAL PRIMARY KEY,
-    original_article_id INT NOT NULL REFERENCES news_articles(id) ON DELETE CASCADE,
+    id SERIAL,
+    original_article_id INT NOT NULL,
     title TEXT NOT NULL,
     subtitle TEXT,
     description TEXT NOT NULL,
     location TEXT,
     language_translated CHAR(2) NOT NULL,
-    UNIQUE (original_article_id, language_translated)
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,  -- Copy of the article's, the partition key
+    PRIMARY KEY (id, publication_date),
+    UNIQUE (original_article_id, language_translated, publication_date),
+    FOREIGN KEY (original_article_id, publication_date) REFERENCES news_articles(id, publication_date) ON DELETE CASCADE
+) PARTITION BY RANGE (publication_date);
+
+CREATE TABLE translation_memory (
+    text_hash CHAR(64) NOT NULL,
+    target_lang CHAR(2) NOT NULL,
+    translated_text TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (text_hash, target_lang)
 );
 
 CREATE TABLE theme_tags (
     id SERIAL PRIMARY KEY,
     article_id INT NOT NULL,
-    tag TEXT NOT NULL,
-    FOREIGN KEY (article_id) REFERENCES news_articles(id) ON DELETE CASCADE
+    tag TEXT NOT NULL
 );
 
 CREATE INDEX idx_news_articles_date ON news_articles(publication_date);
 CREATE INDEX idx_theme_tags_article_id ON theme_tags(article_id);
+CREATE INDEX idx_news_articles_theme_date ON news_articles(theme, publication_date DESC);
+CREATE INDEX idx_news_articles_country_date ON news_articles(country_id, publication_date DESC);
+CREATE INDEX idx_news_articles_theme_tags ON news_articles USING GIN (theme_tags);
+CREATE INDEX idx_theme_tags_tag_article ON theme_tags(tag, article_id);
+
+CREATE TABLE ai_enrichment_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    result JSONB NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE INDEX idx_ai_enrichment_cache_created_at ON ai_enrichment_cache(created_at);
+
+-- Inserts enriched articles and marks their raw rows processed in one transaction; only the
+-- articles whose raw_id is still unprocessed under the row locks are inserted
+CREATE OR REPLACE FUNCTION insert_enriched_articles(articles JSONB, raw_ids INT[])
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    pending INT[];
+    inserted INT;
+BEGIN
+    -- Under the row locks, a row another run marked processed in the meantime drops out
+    SELECT coalesce(array_agg(id), '{}') INTO pending
+    FROM (SELECT id FROM news_articles_raw WHERE id = ANY(raw_ids) AND NOT ai_processed FOR UPDATE) AS unprocessed;
+    IF cardinality(pending) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO news_articles (title, subtitle, description, author, newspaper_id, theme, theme_tags,
+                               image, external_link, publication_date, country_id, location, language,
+                               minimal_age, latitude, longitude)
+    SELECT article.title, article.subtitle, article.description, article.author, article.newspaper_id,
+           article.theme, article.theme_tags, article.image, article.external_link, article.publication_date,
+           article.country_id, article.location, article.language, article.minimal_age,
+           article.latitude, article.longitude
+    FROM jsonb_array_elements(articles) AS element
+    CROSS JOIN LATERAL jsonb_populate_record(NULL::news_articles, element) AS article
+    WHERE element->>'raw_id' IS NULL OR (element->>'raw_id')::INT = ANY(pending);
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+
+    UPDATE news_articles_raw
+    SET ai_processed = TRUE, ai_processed_date = now()
+    WHERE id = ANY(pending);
+
+    RETURN inserted;
+END;
+$$;
+
+-- Monthly partitions: maintain_article_partitions() creates the coming months, detaches
+-- (archives or drops) those past the retention period and purges the rows of the other
+-- tables that pointed at them; run it daily
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent TEXT, from_date DATE DEFAULT current_date,
+                                                     months_ahead INT DEFAULT 3)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::date;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+BEGIN
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+    WHILE month_start <= last_month LOOP
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_' || to_char(month_start, 'YYYY_MM'), parent,
+                month_start, (month_start + interval '1 month')::date
+            );
+        EXCEPTION WHEN check_violation THEN
+            -- The default partition already holds rows of that month; they stay there
+            RAISE NOTICE 'Skipping partition % of %: rows of that month are in the default partition',
+                to_char(month_start, 'YYYY_MM'), parent;
+        END;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION detach_old_partitions(parent TEXT, retention_months INT, drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months))::date;
+    partition_name TEXT;
+    detached INT := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent_table ON parent_table.oid = pg_inherits.inhparent
+        WHERE parent_table.relname = parent
+          AND child.relname ~ ('^' || parent || '_\d{4}_\d{2}$')
+          AND to_date(right(child.relname, 7), 'YYYY_MM') < cutoff
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, partition_name);
+        IF drop_detached THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+        ELSE
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', partition_name, 'archive_' || partition_name);
+        END IF;
+        detached := detached + 1;
+    END LOOP;
+    RETURN detached;
+END;
+$$;
+
+-- Rows of the non-partitioned tables that belong to months older than the retention period
+CREATE OR REPLACE FUNCTION purge_detached_article_rows(retention_months INT)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months))::date;
+    orphan_ids INT[];
+    purged INT := 0;
+    removed INT;
+BEGIN
+    -- Cards whose article is gone; refresh_globe_cards drops them and applies the count deltas
+    SELECT array_agg(DISTINCT cards.article_id) INTO orphan_ids
+    FROM globe_cards AS cards
+    WHERE cards.publication_date < cutoff
+      AND NOT EXISTS (SELECT 1 FROM news_articles AS articles
+                      WHERE articles.id = cards.article_id AND articles.publication_date = cards.publication_date);
+    IF orphan_ids IS NOT NULL THEN
+        PERFORM refresh_globe_cards(orphan_ids);
+        purged := purged + cardinality(orphan_ids);
+    END IF;
+
+    DELETE FROM theme_tags AS tags
+    WHERE NOT EXISTS (SELECT 1 FROM news_articles AS articles WHERE articles.id = tags.article_id);
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    purged := purged + removed;
+
+    -- Content-addressed, so no row points at an article: anything this old has no retained source
+    DELETE FROM ai_enrichment_cache WHERE created_at < cutoff;
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    purged := purged + removed;
+
+    -- A link first published before the cutoff is out of every feed by now
+    DELETE FROM raw_links WHERE publication_date < cutoff;
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    purged := purged + removed;
+
+    RETURN purged;
+END;
+$$;
+
+-- Translations first, then articles: an article partition can only be detached once
+-- the translations referencing it are gone. Then the rows pointing at what was detached.
+CREATE OR REPLACE FUNCTION maintain_article_partitions(retention_months INT DEFAULT 24, months_ahead INT DEFAULT 3,
+                                                       drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    parent TEXT;
+    detached INT := 0;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['news_articles_translated', 'news_articles', 'news_articles_raw'] LOOP
+        PERFORM create_monthly_partitions(parent, current_date, months_ahead);
+        detached := detached + detach_old_partitions(parent, retention_months, drop_detached);
+    END LOOP;
+    PERFORM purge_detached_article_rows(retention_months);
+    RETURN detached;
+END;
+$$;
+
+SELECT create_monthly_partitions('news_articles_raw');
+SELECT create_monthly_partitions('news_articles');
+SELECT create_monthly_partitions('news_articles_translated');
 
 
 CREATE TABLE newspapers (
@@ -70,6 +329,11 @@ CREATE TABLE newspapers (
     image_url TEXT,
     description TEXT NOT NULL,
     rss_feed_url VARCHAR(500),
+    rss_etag TEXT,
+    rss_last_modified TEXT,
+    rss_content_hash CHAR(64),
+    rss_high_water_date TIMESTAMP WITH TIME ZONE,
+    rss_recent_link_hashes TEXT[],
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -136,3 +400,151 @@ INSERT INTO countries (country_id, name, flag_image_url, capital, number_of_inha
 ('NZ', 'New Zealand', 'https://flagcdn.com/nz.svg', 'Wellington', 5084300, 268838, 'Cindy Kiro', 'Monarchie constitutionnelle', ARRAY['Christianisme', 'Athéisme']),
 ('IL', 'Israel', 'https://flagcdn.com/il.svg', 'Jerusalem', 9216900, 20770, 'Isaac Herzog', 'République', ARRAY['Judaïsme', 'Islam', 'Christianisme']),
 ('PK', 'Pakistan', 'https://flagcdn.com/pk.svg', 'Islamabad', 225199937, 881913, 'Arif Alvi', 'République islamique', ARRAY['Islam']);
+
+-- Globe feed read model: one card per translated article and language, and the card count
+-- per filter combination, refreshed by refresh_globe_cards(article_ids)
+CREATE TABLE country_regions (
+    country_id CHAR(2) PRIMARY KEY,
+    region TEXT NOT NULL
+);
+
+-- Same regions as the filters of the site
+INSERT INTO country_regions (country_id, region)
+SELECT unnest(ARRAY['DZ', 'AO', 'BJ', 'BW', 'BF', 'BI', 'CM', 'CV', 'CF', 'TD', 'KM', 'CG', 'CD', 'DJ', 'EG', 'GQ', 'ER', 'ET',
+          'GA', 'GM', 'GH', 'GN', 'GW', 'CI', 'KE', 'LS', 'LR', 'LY', 'MG', 'MW', 'ML', 'MR', 'MU', 'MA', 'MZ', 'NA',
+          'NE', 'NG', 'RW', 'ST', 'SN', 'SC', 'SL', 'SO', 'ZA', 'SS', 'SD', 'SZ', 'TZ', 'TG', 'TN', 'UG', 'ZM', 'ZW']), 'africa'
+UNION ALL
+SELECT unnest(ARRAY['AI', 'AG', 'AR', 'AW', 'BS', 'BB', 'BZ', 'BM', 'BO', 'BR', 'CA', 'KY', 'CL', 'CO', 'CR', 'CU', 'DM', 'DO',
+          'EC', 'SV', 'FK', 'GF', 'GL', 'GD', 'GP', 'GT', 'GY', 'HT', 'HN', 'JM', 'MQ', 'MX', 'MS', 'NI', 'PA', 'PY',
+          'PE', 'PR', 'BL', 'KN', 'LC', 'MF', 'PM', 'VC', 'SR', 'TT', 'TC', 'US', 'UY', 'VE', 'VG', 'VI']), 'americas'
+UNION ALL
+SELECT unnest(ARRAY['AF', 'AM', 'AZ', 'BH', 'BD', 'BT', 'BN', 'KH', 'CN', 'CY', 'GE', 'HK', 'IN', 'ID', 'IR', 'IQ', 'IL', 'JP',
+          'JO', 'KZ', 'KP', 'KR', 'KW', 'KG', 'LA', 'LB', 'MO', 'MY', 'MV', 'MN', 'MM', 'NP', 'OM', 'PK', 'PS', 'PH',
+          'QA', 'SA', 'SG', 'LK', 'SY', 'TW', 'TJ', 'TH', 'TL', 'TR', 'TM', 'AE', 'UZ', 'VN', 'YE']), 'asia'
+UNION ALL
+SELECT unnest(ARRAY['AL', 'AD', 'AT', 'BY', 'BE', 'BA', 'BG', 'HR', 'CZ', 'DK', 'EE', 'FO', 'FI', 'FR', 'DE', 'GI', 'GR', 'GG',
+          'VA', 'HU', 'IS', 'IE', 'IM', 'IT', 'JE', 'LV', 'LI', 'LT', 'LU', 'MT', 'MD', 'MC', 'ME', 'NL', 'MK', 'NO',
+          'PL', 'PT', 'RO', 'RU', 'SM', 'RS', 'SK', 'SI', 'ES', 'SJ', 'SE', 'CH', 'UA', 'GB']), 'europe'
+UNION ALL
+SELECT unnest(ARRAY['AS', 'AU', 'CK', 'FJ', 'PF', 'GU', 'KI', 'MH', 'FM', 'NR', 'NC', 'NZ', 'NU', 'NF', 'MP', 'PW', 'PG', 'PN',
+          'WS', 'SB', 'TK', 'TO', 'TV', 'VU', 'WF']), 'oceania'
+ON CONFLICT (country_id) DO NOTHING;
+
+CREATE TABLE globe_cards (
+    article_id INT NOT NULL,
+    language CHAR(2) NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    description TEXT NOT NULL,
+    location TEXT,
+    theme TEXT NOT NULL,
+    image TEXT,
+    external_link TEXT NOT NULL,
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    country_id CHAR(2) NOT NULL,
+    region TEXT NOT NULL,  -- 'unknown' when the country has no region
+    newspaper_id INT NOT NULL,
+    newspaper_name TEXT,
+    source_country_id TEXT NOT NULL,  -- Country of the newspaper, '' when unknown
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    PRIMARY KEY (language, article_id)
+);
+
+CREATE INDEX idx_globe_cards_date ON globe_cards(language, publication_date DESC);
+CREATE INDEX idx_globe_cards_theme_date ON globe_cards(language, theme, publication_date DESC);
+CREATE INDEX idx_globe_cards_region_date ON globe_cards(language, region, publication_date DESC);
+CREATE INDEX idx_globe_cards_article ON globe_cards(article_id);
+
+CREATE TABLE globe_card_counts (
+    language CHAR(2) NOT NULL,
+    theme TEXT NOT NULL,
+    region TEXT NOT NULL,
+    source_country_id TEXT NOT NULL,
+    card_count INT NOT NULL,
+    PRIMARY KEY (language, theme, region, source_country_id)
+);
+
+-- What a card is made of; refresh_globe_cards copies rows of this view into globe_cards
+CREATE OR REPLACE VIEW globe_card_rows AS
+SELECT translated.original_article_id AS article_id,
+       translated.language_translated AS language,
+       translated.title,
+       translated.subtitle,
+       translated.description,
+       COALESCE(translated.location, article.location) AS location,
+       article.theme,
+       article.image,
+       article.external_link,
+       article.publication_date,
+       article.country_id,
+       COALESCE(regions.region, 'unknown') AS region,
+       article.newspaper_id,
+       newspapers.name AS newspaper_name,
+       COALESCE(newspapers.country_id, '') AS source_country_id,
+       article.latitude,
+       article.longitude
+FROM news_articles_translated translated
+JOIN news_articles article
+  ON article.id = translated.original_article_id AND article.publication_date = translated.publication_date
+LEFT JOIN newspapers ON newspapers.id = article.newspaper_id
+LEFT JOIN country_regions regions ON regions.country_id = article.country_id;
+
+CREATE OR REPLACE FUNCTION refresh_globe_cards(article_ids INT[])
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    written INT;
+BEGIN
+    -- One refresh at a time, so concurrent runs never apply the same count delta twice
+    LOCK TABLE globe_card_counts IN SHARE ROW EXCLUSIVE MODE;
+
+    WITH removed AS (
+        DELETE FROM globe_cards WHERE article_id = ANY(article_ids)
+        RETURNING language, theme, region, source_country_id
+    )
+    INSERT INTO globe_card_counts (language, theme, region, source_country_id, card_count)
+    SELECT language, theme, region, source_country_id, -count(*)
+    FROM removed
+    GROUP BY language, theme, region, source_country_id
+    ON CONFLICT (language, theme, region, source_country_id)
+    DO UPDATE SET card_count = globe_card_counts.card_count + EXCLUDED.card_count;
+
+    WITH added AS (
+        INSERT INTO globe_cards
+        SELECT * FROM globe_card_rows WHERE article_id = ANY(article_ids)
+        RETURNING language, theme, region, source_country_id
+    )
+    INSERT INTO globe_card_counts (language, theme, region, source_country_id, card_count)
+    SELECT language, theme, region, source_country_id, count(*)
+    FROM added
+    GROUP BY language, theme, region, source_country_id
+    ON CONFLICT (language, theme, region, source_country_id)
+    DO UPDATE SET card_count = globe_card_counts.card_count + EXCLUDED.card_count;
+
+    DELETE FROM globe_card_counts WHERE card_count <= 0;
+
+    SELECT count(*) INTO written FROM globe_cards WHERE article_id = ANY(article_ids);
+    RETURN written;
+END;
+$$;
+
+-- Globe clusters of the globe cards per zoom level, rewritten by build-globe-clusters.py
+CREATE TABLE globe_clusters (
+    zoom_level SMALLINT NOT NULL,
+    geohash TEXT NOT NULL,
+    latitude DOUBLE PRECISION NOT NULL,  -- Centroid of the cell's articles
+    longitude DOUBLE PRECISION NOT NULL,
+    article_count INT NOT NULL,
+    top_theme TEXT NOT NULL,
+    theme_counts JSONB NOT NULL,  -- theme -> article count
+    latest_article_id INT NOT NULL,
+    latest_title TEXT,  -- Card title, in the language NewsScroll shows
+    latest_publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    refreshed_at TIMESTAMP WITH TIME ZONE NOT NULL,  -- Cells not rewritten by a run are deleted
+    PRIMARY KEY (zoom_level, geohash)
+);
+
+-- Viewport reads: one zoom level, a latitude band, then the longitude range
+CREATE INDEX idx_globe_clusters_viewport ON globe_clusters(zoom_level, latitude, longitude);
@@ -0,0 +1,6 @@
+-- Conditional GET cache of each newspaper feed, maintained by get-rss-news-raw.py.
+-- The stored ETag / Last-Modified are sent back as If-None-Match / If-Modified-Since,
+-- and the content hash lets us skip feeds whose publisher ignores conditional requests.
+ALTER TABLE newspapers ADD COLUMN IF NOT EXISTS rss_etag TEXT;
+ALTER TABLE newspapers ADD COLUMN IF NOT EXISTS rss_last_modified TEXT;
+ALTER TABLE newspapers ADD COLUMN IF NOT EXISTS rss_content_hash CHAR(64);
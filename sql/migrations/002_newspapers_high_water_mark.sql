@@ -0,0 +1,5 @@
+-- Per-feed high-water mark, maintained by get-rss-news-raw.py.
+-- Parsing stops once a feed is back among items an earlier run already ingested:
+-- items older than rss_high_water_date or whose link hash is in rss_recent_link_hashes.
+ALTER TABLE newspapers ADD COLUMN IF NOT EXISTS rss_high_water_date TIMESTAMP WITH TIME ZONE;
+ALTER TABLE newspapers ADD COLUMN IF NOT EXISTS rss_recent_link_hashes TEXT[];
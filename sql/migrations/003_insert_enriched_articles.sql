@@ -0,0 +1,33 @@
+-- Atomic hand-off used by send-rss-feed-to-ai.py: inserts the enriched articles into
+-- news_articles and marks their source rows in news_articles_raw as processed in
+-- one transaction, so a crash can no longer leave enriched rows whose raw rows get
+-- enriched again on the next run.
+-- Raw rows are locked first; if another run already processed them all, nothing is inserted.
+CREATE OR REPLACE FUNCTION insert_enriched_articles(articles JSONB, raw_ids INT[])
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted INT;
+BEGIN
+    PERFORM 1 FROM news_articles_raw WHERE id = ANY(raw_ids) FOR UPDATE;
+    IF NOT EXISTS (SELECT 1 FROM news_articles_raw WHERE id = ANY(raw_ids) AND NOT ai_processed) THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO news_articles (title, subtitle, description, author, newspaper_id, theme, theme_tags,
+                               image, external_link, publication_date, country_id, location, language,
+                               minimal_age, latitude, longitude)
+    SELECT title, subtitle, description, author, newspaper_id, theme, theme_tags,
+           image, external_link, publication_date, country_id, location, language,
+           minimal_age, latitude, longitude
+    FROM jsonb_populate_recordset(NULL::news_articles, articles);
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+
+    UPDATE news_articles_raw
+    SET ai_processed = TRUE, ai_processed_date = now()
+    WHERE id = ANY(raw_ids);
+
+    RETURN inserted;
+END;
+$$;
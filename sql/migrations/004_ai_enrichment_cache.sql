@@ -0,0 +1,13 @@
+-- Content-addressed cache of OpenAI enrichment results, used by enrichment_cache.py.
+-- cache_key is sha256(normalized title, normalized description, prompt version, model);
+-- result holds the model's rewrite without the fields copied from the source row.
+-- Rows older than the cache TTL are ignored on lookup and deleted by the pipeline.
+CREATE TABLE IF NOT EXISTS ai_enrichment_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    result JSONB NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_enrichment_cache_created_at ON ai_enrichment_cache(created_at);
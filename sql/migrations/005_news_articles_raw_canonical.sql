@@ -0,0 +1,4 @@
+-- Near-duplicate clustering in send-rss-feed-to-ai.py: copies of a syndicated story
+-- are not enriched themselves but point at the raw article that was.
+ALTER TABLE news_articles_raw ADD COLUMN IF NOT EXISTS canonical_raw_id INT REFERENCES news_articles_raw(id) ON DELETE SET NULL;
+CREATE INDEX IF NOT EXISTS idx_news_articles_raw_canonical ON news_articles_raw(canonical_raw_id) WHERE canonical_raw_id IS NOT NULL;
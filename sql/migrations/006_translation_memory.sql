@@ -0,0 +1,10 @@
+-- Translation memory used by translate-ai-news-fr-en.py: every string DeepL translated,
+-- keyed by the sha256 of the source text and the target language, so repeated strings
+-- (location names, recurring titles) are never sent to DeepL again.
+CREATE TABLE IF NOT EXISTS translation_memory (
+    text_hash CHAR(64) NOT NULL,
+    target_lang CHAR(2) NOT NULL,
+    translated_text TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    PRIMARY KEY (text_hash, target_lang)
+);
@@ -0,0 +1,8 @@
+-- Resumable translation backlog in translate-ai-news-fr-en.py.
+-- Untranslated articles are walked by ascending id; each page is leased by setting
+-- translation_claimed_at, so concurrent invocations never translate the same article.
+-- A lease older than TRANSLATION_LEASE_SECONDS is free again.
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS translated BOOLEAN DEFAULT FALSE;
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS translated_date TIMESTAMP WITH TIME ZONE;
+ALTER TABLE news_articles ADD COLUMN IF NOT EXISTS translation_claimed_at TIMESTAMP WITH TIME ZONE;
+CREATE INDEX IF NOT EXISTS idx_news_articles_untranslated ON news_articles(id) WHERE NOT translated;
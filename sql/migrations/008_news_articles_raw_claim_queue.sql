@@ -0,0 +1,32 @@
+-- Work queue over news_articles_raw for concurrent send-rss-feed-to-ai.py workers.
+-- claim_raw_articles leases up to batch_size unprocessed rows, newest first. Rows locked by
+-- another claim are skipped (FOR UPDATE SKIP LOCKED) and rows leased less than
+-- lease_seconds ago are not claimable, so two workers never enrich the same article.
+-- Processing a row sets ai_processed; an abandoned lease simply expires.
+ALTER TABLE news_articles_raw ADD COLUMN IF NOT EXISTS ai_claimed_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE news_articles_raw ADD COLUMN IF NOT EXISTS ai_claimed_by TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_news_articles_raw_unprocessed
+    ON news_articles_raw(publication_date DESC) WHERE NOT ai_processed;
+
+CREATE OR REPLACE FUNCTION claim_raw_articles(batch_size INT, worker TEXT, lease_seconds INT DEFAULT 900,
+                                              exclude_ids INT[] DEFAULT '{}')
+RETURNS SETOF news_articles_raw
+LANGUAGE sql
+AS $$
+    WITH claimable AS (
+        SELECT id
+        FROM news_articles_raw
+        WHERE NOT ai_processed
+          AND (ai_claimed_at IS NULL OR ai_claimed_at < now() - make_interval(secs => lease_seconds))
+          AND NOT (id = ANY(exclude_ids))
+        ORDER BY publication_date DESC
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE news_articles_raw AS raw
+    SET ai_claimed_at = now(), ai_claimed_by = worker
+    FROM claimable
+    WHERE raw.id = claimable.id
+    RETURNING raw.*;
+$$;
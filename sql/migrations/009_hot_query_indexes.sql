@@ -0,0 +1,20 @@
+-- Indexes for the pipeline's and the site's hot queries.
+-- Already covered by earlier migrations:
+--   news_articles_raw WHERE NOT ai_processed ORDER BY publication_date DESC
+--     -> idx_news_articles_raw_unprocessed (008)
+--   news_articles WHERE NOT translated ORDER BY id -> idx_news_articles_untranslated (007)
+--   newsService's French feed (news_articles_translated WHERE language_translated = 'FR'
+--     joined to news_articles ORDER BY news_articles.publication_date DESC)
+--     -> idx_news_articles_date walked backwards, each article probing the
+--        UNIQUE (original_article_id, language_translated) index; no index on the
+--        translated side can give an order by a column of news_articles. Since 011
+--        the feed reads globe_cards through idx_globe_cards_date instead.
+-- benchmarks/explain_hot_queries.py shows the plans before and after these indexes.
+
+-- newsService: news by theme and by country, newest first
+CREATE INDEX IF NOT EXISTS idx_news_articles_theme_date ON news_articles(theme, publication_date DESC);
+CREATE INDEX IF NOT EXISTS idx_news_articles_country_date ON news_articles(country_id, publication_date DESC);
+
+-- Tag lookups: news_articles.theme_tags @> ARRAY['ukraine'] and theme_tags.tag = 'ukraine'
+CREATE INDEX IF NOT EXISTS idx_news_articles_theme_tags ON news_articles USING GIN (theme_tags);
+CREATE INDEX IF NOT EXISTS idx_theme_tags_tag_article ON theme_tags(tag, article_id);
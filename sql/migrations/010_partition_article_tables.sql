@@ -0,0 +1,210 @@
+-- Monthly range partitioning of news_articles_raw, news_articles and news_articles_translated
+-- by publication_date. Recent-news queries only touch the newest partitions, each partition
+-- keeps its own small indexes, and old months are purged by detaching a partition instead
+-- of deleting rows.
+--
+-- Postgres requires the partition key in every primary key, unique constraint and foreign
+-- key target, so:
+--   news_articles_raw        PRIMARY KEY (id, publication_date), UNIQUE (external_link, publication_date)
+--                            -> get-rss-news-raw.py upserts on external_link,publication_date
+--   news_articles            PRIMARY KEY (id, publication_date)
+--   news_articles_translated gains publication_date (copied from its article),
+--                            PRIMARY KEY (id, publication_date),
+--                            UNIQUE (original_article_id, language_translated, publication_date),
+--                            FOREIGN KEY (original_article_id, publication_date) -> news_articles
+--                            -> translate-ai-news-fr-en.py writes publication_date and upserts on it
+-- theme_tags.article_id and news_articles_raw.canonical_raw_id lose their foreign keys:
+-- they reference an id alone, which is no longer unique by itself. fk_country_id is not
+-- recreated either: countries has no CHAR(2) key for it to reference.
+--
+-- Ids keep their sequences, so existing ids and links are unchanged. Rows dated outside
+-- the created months land in each table's DEFAULT partition.
+--
+-- Maintenance: maintain_article_partitions() creates the coming months' partitions and
+-- detaches those older than the retention period (archived as archive_<partition>, or
+-- dropped). It is scheduled daily with pg_cron when the extension is installed; otherwise
+-- call it from a scheduled job (POST /rest/v1/rpc/maintain_article_partitions).
+
+BEGIN;
+
+-- Partition helpers
+
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent TEXT, from_date DATE DEFAULT current_date,
+                                                     months_ahead INT DEFAULT 3)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::date;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+BEGIN
+    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+    WHILE month_start <= last_month LOOP
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                parent || '_' || to_char(month_start, 'YYYY_MM'), parent,
+                month_start, (month_start + interval '1 month')::date
+            );
+        EXCEPTION WHEN check_violation THEN
+            -- The default partition already holds rows of that month; they stay there
+            RAISE NOTICE 'Skipping partition % of %: rows of that month are in the default partition',
+                to_char(month_start, 'YYYY_MM'), parent;
+        END;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION detach_old_partitions(parent TEXT, retention_months INT, drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months))::date;
+    partition_name TEXT;
+    detached INT := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent_table ON parent_table.oid = pg_inherits.inhparent
+        WHERE parent_table.relname = parent
+          AND child.relname ~ ('^' || parent || '_\d{4}_\d{2}$')
+          AND to_date(right(child.relname, 7), 'YYYY_MM') < cutoff
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, partition_name);
+        IF drop_detached THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+        ELSE
+            EXECUTE format('ALTER TABLE %I RENAME TO %I', partition_name, 'archive_' || partition_name);
+        END IF;
+        detached := detached + 1;
+    END LOOP;
+    RETURN detached;
+END;
+$$;
+
+-- Translations first, then articles: an article partition can only be detached once
+-- the translations referencing it are gone.
+CREATE OR REPLACE FUNCTION maintain_article_partitions(retention_months INT DEFAULT 24, months_ahead INT DEFAULT 3,
+                                                       drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    parent TEXT;
+    detached INT := 0;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['news_articles_translated', 'news_articles', 'news_articles_raw'] LOOP
+        PERFORM create_monthly_partitions(parent, current_date, months_ahead);
+        detached := detached + detach_old_partitions(parent, retention_months, drop_detached);
+    END LOOP;
+    RETURN detached;
+END;
+$$;
+
+-- Move the existing tables aside
+
+ALTER TABLE news_articles_translated RENAME TO news_articles_translated_unpartitioned;
+ALTER TABLE news_articles RENAME TO news_articles_unpartitioned;
+ALTER TABLE news_articles_raw RENAME TO news_articles_raw_unpartitioned;
+ALTER TABLE theme_tags DROP CONSTRAINT IF EXISTS theme_tags_article_id_fkey;
+
+-- news_articles_raw
+
+CREATE TABLE news_articles_raw (LIKE news_articles_raw_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (publication_date);
+ALTER TABLE news_articles_raw ADD PRIMARY KEY (id, publication_date);
+ALTER TABLE news_articles_raw ADD UNIQUE (external_link, publication_date);
+ALTER SEQUENCE news_articles_raw_id_seq OWNED BY news_articles_raw.id;
+
+-- Months before the last three years stay in the default partition
+SELECT create_monthly_partitions('news_articles_raw',
+    GREATEST(COALESCE((SELECT min(publication_date) FROM news_articles_raw_unpartitioned), now()),
+             now() - interval '36 months')::date);
+INSERT INTO news_articles_raw SELECT * FROM news_articles_raw_unpartitioned;
+
+-- news_articles
+
+CREATE TABLE news_articles (LIKE news_articles_unpartitioned INCLUDING DEFAULTS)
+    PARTITION BY RANGE (publication_date);
+ALTER TABLE news_articles ADD PRIMARY KEY (id, publication_date);
+ALTER SEQUENCE news_articles_id_seq OWNED BY news_articles.id;
+
+SELECT create_monthly_partitions('news_articles',
+    GREATEST(COALESCE((SELECT min(publication_date) FROM news_articles_unpartitioned), now()),
+             now() - interval '36 months')::date);
+INSERT INTO news_articles SELECT * FROM news_articles_unpartitioned;
+
+-- news_articles_translated
+
+CREATE TABLE news_articles_translated (
+    LIKE news_articles_translated_unpartitioned INCLUDING DEFAULTS,
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL
+) PARTITION BY RANGE (publication_date);
+ALTER TABLE news_articles_translated ADD PRIMARY KEY (id, publication_date);
+ALTER TABLE news_articles_translated ADD UNIQUE (original_article_id, language_translated, publication_date);
+ALTER SEQUENCE news_articles_translated_id_seq OWNED BY news_articles_translated.id;
+
+SELECT create_monthly_partitions('news_articles_translated',
+    GREATEST(COALESCE((SELECT min(publication_date) FROM news_articles_unpartitioned), now()),
+             now() - interval '36 months')::date);
+INSERT INTO news_articles_translated
+SELECT translated.*, article.publication_date
+FROM news_articles_translated_unpartitioned translated
+JOIN news_articles_unpartitioned article ON article.id = translated.original_article_id;
+
+-- Drop the old tables (and their sequences' former owner links), then restore constraints,
+-- indexes and the functions whose signature used the old row type
+
+DROP TABLE news_articles_translated_unpartitioned;
+DROP TABLE news_articles_unpartitioned CASCADE;
+DROP TABLE news_articles_raw_unpartitioned CASCADE;
+
+ALTER TABLE news_articles_translated ADD FOREIGN KEY (original_article_id, publication_date)
+    REFERENCES news_articles(id, publication_date) ON DELETE CASCADE;
+ALTER TABLE news_articles ADD CONSTRAINT fk_newspaper_id FOREIGN KEY (newspaper_id) REFERENCES newspapers(id);
+
+CREATE INDEX idx_news_articles_date ON news_articles(publication_date);
+CREATE INDEX idx_news_articles_untranslated ON news_articles(id) WHERE NOT translated;
+CREATE INDEX idx_news_articles_theme_date ON news_articles(theme, publication_date DESC);
+CREATE INDEX idx_news_articles_country_date ON news_articles(country_id, publication_date DESC);
+CREATE INDEX idx_news_articles_theme_tags ON news_articles USING GIN (theme_tags);
+CREATE INDEX idx_news_articles_raw_canonical ON news_articles_raw(canonical_raw_id) WHERE canonical_raw_id IS NOT NULL;
+CREATE INDEX idx_news_articles_raw_unprocessed ON news_articles_raw(publication_date DESC) WHERE NOT ai_processed;
+CREATE INDEX idx_news_articles_raw_external_link ON news_articles_raw(external_link);
+
+CREATE OR REPLACE FUNCTION claim_raw_articles(batch_size INT, worker TEXT, lease_seconds INT DEFAULT 900,
+                                              exclude_ids INT[] DEFAULT '{}')
+RETURNS SETOF news_articles_raw
+LANGUAGE sql
+AS $$
+    WITH claimable AS (
+        SELECT id
+        FROM news_articles_raw
+        WHERE NOT ai_processed
+          AND (ai_claimed_at IS NULL OR ai_claimed_at < now() - make_interval(secs => lease_seconds))
+          AND NOT (id = ANY(exclude_ids))
+        ORDER BY publication_date DESC
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE news_articles_raw AS raw
+    SET ai_claimed_at = now(), ai_claimed_by = worker
+    FROM claimable
+    WHERE raw.id = claimable.id
+    RETURNING raw.*;
+$$;
+
+COMMIT;
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('maintain-article-partitions', '0 3 * * *', 'SELECT maintain_article_partitions()');
+    END IF;
+END;
+$$;
@@ -0,0 +1,141 @@
+-- Denormalized read model of the globe feed. newsService used to join news_articles_translated
+-- to news_articles and newspapers for every page, filtering regions with IN lists of ~50
+-- country codes, and ran a separate count(*) of the same join. globe_cards holds one row per
+-- article and language with only the columns GlobeDynamic and NewsScroll render, plus the
+-- article's region; globe_card_counts keeps the card count per filter combination, so the
+-- page and its total are single indexed reads.
+--
+-- The cards are refreshed incrementally by refresh_globe_cards(article_ids), which
+-- translate-ai-news-fr-en.py calls after writing an article's translations (an article gets
+-- its cards once translated). Call it with any ids whose article, translations or newspaper
+-- changed; it rebuilds their cards and applies the count deltas.
+
+CREATE TABLE IF NOT EXISTS country_regions (
+    country_id CHAR(2) PRIMARY KEY,
+    region TEXT NOT NULL
+);
+
+-- Same regions as the filters of the site
+INSERT INTO country_regions (country_id, region)
+SELECT unnest(ARRAY['DZ', 'AO', 'BJ', 'BW', 'BF', 'BI', 'CM', 'CV', 'CF', 'TD', 'KM', 'CG', 'CD', 'DJ', 'EG', 'GQ', 'ER', 'ET',
+          'GA', 'GM', 'GH', 'GN', 'GW', 'CI', 'KE', 'LS', 'LR', 'LY', 'MG', 'MW', 'ML', 'MR', 'MU', 'MA', 'MZ', 'NA',
+          'NE', 'NG', 'RW', 'ST', 'SN', 'SC', 'SL', 'SO', 'ZA', 'SS', 'SD', 'SZ', 'TZ', 'TG', 'TN', 'UG', 'ZM', 'ZW']), 'africa'
+UNION ALL
+SELECT unnest(ARRAY['AI', 'AG', 'AR', 'AW', 'BS', 'BB', 'BZ', 'BM', 'BO', 'BR', 'CA', 'KY', 'CL', 'CO', 'CR', 'CU', 'DM', 'DO',
+          'EC', 'SV', 'FK', 'GF', 'GL', 'GD', 'GP', 'GT', 'GY', 'HT', 'HN', 'JM', 'MQ', 'MX', 'MS', 'NI', 'PA', 'PY',
+          'PE', 'PR', 'BL', 'KN', 'LC', 'MF', 'PM', 'VC', 'SR', 'TT', 'TC', 'US', 'UY', 'VE', 'VG', 'VI']), 'americas'
+UNION ALL
+SELECT unnest(ARRAY['AF', 'AM', 'AZ', 'BH', 'BD', 'BT', 'BN', 'KH', 'CN', 'CY', 'GE', 'HK', 'IN', 'ID', 'IR', 'IQ', 'IL', 'JP',
+          'JO', 'KZ', 'KP', 'KR', 'KW', 'KG', 'LA', 'LB', 'MO', 'MY', 'MV', 'MN', 'MM', 'NP', 'OM', 'PK', 'PS', 'PH',
+          'QA', 'SA', 'SG', 'LK', 'SY', 'TW', 'TJ', 'TH', 'TL', 'TR', 'TM', 'AE', 'UZ', 'VN', 'YE']), 'asia'
+UNION ALL
+SELECT unnest(ARRAY['AL', 'AD', 'AT', 'BY', 'BE', 'BA', 'BG', 'HR', 'CZ', 'DK', 'EE', 'FO', 'FI', 'FR', 'DE', 'GI', 'GR', 'GG',
+          'VA', 'HU', 'IS', 'IE', 'IM', 'IT', 'JE', 'LV', 'LI', 'LT', 'LU', 'MT', 'MD', 'MC', 'ME', 'NL', 'MK', 'NO',
+          'PL', 'PT', 'RO', 'RU', 'SM', 'RS', 'SK', 'SI', 'ES', 'SJ', 'SE', 'CH', 'UA', 'GB']), 'europe'
+UNION ALL
+SELECT unnest(ARRAY['AS', 'AU', 'CK', 'FJ', 'PF', 'GU', 'KI', 'MH', 'FM', 'NR', 'NC', 'NZ', 'NU', 'NF', 'MP', 'PW', 'PG', 'PN',
+          'WS', 'SB', 'TK', 'TO', 'TV', 'VU', 'WF']), 'oceania'
+ON CONFLICT (country_id) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS globe_cards (
+    article_id INT NOT NULL,
+    language CHAR(2) NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    description TEXT NOT NULL,
+    location TEXT,
+    theme TEXT NOT NULL,
+    image TEXT,
+    external_link TEXT NOT NULL,
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    country_id CHAR(2) NOT NULL,
+    region TEXT NOT NULL,  -- 'unknown' when the country has no region
+    newspaper_id INT NOT NULL,
+    newspaper_name TEXT,
+    source_country_id TEXT NOT NULL,  -- Country of the newspaper, '' when unknown
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    PRIMARY KEY (language, article_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_globe_cards_date ON globe_cards(language, publication_date DESC);
+CREATE INDEX IF NOT EXISTS idx_globe_cards_theme_date ON globe_cards(language, theme, publication_date DESC);
+CREATE INDEX IF NOT EXISTS idx_globe_cards_region_date ON globe_cards(language, region, publication_date DESC);
+CREATE INDEX IF NOT EXISTS idx_globe_cards_article ON globe_cards(article_id);
+
+CREATE TABLE IF NOT EXISTS globe_card_counts (
+    language CHAR(2) NOT NULL,
+    theme TEXT NOT NULL,
+    region TEXT NOT NULL,
+    source_country_id TEXT NOT NULL,
+    card_count INT NOT NULL,
+    PRIMARY KEY (language, theme, region, source_country_id)
+);
+
+-- What a card is made of; refresh_globe_cards copies rows of this view into globe_cards
+CREATE OR REPLACE VIEW globe_card_rows AS
+SELECT translated.original_article_id AS article_id,
+       translated.language_translated AS language,
+       translated.title,
+       translated.subtitle,
+       translated.description,
+       COALESCE(translated.location, article.location) AS location,
+       article.theme,
+       article.image,
+       article.external_link,
+       article.publication_date,
+       article.country_id,
+       COALESCE(regions.region, 'unknown') AS region,
+       article.newspaper_id,
+       newspapers.name AS newspaper_name,
+       COALESCE(newspapers.country_id, '') AS source_country_id,
+       article.latitude,
+       article.longitude
+FROM news_articles_translated translated
+JOIN news_articles article
+  ON article.id = translated.original_article_id AND article.publication_date = translated.publication_date
+LEFT JOIN newspapers ON newspapers.id = article.newspaper_id
+LEFT JOIN country_regions regions ON regions.country_id = article.country_id;
+
+CREATE OR REPLACE FUNCTION refresh_globe_cards(article_ids INT[])
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    written INT;
+BEGIN
+    -- One refresh at a time, so concurrent runs never apply the same count delta twice
+    LOCK TABLE globe_card_counts IN SHARE ROW EXCLUSIVE MODE;
+
+    WITH removed AS (
+        DELETE FROM globe_cards WHERE article_id = ANY(article_ids)
+        RETURNING language, theme, region, source_country_id
+    )
+    INSERT INTO globe_card_counts (language, theme, region, source_country_id, card_count)
+    SELECT language, theme, region, source_country_id, -count(*)
+    FROM removed
+    GROUP BY language, theme, region, source_country_id
+    ON CONFLICT (language, theme, region, source_country_id)
+    DO UPDATE SET card_count = globe_card_counts.card_count + EXCLUDED.card_count;
+
+    WITH added AS (
+        INSERT INTO globe_cards
+        SELECT * FROM globe_card_rows WHERE article_id = ANY(article_ids)
+        RETURNING language, theme, region, source_country_id
+    )
+    INSERT INTO globe_card_counts (language, theme, region, source_country_id, card_count)
+    SELECT language, theme, region, source_country_id, count(*)
+    FROM added
+    GROUP BY language, theme, region, source_country_id
+    ON CONFLICT (language, theme, region, source_country_id)
+    DO UPDATE SET card_count = globe_card_counts.card_count + EXCLUDED.card_count;
+
+    DELETE FROM globe_card_counts WHERE card_count <= 0;
+
+    SELECT count(*) INTO written FROM globe_cards WHERE article_id = ANY(article_ids);
+    RETURN written;
+END;
+$$;
+
+-- Backfill the cards of every article translated so far
+SELECT refresh_globe_cards(ARRAY(SELECT DISTINCT original_article_id FROM news_articles_translated));
@@ -0,0 +1,22 @@
+-- Precomputed globe clusters written by build-globe-clusters.py, scheduled after
+-- translate-ai-news-fr-en.py: the located globe cards (translated articles, sql/migrations/011)
+-- of the last days aggregated per geohash cell, one set of cells per zoom level (the geohash
+-- precision, 2 to 5). Without an active filter, GlobeDynamic fetches the cells of its zoom
+-- level inside the viewport instead of plotting every article it loaded.
+CREATE TABLE IF NOT EXISTS globe_clusters (
+    zoom_level SMALLINT NOT NULL,
+    geohash TEXT NOT NULL,
+    latitude DOUBLE PRECISION NOT NULL,  -- Centroid of the cell's articles
+    longitude DOUBLE PRECISION NOT NULL,
+    article_count INT NOT NULL,
+    top_theme TEXT NOT NULL,
+    theme_counts JSONB NOT NULL,  -- theme -> article count
+    latest_article_id INT NOT NULL,
+    latest_title TEXT,  -- Card title, in the language NewsScroll shows
+    latest_publication_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    refreshed_at TIMESTAMP WITH TIME ZONE NOT NULL,  -- Cells not rewritten by a run are deleted
+    PRIMARY KEY (zoom_level, geohash)
+);
+
+-- Viewport reads: one zoom level, a latitude band, then the longitude range
+CREATE INDEX IF NOT EXISTS idx_globe_clusters_viewport ON globe_clusters(zoom_level, latitude, longitude);
@@ -0,0 +1,117 @@
+-- Link-level deduplication of news_articles_raw, and cleanup of the rows that point at
+-- detached article partitions.
+--
+-- Partitioning (sql/migrations/010) turned the raw table's UNIQUE (external_link) into
+-- UNIQUE (external_link, publication_date): a publisher that changes an item's pubDate made a
+-- second raw row, enriched and translated a second time. raw_links is not partitioned and
+-- keeps one row per link; a BEFORE INSERT trigger on news_articles_raw records the link and
+-- skips the row when the link is already there. A skipped row behaves like an ON CONFLICT
+-- DO NOTHING: it is not inserted and not returned, so get-rss-news-raw.py counts it as
+-- already stored.
+--
+-- maintain_article_partitions() detaches whole months, while globe_cards, globe_card_counts,
+-- theme_tags and ai_enrichment_cache are not partitioned. It now also removes the cards and
+-- tags of the articles it detached, enrichment cache entries older than the retention period
+-- and links whose first publication is that old.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS raw_links (
+    external_link TEXT PRIMARY KEY,
+    raw_id INT NOT NULL,  -- First raw row with this link
+    publication_date TIMESTAMP WITH TIME ZONE NOT NULL,  -- Its publication date
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_raw_links_publication_date ON raw_links(publication_date);
+
+-- Links stored so far, each with its oldest raw row
+INSERT INTO raw_links (external_link, raw_id, publication_date)
+SELECT DISTINCT ON (external_link) external_link, id, publication_date
+FROM news_articles_raw
+ORDER BY external_link, id
+ON CONFLICT (external_link) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION record_raw_link()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- A concurrent insert of the same link waits on the primary key, then sees the conflict
+    INSERT INTO raw_links (external_link, raw_id, publication_date)
+    VALUES (NEW.external_link, NEW.id, NEW.publication_date)
+    ON CONFLICT (external_link) DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- Link already ingested, possibly under another publication date
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS news_articles_raw_link ON news_articles_raw;
+CREATE TRIGGER news_articles_raw_link
+BEFORE INSERT ON news_articles_raw
+FOR EACH ROW EXECUTE FUNCTION record_raw_link();
+
+-- Rows of the non-partitioned tables that belong to months older than the retention period
+CREATE OR REPLACE FUNCTION purge_detached_article_rows(retention_months INT)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months))::date;
+    orphan_ids INT[];
+    purged INT := 0;
+    removed INT;
+BEGIN
+    -- Cards whose article is gone; refresh_globe_cards drops them and applies the count deltas
+    SELECT array_agg(DISTINCT cards.article_id) INTO orphan_ids
+    FROM globe_cards AS cards
+    WHERE cards.publication_date < cutoff
+      AND NOT EXISTS (SELECT 1 FROM news_articles AS articles
+                      WHERE articles.id = cards.article_id AND articles.publication_date = cards.publication_date);
+    IF orphan_ids IS NOT NULL THEN
+        PERFORM refresh_globe_cards(orphan_ids);
+        purged := purged + cardinality(orphan_ids);
+    END IF;
+
+    DELETE FROM theme_tags AS tags
+    WHERE NOT EXISTS (SELECT 1 FROM news_articles AS articles WHERE articles.id = tags.article_id);
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    purged := purged + removed;
+
+    -- Content-addressed, so no row points at an article: anything this old has no retained source
+    DELETE FROM ai_enrichment_cache WHERE created_at < cutoff;
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    purged := purged + removed;
+
+    -- A link first published before the cutoff is out of every feed by now
+    DELETE FROM raw_links WHERE publication_date < cutoff;
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    purged := purged + removed;
+
+    RETURN purged;
+END;
+$$;
+
+-- Translations first, then articles: an article partition can only be detached once
+-- the translations referencing it are gone. Then the rows pointing at what was detached.
+CREATE OR REPLACE FUNCTION maintain_article_partitions(retention_months INT DEFAULT 24, months_ahead INT DEFAULT 3,
+                                                       drop_detached BOOLEAN DEFAULT FALSE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    parent TEXT;
+    detached INT := 0;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['news_articles_translated', 'news_articles', 'news_articles_raw'] LOOP
+        PERFORM create_monthly_partitions(parent, current_date, months_ahead);
+        detached := detached + detach_old_partitions(parent, retention_months, drop_detached);
+    END LOOP;
+    PERFORM purge_detached_article_rows(retention_months);
+    RETURN detached;
+END;
+$$;
+
+COMMIT;
@@ -0,0 +1,40 @@
+-- insert_enriched_articles (sql/migrations/003) only skipped the insert when every raw row
+-- was already processed: when a concurrent run had processed some of the raw ids,
+-- news_articles got a second row for each of them. It now locks the raw rows still
+-- unprocessed and inserts only the articles whose raw_id is one of them; send-rss-feed-to-ai.py
+-- sends each article's raw_id in the articles JSON. Articles without a raw_id (a caller
+-- older than this migration) keep the previous all-or-nothing behavior.
+CREATE OR REPLACE FUNCTION insert_enriched_articles(articles JSONB, raw_ids INT[])
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    pending INT[];
+    inserted INT;
+BEGIN
+    -- Under the row locks, a row another run marked processed in the meantime drops out
+    SELECT coalesce(array_agg(id), '{}') INTO pending
+    FROM (SELECT id FROM news_articles_raw WHERE id = ANY(raw_ids) AND NOT ai_processed FOR UPDATE) AS unprocessed;
+    IF cardinality(pending) = 0 THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO news_articles (title, subtitle, description, author, newspaper_id, theme, theme_tags,
+                               image, external_link, publication_date, country_id, location, language,
+                               minimal_age, latitude, longitude)
+    SELECT article.title, article.subtitle, article.description, article.author, article.newspaper_id,
+           article.theme, article.theme_tags, article.image, article.external_link, article.publication_date,
+           article.country_id, article.location, article.language, article.minimal_age,
+           article.latitude, article.longitude
+    FROM jsonb_array_elements(articles) AS element
+    CROSS JOIN LATERAL jsonb_populate_record(NULL::news_articles, element) AS article
+    WHERE element->>'raw_id' IS NULL OR (element->>'raw_id')::INT = ANY(pending);
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+
+    UPDATE news_articles_raw
+    SET ai_processed = TRUE, ai_processed_date = now()
+    WHERE id = ANY(pending);
+
+    RETURN inserted;
+END;
+$$;
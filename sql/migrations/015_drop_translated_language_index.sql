@@ -0,0 +1,6 @@
+-- idx_news_articles_translated_language (009, recreated by 010) was meant for newsService's
+-- French feed, but (language_translated, original_article_id) cannot give the feed's order by
+-- news_articles.publication_date, and the per-article probe of the join is already served by
+-- UNIQUE (original_article_id, language_translated, publication_date). The feed reads
+-- globe_cards since 011, so the index only cost writes.
+DROP INDEX IF EXISTS idx_news_articles_translated_language;
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 import { fetchCountriesData, fetchPlacesData } from './services/globeDataService';
-import { fetchNewsFromSupabase, fetchCountriesFromSupabase } from './services/newsService';
+import { fetchNewsFromSupabase, fetchCountriesFromSupabase, hasActiveFilters } from './services/newsService';
 import BottomMenu from './components/BottomMenu'
 import GlobeDynamic from './components/GlobeDynamic';
 import NewsScroll from './components/NewsScroll';
@@ -11,8 +11,8 @@ import TopMenu from './components/TopMenu'; // Import our new TopMenu component
 function App() {
   // State to manage submenu opening
   const [isSubmenuOpen, setIsSubmenuOpen] = useState(false);
-  // State to track the active title for scrolling
-  const [activeNewsTitle, setActiveNewsTitle] = useState(null);
+  // State to track the article clicked on the globe, for scrolling
+  const [activeArticleId, setActiveArticleId] = useState(null);
   
   // New state to track selected coordinates for the globe
   const [selectedCoordinates, setSelectedCoordinates] = useState(null);
@@ -174,8 +174,8 @@ function App() {
   }, [newsEvents, filteredNewsEvents, countries, newsFilters]);
 
   // Handler for when a globe label is clicked
-  const handleGlobeLabelClick = (title) => {
-    setActiveNewsTitle(title);
+  const handleGlobeLabelClick = (articleId) => {
+    setActiveArticleId(articleId);
   };
   
   // Function to handle navigation from NewsCard or NewsScroll
@@ -278,7 +278,7 @@ function App() {
         <NewsScroll 
             newsEvents={filteredNewsEvents}
             onNavigateToArticle={handleNavigateToArticle}
-            activeTitle={activeNewsTitle}
+            activeArticleId={activeArticleId}
             hasMoreData={hasMoreData}
             isLoadingMore={isLoadingMore}
             onLoadMore={loadMoreNews}
@@ -295,6 +295,7 @@ function App() {
           onLabelClick={handleGlobeLabelClick}
           onCountryClick={handleCountryClick}
           onHoverArticle={handleArticleHover}
+          showClusters={!hasActiveFilters(newsFilters)}
         />
       )}
       
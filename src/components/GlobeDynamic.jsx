@@ -3,13 +3,40 @@ import Globe from 'react-globe.gl';
 import * as THREE from 'three';
 import './GlobeDynamic.css';
 import '../components/css/news-themes.css'; // Import the theme colors CSS
+import { fetchGlobeClusters } from '../services/newsService';
 
-const GlobeDynamic = ({ newsEvents, navigateToCoordinates, onLabelClick, onCountryClick, onHoverArticle }) => {
+// Geohash precision of the precomputed clusters shown at a camera altitude (in globe radii)
+const clusterZoomLevel = (altitude) => {
+  if (altitude > 4) return 2;
+  if (altitude > 1.5) return 3;
+  if (altitude > 0.5) return 4;
+  return 5;
+};
+
+// Approximate latitude/longitude box of the hemisphere cap visible from the camera
+const viewportBounds = ({ lat, lng, altitude }) => {
+  const radius = Math.acos(1 / (1 + altitude)) * 180 / Math.PI;
+  const south = Math.max(lat - radius, -90);
+  const north = Math.min(lat + radius, 90);
+  if (south === -90 || north === 90) {
+    return { south, north, west: -180, east: 180 };  // A pole is in view: every longitude is
+  }
+  const lngRadius = radius / Math.cos(Math.max(Math.abs(south), Math.abs(north)) * Math.PI / 180);
+  if (lngRadius >= 180) {
+    return { south, north, west: -180, east: 180 };
+  }
+  const wrap = (value) => ((value + 540) % 360) - 180;
+  return { south, north, west: wrap(lng - lngRadius), east: wrap(lng + lngRadius) };
+};
+
+const GlobeDynamic = ({ newsEvents, navigateToCoordinates, onLabelClick, onCountryClick, onHoverArticle, showClusters = true }) => {
   const globeEl = useRef();
   const [globeReady, setGlobeReady] = useState(false);
   const [cameraDistance, setCameraDistance] = useState(0);
   const [countries, setCountries] = useState({ features: []});
   const [countryPolygons, setCountryPolygons] = useState([]);
+  const [viewport, setViewport] = useState(null);
+  const [clusters, setClusters] = useState(null); // null without clusters: plot newsEvents instead
   
   // Define discrete zoom levels instead of continuous calculations
   const [zoomCategory, setZoomCategory] = useState('medium'); // 'far', 'medium', 'close'
@@ -309,9 +336,36 @@ const GlobeDynamic = ({ newsEvents, navigateToCoordinates, onLabelClick, onCount
           lastUpdate = now;
         }
       });
+
+      // Reload the clusters once the user stops moving the camera
+      setViewport(globeEl.current.pointOfView());
+      globeEl.current.controls().addEventListener('end', () => {
+        setViewport(globeEl.current.pointOfView());
+      });
     }
   }, [globeReady]);
 
+  // Fetch the precomputed clusters of the visible area at the current zoom level
+  useEffect(() => {
+    if (!viewport || !showClusters) {
+      setClusters(null); // Filtered news: plot the loaded (filtered) articles
+      return;
+    }
+    let cancelled = false;
+    fetchGlobeClusters(clusterZoomLevel(viewport.altitude), viewportBounds(viewport))
+      .then(data => {
+        // No clusters yet (job never ran, or an empty area): keep plotting the loaded articles
+        if (!cancelled) setClusters(data.length > 0 ? data : null);
+      })
+      .catch(error => {
+        console.warn("Globe clusters unavailable, plotting the loaded articles:", error);
+        if (!cancelled) setClusters(null);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [viewport, showClusters]);
+
   // Format ocean data for the globe - memoized to avoid recreating on every render
   const formattedOceans = useMemo(() => oceans.map(ocean => ({
     lat: ocean.properties.latitude,
@@ -380,18 +434,43 @@ const GlobeDynamic = ({ newsEvents, navigateToCoordinates, onLabelClick, onCount
         size: getDynamicLabelSize(0.8),
         color: getThemeColor(event.theme),
         title: event.title,
+        articleId: event.id,
         location: event.location,
         isNews: true,
         theme: event.theme
       }));
   }, [newsEvents, zoomCategory, getThemeColor]);
 
+  // One point per cluster, sized by its article count and colored by its main theme
+  const formattedClusters = useMemo(() => {
+    if (!clusters) return null;
+    return clusters.map(cluster => ({
+      lat: cluster.latitude,
+      lng: cluster.longitude,
+      radius: 0.4 + Math.log2(cluster.article_count + 1) * 0.3,
+      color: getThemeColor(cluster.top_theme),
+      title: cluster.latest_title,
+      articleId: cluster.latest_article_id,
+      count: cluster.article_count,
+      isNews: true,
+      isCluster: true,
+      theme: cluster.top_theme
+    }));
+  }, [clusters, getThemeColor]);
+
   // This function handles click on news points
   const handlePointClick = (point) => {
     console.log("Point clicked:", point);
-    // Call the parent component's callback with the title
-    if (onLabelClick && point.title) {
-      onLabelClick(point.title);
+    // Zoom into a cluster of several articles to split it
+    if (point.isCluster && point.count > 1 && globeEl.current) {
+      const { altitude } = globeEl.current.pointOfView();
+      globeEl.current.pointOfView({ lat: point.lat, lng: point.lng, altitude: altitude / 2 }, 1000);
+      setTimeout(() => setViewport(globeEl.current.pointOfView()), 1000); // Programmatic moves fire no 'end'
+      return;
+    }
+    // Call the parent component's callback with the article id
+    if (onLabelClick && point.articleId) {
+      onLabelClick(point.articleId);
     }
   };
 
@@ -472,10 +551,10 @@ const GlobeDynamic = ({ newsEvents, navigateToCoordinates, onLabelClick, onCount
         )}
         
         // Points for news events - these will update when newsEvents changes
-        pointsData={formattedNewsEvents}
+        pointsData={formattedClusters || formattedNewsEvents}
         pointColor={point => point.color}
         pointAltitude={0.03}
-        pointRadius={0.7}
+        pointRadius={point => point.radius || 0.7}
         pointResolution={20}
         onPointClick={handlePointClick}
         pointsMerge={false}
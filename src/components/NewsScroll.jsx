@@ -3,7 +3,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { Calendar, MapPin, Globe, ChevronLeft, Newspaper, User, Tag, Filter, AlertCircle, ExternalLink, Underline } from 'lucide-react';
 import './NewsScroll.css';
 
-const NewsScroll = ({ newsEvents, onNavigateToArticle, activeTitle, hasMoreData, isLoadingMore, onLoadMore, language, onHoverArticle }) => {
+const NewsScroll = ({ newsEvents, onNavigateToArticle, activeArticleId, hasMoreData, isLoadingMore, onLoadMore, language, onHoverArticle }) => {
   const [isOpen, setIsOpen] = useState(true);
   const observerRef = useRef(null);
   const loaderRef = useRef(null);
@@ -146,11 +146,11 @@ const NewsScroll = ({ newsEvents, onNavigateToArticle, activeTitle, hasMoreData,
     return `border-${theme.toLowerCase()}`;
   };
 
-  // Highlight the active title if provided
+  // Highlight the active article if provided
   useEffect(() => {
-    if (activeTitle) {
-      // Find the element with the active title and scroll to it
-      const activeElement = document.querySelector(`[data-title="${activeTitle}"]`);
+    if (activeArticleId) {
+      // Find the element of the active article and scroll to it
+      const activeElement = document.querySelector(`[data-article-id="${activeArticleId}"]`);
       if (activeElement) {
         activeElement.scrollIntoView({ behavior: 'smooth', block: 'center' });
         // Add a highlight class
@@ -161,7 +161,7 @@ const NewsScroll = ({ newsEvents, onNavigateToArticle, activeTitle, hasMoreData,
         }, 2000);
       }
     }
-  }, [activeTitle]);
+  }, [activeArticleId]);
 
   // Handle opening article in new tab
   const handleOpenArticle = (url, e) => {
@@ -198,7 +198,7 @@ const NewsScroll = ({ newsEvents, onNavigateToArticle, activeTitle, hasMoreData,
             <div 
               key={index} 
               className={`news-feed-item ${getFeedItemClass(event.theme)}`}
-              data-title={event.title}
+              data-article-id={event.id}
               onClick={() => handleNavigateToArticle(event.latitude, event.longitude)}
               onMouseEnter={() => onHoverArticle && onHoverArticle(event.id)}
               onMouseLeave={() => onHoverArticle && onHoverArticle(null)}
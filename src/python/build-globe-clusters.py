@@ -0,0 +1,251 @@
+import argparse
+import json
+import math
+import os
+import logging
+import time
+import urllib.request
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Any
+
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("build-globe-clusters")
+
+# Globe points are aggregated into geohash cells, one set of cells per zoom level. The zoom
+# level is the geohash precision: 2 (~1250 km cells) when the globe is seen from afar,
+# up to 5 (~5 km) close to the ground. Parent cells are built from their children, since
+# a geohash's prefix is the cell containing it.
+MIN_PRECISION = 2
+MAX_PRECISION = 5
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+DEFAULT_WINDOW_DAYS = 30  # Articles older than this are left off the globe
+PAGE_SIZE = 1000  # Articles per keyset page
+UPSERT_CHUNK_SIZE = 500  # Cluster rows per POST
+CLUSTERS_TABLE = "globe_clusters"
+
+# Clusters are built from the globe cards the front end lists (sql/migrations/011): translated
+# articles only, titled in the language NewsScroll shows, so a click on a point finds its card
+CARDS_TABLE = "globe_cards"
+DEFAULT_LANGUAGE = "FR"
+
+
+def geohash(latitude: float, longitude: float, precision: int) -> str:
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    cells = []
+    bits = 0
+    value = 0
+    even = True  # Bits alternate between longitude and latitude, longitude first
+    while len(cells) < precision:
+        coordinate, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            cells.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(cells)
+
+
+class Cell:
+    """Running aggregate of the articles of one geohash cell"""
+    __slots__ = ("count", "x", "y", "z", "themes", "latest")
+
+    def __init__(self):
+        self.count = 0
+        self.x = self.y = self.z = 0.0  # Sum of unit vectors, so centroids work across the antimeridian
+        self.themes = Counter()
+        self.latest = None  # (publication_date, article id, title) of the newest article
+
+    def add_article(self, article: Dict[str, Any]) -> None:
+        latitude = math.radians(article["latitude"])
+        longitude = math.radians(article["longitude"])
+        self.count += 1
+        self.x += math.cos(latitude) * math.cos(longitude)
+        self.y += math.cos(latitude) * math.sin(longitude)
+        self.z += math.sin(latitude)
+        self.themes[article.get("theme") or "other"] += 1
+        latest = (article["publication_date"], article["article_id"], article.get("title"))
+        if self.latest is None or latest > self.latest:
+            self.latest = latest
+
+    def merge(self, other: "Cell") -> None:
+        self.count += other.count
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        self.themes.update(other.themes)
+        if self.latest is None or other.latest > self.latest:
+            self.latest = other.latest
+
+    def centroid(self) -> tuple:
+        latitude = math.degrees(math.atan2(self.z, math.hypot(self.x, self.y)))
+        longitude = math.degrees(math.atan2(self.y, self.x))
+        return round(latitude, 5), round(longitude, 5)
+
+
+def build_clusters(articles: Iterator[Dict[str, Any]], min_precision: int = MIN_PRECISION,
+                   max_precision: int = MAX_PRECISION) -> Dict[int, Dict[str, Cell]]:
+    """Aggregate articles into cells at every precision from max_precision down to min_precision"""
+    levels = {max_precision: {}}
+    finest = levels[max_precision]
+    for article in articles:
+        cell_id = geohash(article["latitude"], article["longitude"], max_precision)
+        if cell_id not in finest:
+            finest[cell_id] = Cell()
+        finest[cell_id].add_article(article)
+
+    for precision in range(max_precision - 1, min_precision - 1, -1):
+        parents = {}
+        for cell_id, cell in levels[precision + 1].items():
+            parent_id = cell_id[:precision]
+            if parent_id not in parents:
+                parents[parent_id] = Cell()
+            parents[parent_id].merge(cell)
+        levels[precision] = parents
+    return levels
+
+
+def cluster_rows(levels: Dict[int, Dict[str, Cell]], refreshed_at: str) -> List[Dict[str, Any]]:
+    rows = []
+    for precision, cells in levels.items():
+        for cell_id, cell in cells.items():
+            latitude, longitude = cell.centroid()
+            latest_date, latest_id, latest_title = cell.latest
+            rows.append({
+                "zoom_level": precision,
+                "geohash": cell_id,
+                "latitude": latitude,
+                "longitude": longitude,
+                "article_count": cell.count,
+                "top_theme": cell.themes.most_common(1)[0][0],
+                "theme_counts": dict(cell.themes),
+                "latest_article_id": latest_id,
+                "latest_title": latest_title,
+                "latest_publication_date": latest_date,
+                "refreshed_at": refreshed_at
+            })
+    return rows
+
+
+class GlobeClusterBuilder:
+    def __init__(self, supabase_url: str, supabase_key: str, language: str = DEFAULT_LANGUAGE,
+                 window_days: int = DEFAULT_WINDOW_DAYS):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.language = language  # Language of the cards, and so of the cluster titles
+        self.window_days = window_days
+        self.headers = {
+            "apikey": supabase_key,
+            "Authorization": f"Bearer {supabase_key}",
+            "Content-Type": "application/json"
+        }
+
+    def fetch_articles(self) -> Iterator[Dict[str, Any]]:
+        """Located cards of the window, paged by article id so the whole window is never in one response"""
+        since = (datetime.now(timezone.utc) - timedelta(days=self.window_days)).isoformat()
+        last_id = 0
+        while True:
+            query_params = {
+                "select": "article_id,title,theme,latitude,longitude,publication_date",
+                "language": f"eq.{self.language}",
+                "latitude": "not.is.null",
+                "longitude": "not.is.null",
+                "publication_date": f"gte.{since}",
+                "article_id": f"gt.{last_id}",
+                "order": "article_id",
+                "limit": PAGE_SIZE
+            }
+            url = f"{self.supabase_url}/rest/v1/{CARDS_TABLE}?{urllib.parse.urlencode(query_params)}"
+            req = urllib.request.Request(url, headers=self.headers, method="GET")
+            with http_client.urlopen(req) as response:
+                page = json.loads(response.read().decode())
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            last_id = page[-1]["article_id"]
+
+    def store_clusters(self, rows: List[Dict[str, Any]], refreshed_at: str) -> None:
+        """Upsert this run's cells, then delete the cells no article falls in anymore"""
+        url = f"{self.supabase_url}/rest/v1/{CLUSTERS_TABLE}?on_conflict=zoom_level,geohash"
+        headers = {**self.headers, "Prefer": "resolution=merge-duplicates,return=minimal"}
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+            req = urllib.request.Request(url, data=json.dumps(chunk).encode(), headers=headers, method="POST")
+            with http_client.urlopen(req):
+                pass
+
+        query = urllib.parse.urlencode({"refreshed_at": f"lt.{refreshed_at}"})
+        req = urllib.request.Request(f"{self.supabase_url}/rest/v1/{CLUSTERS_TABLE}?{query}",
+                                     headers={**self.headers, "Prefer": "return=minimal"}, method="DELETE")
+        with http_client.urlopen(req):
+            pass
+
+    def build(self) -> int:
+        """Recompute every zoom level's clusters, returning the number of cells written"""
+        started = time.monotonic()
+        refreshed_at = datetime.now(timezone.utc).isoformat()
+        article_count = 0
+
+        def counted(articles):
+            nonlocal article_count
+            for article in articles:
+                article_count += 1
+                yield article
+
+        levels = build_clusters(counted(self.fetch_articles()))
+        rows = cluster_rows(levels, refreshed_at)
+        self.store_clusters(rows, refreshed_at)
+        logger.info(f"Clustered {article_count} {self.language} cards into {len(rows)} cells "
+                    f"({', '.join(f'level {p}: {len(levels[p])}' for p in sorted(levels))}) "
+                    f"in {time.monotonic() - started:.1f}s")
+        return len(rows)
+
+
+def lambda_handler(event, context):
+    """AWS Lambda handler function, scheduled after translate-ai-news-fr-en"""
+    try:
+        supabase_url = os.environ.get('SUPABASE_URL')
+        supabase_key = os.environ.get('SUPABASE_KEY')
+        language = event.get('language') or os.environ.get('GLOBE_CLUSTER_LANGUAGE', DEFAULT_LANGUAGE)
+        window_days = int(event.get('window_days') or os.environ.get('GLOBE_CLUSTER_WINDOW_DAYS', DEFAULT_WINDOW_DAYS))
+
+        if not all([supabase_url, supabase_key]):
+            return {'statusCode': 400, 'body': json.dumps({'status': 'error', 'message': 'Missing SUPABASE_URL or SUPABASE_KEY'})}
+
+        builder = GlobeClusterBuilder(supabase_url, supabase_key, language, window_days)
+        cell_count = builder.build()
+        return {'statusCode': 200, 'body': json.dumps({'status': 'success', 'message': f'{cell_count} globe clusters written'})}
+    except Exception as e:
+        logger.error(f"Lambda execution error: {str(e)}")
+        return {'statusCode': 500, 'body': json.dumps({'status': 'error', 'message': str(e)})}
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the globe clusters of every zoom level')
+    parser.add_argument('--supabase-url', required=True, help='Supabase project URL')
+    parser.add_argument('--supabase-key', required=True, help='Supabase API key')
+    parser.add_argument('--language', default=DEFAULT_LANGUAGE, help='Language of the globe cards to cluster')
+    parser.add_argument('--window-days', type=int, default=DEFAULT_WINDOW_DAYS, help='Days of articles shown on the globe')
+
+    args = parser.parse_args()
+    GlobeClusterBuilder(args.supabase_url, args.supabase_key, args.language, args.window_days).build()
+
+if __name__ == "__main__":
+    main()
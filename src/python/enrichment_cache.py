@@ -0,0 +1,286 @@
+"""
+Content-addressed cache of OpenAI enrichment results.
+
+The same article reaches OpenAI again after a failed insert, on a rerun, or
+when one wire story is published by several feeds. Results are cached under
+a hash of the normalized title and description plus the prompt version and
+model, so any change to the prompt or model starts from an empty cache.
+
+Lookups go through three layers:
+  - an in-process LRU, which survives warm Lambda invocations,
+  - the Supabase table ai_enrichment_cache (sql/migrations/004), shared by every run,
+  - a local SQLite file, used when Supabase is not configured or not reachable.
+Entries expire after a TTL in every layer; the local layers also keep at most
+max_entries rows, dropping the least recently used.
+
+Deploy this file next to the Lambda scripts that import it.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+
+logger = logging.getLogger("enrichment-cache")
+
+CACHE_TABLE = "ai_enrichment_cache"
+DEFAULT_TTL_SECONDS = int(os.environ.get("ENRICHMENT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("ENRICHMENT_CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_SQLITE_PATH = os.environ.get("ENRICHMENT_CACHE_PATH", "/tmp/globnuz-enrichment-cache.sqlite3")  # /tmp is writable on Lambda
+LOOKUP_CHUNK_SIZE = 100  # Keys per cache_key=in.(...) query; 64-char keys keep the URL short enough
+PRUNE_INTERVAL_SECONDS = 3600
+
+TAG_RE = re.compile(r"<[^>]+>")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase, strip HTML tags and collapse whitespace so trivial feed differences hash alike"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", TAG_RE.sub(" ", value))
+    return WHITESPACE_RE.sub(" ", value).strip().lower()
+
+
+def enrichment_key(title: Optional[str], description: Optional[str], prompt_version: str, model: str) -> str:
+    """Cache key of an article: sha256 of its normalized text, the prompt version and the model"""
+    material = "\n".join([normalize_text(title), normalize_text(description), prompt_version, model])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class EnrichmentCache:
+    """Thread-safe enrichment cache; every method degrades to a miss rather than failing the run"""
+
+    def __init__(self, prompt_version: str, model: str, supabase_url: Optional[str] = None,
+                 supabase_key: Optional[str] = None, sqlite_path: Optional[str] = DEFAULT_SQLITE_PATH,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.prompt_version = prompt_version
+        self.model = model
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.use_supabase = bool(supabase_url and supabase_key)
+        self.sqlite_path = sqlite_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (result, created_at)
+        self.lock = threading.Lock()
+        self.db = None
+        self.last_prune = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, title: Optional[str], description: Optional[str]) -> str:
+        return enrichment_key(title, description, self.prompt_version, self.model)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return the cached result of every key that has a fresh entry"""
+        keys = list(dict.fromkeys(keys))
+        found = self._memory_get(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            remote = self._supabase_get(missing) if self.use_supabase else None
+            if remote is None:
+                remote = self._sqlite_get(missing)
+            for key, result in remote.items():
+                self._memory_put(key, result)
+            found.update(remote)
+        with self.lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, results: Dict[str, Dict[str, Any]]) -> None:
+        """Store enrichment results by key in every layer"""
+        if not results:
+            return
+        for key, result in results.items():
+            self._memory_put(key, result)
+        if not (self.use_supabase and self._supabase_put(results)):
+            self._sqlite_put(results)
+        self._maybe_prune()
+
+    # In-process LRU
+
+    def _memory_get(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            for key in keys:
+                entry = self.memory.get(key)
+                if entry is None:
+                    continue
+                if entry[1] < cutoff:
+                    del self.memory[key]
+                    continue
+                self.memory.move_to_end(key)
+                found[key] = entry[0]
+        return found
+
+    def _memory_put(self, key: str, result: Dict[str, Any]) -> None:
+        with self.lock:
+            self.memory[key] = (result, time.time())
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    # Supabase table
+
+    def _supabase_headers(self) -> Dict[str, str]:
+        return {
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {self.supabase_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _supabase_get(self, keys: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Fresh entries from Supabase, or None when the table can't be used"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)).isoformat()
+        found = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            query_params = {
+                "select": "cache_key,result",
+                "cache_key": f"in.({','.join(chunk)})",
+                "created_at": f"gte.{cutoff}"
+            }
+            url = f"{self.supabase_url}/rest/v1/{CACHE_TABLE}?{urllib.parse.urlencode(query_params)}"
+            req = urllib.request.Request(url, headers=self._supabase_headers(), method="GET")
+            try:
+                with http_client.urlopen(req) as response:
+                    rows = json.loads(response.read().decode())
+            except Exception as e:
+                self._supabase_failed("reading", e)
+                return None
+            found.update({row["cache_key"]: row["result"] for row in rows})
+        return found
+
+    def _supabase_put(self, results: Dict[str, Dict[str, Any]]) -> bool:
+        rows = [{
+            "cache_key": key,
+            "result": result,
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        } for key, result in results.items()]
+        url = f"{self.supabase_url}/rest/v1/{CACHE_TABLE}?on_conflict=cache_key"
+        headers = {**self._supabase_headers(), "Prefer": "resolution=merge-duplicates,return=minimal"}
+        req = urllib.request.Request(url, data=json.dumps(rows).encode(), headers=headers, method="POST")
+        try:
+            with http_client.urlopen(req):
+                return True
+        except Exception as e:
+            self._supabase_failed("writing", e)
+            return False
+
+    def _supabase_failed(self, action: str, error: Exception) -> None:
+        if isinstance(error, urllib.error.HTTPError):
+            error = f"{error.code}: {error.read().decode()}"
+            if error.startswith("404"):
+                # Migration 004 not applied: stop asking for the rest of this process
+                self.use_supabase = False
+        logger.warning(f"Enrichment cache: error {action} {CACHE_TABLE}, using the local cache ({error})")
+
+    # Local SQLite file
+
+    def _sqlite(self) -> Optional[sqlite3.Connection]:
+        """Open the local database on first use; callers hold self.lock"""
+        if self.db is None and self.sqlite_path:
+            try:
+                self.db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS enrichment_cache ("
+                    "cache_key TEXT PRIMARY KEY, result TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+                )
+                self.db.execute("CREATE INDEX IF NOT EXISTS idx_enrichment_cache_last_used "
+                                "ON enrichment_cache(last_used_at)")
+            except sqlite3.Error as e:
+                logger.warning(f"Enrichment cache: local cache {self.sqlite_path} unavailable ({e})")
+                self.sqlite_path = None
+                self.db = None
+        return self.db
+
+    def _sqlite_get(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        with self.lock:
+            db = self._sqlite()
+            if db is None:
+                return {}
+            placeholders = ",".join("?" * len(keys))
+            rows = db.execute(
+                f"SELECT cache_key, result FROM enrichment_cache WHERE cache_key IN ({placeholders}) AND created_at >= ?",
+                [*keys, now - self.ttl_seconds]
+            ).fetchall()
+            if rows:
+                db.executemany("UPDATE enrichment_cache SET last_used_at = ? WHERE cache_key = ?",
+                               [(now, key) for key, _ in rows])
+                db.commit()
+        return {key: json.loads(result) for key, result in rows}
+
+    def _sqlite_put(self, results: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        with self.lock:
+            db = self._sqlite()
+            if db is None:
+                return
+            db.executemany(
+                "INSERT OR REPLACE INTO enrichment_cache (cache_key, result, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(result), now, now) for key, result in results.items()]
+            )
+            db.commit()
+
+    # Eviction
+
+    def _maybe_prune(self) -> None:
+        """Drop expired entries, and the least recently used local ones beyond max_entries"""
+        now = time.time()
+        with self.lock:
+            if now - self.last_prune < PRUNE_INTERVAL_SECONDS:
+                return
+            self.last_prune = now
+            db = self._sqlite()
+            if db is not None:
+                db.execute("DELETE FROM enrichment_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+                db.execute(
+                    "DELETE FROM enrichment_cache WHERE cache_key IN ("
+                    "SELECT cache_key FROM enrichment_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                db.commit()
+        if self.use_supabase:
+            cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)).isoformat()
+            url = f"{self.supabase_url}/rest/v1/{CACHE_TABLE}?{urllib.parse.urlencode({'created_at': f'lt.{cutoff}'})}"
+            req = urllib.request.Request(url, headers={**self._supabase_headers(), "Prefer": "return=minimal"},
+                                         method="DELETE")
+            try:
+                with http_client.urlopen(req):
+                    pass
+            except Exception as e:
+                self._supabase_failed("pruning", e)
+
+
+# One cache per configuration, kept in module globals so the in-process layer survives warm invocations
+_shared_caches: Dict[tuple, EnrichmentCache] = {}
+_shared_caches_lock = threading.Lock()
+
+
+def shared_cache(prompt_version: str, model: str, supabase_url: Optional[str] = None,
+                 supabase_key: Optional[str] = None) -> EnrichmentCache:
+    """Return the process-wide cache for this prompt version, model and Supabase project"""
+    config = (prompt_version, model, supabase_url, supabase_key)
+    with _shared_caches_lock:
+        if config not in _shared_caches:
+            _shared_caches[config] = EnrichmentCache(prompt_version, model, supabase_url, supabase_key)
+        return _shared_caches[config]
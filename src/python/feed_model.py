@@ -0,0 +1,252 @@
+"""
+Format-agnostic model of a feed entry, shared by the feed scripts.
+
+RSS, RDF and Atom items differ only in where each field lives: which child
+tag, in which namespace, as text or as an attribute. FIELD_MAPS declares
+those locations per format, and parse_feed_item resolves every field of an
+item from one index of its children into a FeedEntry, a slotted record that
+replaces the per-format dicts.
+
+Deploy this file next to the Lambda scripts that import it.
+"""
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+# Define common namespaces for RSS and RDF formats
+NAMESPACES = {
+    'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+    'rss': 'http://purl.org/rss/1.0/',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'content': 'http://purl.org/rss/1.0/modules/content/',
+    'media': 'http://search.yahoo.com/mrss/',
+    'atom': 'http://www.w3.org/2005/Atom'
+}
+
+# src of an img tag, double or single quoted (an img inside a figure matches too)
+IMG_SRC_RE = re.compile(r"""<img[^>]+src=(?:"([^">]+)"|'([^'>]+)')""")
+
+
+def _ns(prefix: str, tag: str) -> str:
+    return f"{{{NAMESPACES[prefix]}}}{tag}"
+
+
+# Where each field of an entry is found, per format, tried in order until one gives a
+# non-empty value. A source is either a child tag (its text) or a (tag, selector) pair:
+#   "@name"  an attribute of the child,
+#   IMG      the first img src in the child's HTML text,
+#   a tag    the text of that grandchild.
+# ITEM as the tag stands for the item element itself.
+ITEM = "."
+IMG = "<img>"
+FIELD_MAPS = {
+    'RSS': (
+        ("title", ("title",)),
+        ("description", ("description", "summary", "content")),
+        ("external_link", ("link", "guid")),
+        ("publication_date", ("pubDate", "pubdate", "published", "date")),
+        ("image", (("enclosure", "@url"), (_ns('media', 'content'), "@url"), ("content", IMG), ("description", IMG),
+                   ("summary", IMG))),
+        ("author", ("author", "AuthorName", "creator", _ns('dc', 'creator'))),
+        ("category", ("category",)),
+        ("content", ("content", _ns('content', 'encoded'), "description", "summary")),
+    ),
+    'RDF': (
+        ("title", ("title", _ns('rss', 'title'))),
+        ("description", ("description", _ns('rss', 'description'))),
+        # In RDF, the link might be the rdf:about attribute if not specified directly
+        ("external_link", ("link", _ns('rss', 'link'), (ITEM, f"@{_ns('rdf', 'about')}"), (ITEM, "@about"))),
+        ("publication_date", (_ns('dc', 'date'), "pubDate")),
+        ("image", (("description", IMG), (_ns('rss', 'description'), IMG))),
+        ("author", (_ns('dc', 'creator'),)),
+        ("category", (_ns('dc', 'subject'), "category")),
+        ("language", (_ns('dc', 'language'),)),
+    ),
+    'ATOM': (
+        ("title", (_ns('atom', 'title'), "title")),
+        ("description", (_ns('atom', 'summary'), "summary", _ns('atom', 'content'), "content")),
+        ("external_link", ((_ns('atom', 'link'), "@href"), ("link", "@href"))),
+        ("publication_date", (_ns('atom', 'published'), "published", _ns('atom', 'updated'), "updated")),
+        ("image", ((_ns('atom', 'content'), IMG), ("content", IMG))),
+        ("author", ((_ns('atom', 'author'), _ns('atom', 'name')), ("author", "name"))),
+        ("category", ((_ns('atom', 'category'), "@term"), ("category", "@term"))),
+    ),
+}
+
+# Publication dates. Feeds repeat the same few formats, so the common ones are matched by
+# a regex instead of the generic parsers, and whole strings are cached: items of one feed,
+# and the same item seen by every run, share their timestamps.
+DATE_CACHE_SIZE = 4096
+RFC822_DATE_RE = re.compile(
+    r"(?:[A-Za-z]{3},\s*)?(\d{1,2})\s+([A-Za-z]{3})[A-Za-z]*\.?\s+(\d{2,4})\s+"
+    r"(\d{1,2}):(\d{2})(?::(\d{2}))?\s*(?:([+-])(\d{2}):?(\d{2})|([A-Za-z]{1,5}))?"
+)
+MONTHS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+ZONE_OFFSETS = {  # Hours from UTC of the zone names RFC 822 allows, plus a few feeds use
+    "gmt": 0, "ut": 0, "utc": 0, "z": 0,
+    "est": -5, "edt": -4, "cst": -6, "cdt": -5, "mst": -7, "mdt": -6, "pst": -8, "pdt": -7,
+    "bst": 1, "cet": 1, "cest": 2, "met": 1, "mest": 2,
+}
+
+
+def _parse_rfc822(match) -> Optional[datetime]:
+    day, month, year, hour, minute, second, sign, offset_hours, offset_minutes, zone = match.groups()
+    month_number = MONTHS.get(month.lower())
+    if not month_number:
+        return None
+    year_number = int(year)
+    if len(year) == 2:
+        year_number += 2000 if year_number < 50 else 1900  # RFC 2822 two-digit years
+    if sign:
+        offset_minutes = int(offset_hours) * 60 + int(offset_minutes)
+        if sign == "-":
+            offset_minutes = -offset_minutes
+    else:
+        # Unknown zone names read as UTC, like email.utils does
+        offset_minutes = ZONE_OFFSETS.get(zone.lower(), 0) * 60 if zone else 0
+    try:
+        parsed = datetime(year_number, month_number, int(day), int(hour), int(minute), int(second or 0),
+                          tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return parsed - timedelta(minutes=offset_minutes) if offset_minutes else parsed
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_publication_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an RFC 822 or ISO 8601 date into an aware UTC datetime, or None if it can't be read"""
+    if not value:
+        return None
+    value = value.strip()
+    if value[4:5] == "-":
+        # ISO 8601: 2025-03-27, 2025-03-27T11:34:20Z, 2025-03-27T11:34:20.123+02:00
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        match = RFC822_DATE_RE.fullmatch(value)
+        if match:
+            return _parse_rfc822(match)
+        # Anything else email.utils understands
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def normalize_publication_date(value: Optional[str]) -> Optional[str]:
+    """A feed date as a UTC ISO 8601 timestamp, or None if it can't be read"""
+    parsed = parse_publication_date(value)
+    return parsed.isoformat() if parsed else None
+
+
+def extract_image_from_description(description: str) -> str:
+    """
+    Extract image URL from HTML content: the src of the first img tag, in double or
+    single quotes, found in one pass of a precompiled scanner.
+    """
+    if not description:
+        return None
+    match = IMG_SRC_RE.search(description)
+    if match:
+        return match.group(1) or match.group(2)
+    return None
+
+
+def index_children(item: ET.Element) -> Dict[str, ET.Element]:
+    """First child of each (namespace-resolved) tag, so every field is read without rescanning the item"""
+    children = {}
+    for child in item:
+        children.setdefault(child.tag, child)
+    return children
+
+
+class FeedEntry:
+    """One feed entry, whatever the format; fields a format doesn't carry stay None"""
+    __slots__ = ("title", "description", "external_link", "publication_date", "image",
+                 "author", "category", "content", "language", "newspaper_id")
+
+    def __init__(self, newspaper_id: Optional[int] = None):
+        self.title = self.description = self.external_link = self.publication_date = None
+        self.image = self.author = self.category = self.content = self.language = None
+        self.newspaper_id = newspaper_id
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """Dict-style access, so code handling rows can take entries too"""
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """The set fields (or the given ones) as a dict"""
+        return {field: getattr(self, field) for field in (fields or self.__slots__)
+                if getattr(self, field) is not None}
+
+    def __repr__(self) -> str:
+        return f"FeedEntry({self.to_dict()!r})"
+
+
+def resolve_field(item: ET.Element, children: Dict[str, ET.Element], sources: Iterable) -> Optional[str]:
+    """First non-empty value among the sources of a field"""
+    for source in sources:
+        if isinstance(source, str):
+            element = children.get(source)
+            value = element.text if element is not None else None
+        else:
+            tag, selector = source
+            element = item if tag == ITEM else children.get(tag)
+            if element is None:
+                continue
+            if selector[0] == "@":
+                value = element.get(selector[1:])
+            elif selector == IMG:
+                value = extract_image_from_description(element.text)
+            else:
+                nested = element.find(selector)
+                value = nested.text if nested is not None else None
+        if value:
+            return value
+    return None
+
+
+# Fields whose sources are all plain child tags are resolved inline by parse_feed_item;
+# the others go through resolve_field
+_TEXT_FIELDS = {
+    feed_type: tuple(
+        (field, sources if all(isinstance(source, str) for source in sources) else None, sources)
+        for field, sources in field_map
+    )
+    for feed_type, field_map in FIELD_MAPS.items()
+}
+
+
+def parse_feed_item(item: ET.Element, feed_type: str, newspaper_id: Optional[int] = None) -> Optional[FeedEntry]:
+    """
+    Resolve every field of an item of the given format ('RSS', 'RDF' or 'ATOM').
+    Returns None for an empty item; the caller decides what a usable entry needs.
+    """
+    children = index_children(item)
+    if not children:
+        return None
+    entry = FeedEntry(newspaper_id)
+    get_child = children.get
+    for field, tags, sources in _TEXT_FIELDS[feed_type]:
+        if tags is None:
+            value = resolve_field(item, children, sources)
+            if value is not None:
+                setattr(entry, field, value)
+            continue
+        for tag in tags:
+            element = get_child(tag)
+            if element is not None and element.text:
+                setattr(entry, field, element.text)
+                break
+    return entry
@@ -1,14 +1,25 @@
 import argparse
+import hashlib
+import itertools
 import json
 import re
 import os
 import sys
 import logging
+import threading
+import time
 import urllib.request
 import urllib.parse
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
+
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+from storage import Store, SupabaseStore, open_store  # Deploy storage.py alongside
+from feed_model import (  # Deploy feed_model.py alongside
+    NAMESPACES, FeedEntry, normalize_publication_date, parse_feed_item, parse_publication_date
+)
 
 # Configure logging
 logging.basicConfig(
@@ -20,85 +31,102 @@ logging.basicConfig(
 logger = logging.getLogger("get-rss-news-raw")
 logger.info("Script starting")  # Test log message at the beginning
 
-# Define common namespaces for RSS and RDF formats
-NAMESPACES = {
-    'rdf': 'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
-    'rss': 'http://purl.org/rss/1.0/',
-    'dc': 'http://purl.org/dc/elements/1.1/',
-    'content': 'http://purl.org/rss/1.0/modules/content/',
-    'media': 'http://search.yahoo.com/mrss/',
-    'atom': 'http://www.w3.org/2005/Atom'
-}
-
-def extract_image_from_description(description: str) -> str:
-    """
-    Extract image URL from HTML content with support for multiple image tag formats.
-    Handles both double and single quotes in src attributes.
-    """
-    if not description:
-        return None
-        
-    # Check for img tag with double quotes
-    match = re.search(r'<img[^>]+src="([^">]+)"', description)
-    if match:
-        return match.group(1)
-        
-    # Check for img tag with single quotes
-    match = re.search(r"<img[^>]+src='([^'>]+)'", description)
-    if match:
-        return match.group(1)
-        
-    # Check for figure with img inside
-    match = re.search(r'<figure[^>]*>.*?<img[^>]+src="([^">]+)".*?</figure>', description, re.DOTALL)
-    if match:
-        return match.group(1)
-        
-    # Check for figure with img inside with single quotes
-    match = re.search(r"<figure[^>]*>.*?<img[^>]+src='([^'>]+)'.*?</figure>", description, re.DOTALL)
-    if match:
-        return match.group(1)
-    
-    return None
+# Defaults for the "process all newspapers" mode
+DEFAULT_MAX_WORKERS = 8  # Feeds fetched, parsed and uploaded at the same time
+DEFAULT_MAX_PER_HOST = 2  # Concurrent fetches allowed against a single feed host
+FEED_TIMEOUT_SECONDS = 30  # A hung feed must not hold a worker for the whole run
+FEED_CHUNK_SIZE = 64 * 1024  # Bytes read from the feed and fed to the parser at a time
+
+# Characters that are not allowed in XML documents
+INVALID_XML_CHARS_RE = re.compile(rb'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+# Register namespaces to make parsing easier
+for _prefix, _uri in NAMESPACES.items():
+    ET.register_namespace(_prefix, _uri)
+
+# Bulk upload settings
+UPLOAD_BATCH_SIZE = 500  # Rows sent per POST to PostgREST
+MAX_ENTRIES_PER_FEED = int(os.environ.get('RSS_MAX_ENTRIES_PER_FEED', '10'))  # 0 uploads every entry
+DEFAULT_TABLE_COLUMNS = ['title', 'description', 'external_link', 'publication_date',
+                         'image', 'newspaper_id', 'author', 'category', 'content', 'language']
+
+# Table columns discovered from the PostgREST OpenAPI document, keyed by (store location, table).
+# Module globals survive warm Lambda invocations, so the document is downloaded once per TTL
+# and shared by every processor of the process instead of once per feed.
+SCHEMA_CACHE_TTL_SECONDS = int(os.environ.get('SCHEMA_CACHE_TTL_SECONDS', '3600'))
+SCHEMA_FALLBACK_TTL_SECONDS = 60  # Retry the discovery soon when it failed
+_table_columns_cache = {}  # (store location, table) -> (columns, expires_at)
+_table_columns_lock = threading.Lock()
+
+# Unique key the bulk insert resolves conflicts on. Once news_articles_raw is partitioned
+# (sql/migrations/010) the key must include publication_date; a 42P10 error ("no unique
+# constraint matching the ON CONFLICT specification") switches to it for the process.
+# Links stay unique regardless: the raw_links trigger (sql/migrations/013) skips a row whose
+# link is stored under another publication date, and the row comes back as skipped.
+RAW_CONFLICT_TARGET = os.environ.get('SUPABASE_RAW_CONFLICT_TARGET', 'external_link')
+PARTITIONED_CONFLICT_TARGET = 'external_link,publication_date'
+_conflict_targets = {}  # (store location, table) -> conflict target
+
+# Columns of the newspapers table holding the conditional GET cache of a feed
+FEED_CACHE_COLUMNS = ['rss_etag', 'rss_last_modified', 'rss_content_hash',
+                      'rss_high_water_date', 'rss_recent_link_hashes']
+
+# High-water mark: feeds are usually newest-first, so parsing stops once we are back
+# among items a previous run already ingested. An item is known only when its link (or
+# GUID) hash was stored; its date merely tells whether it may end the scan, so items a
+# publisher backfills or reorders below the mark are still ingested
+RECENT_LINK_HASHES_KEPT = 50  # Link hashes of the newest items remembered per newspaper
+EARLY_STOP_AFTER_KNOWN = int(os.environ.get('RSS_EARLY_STOP_AFTER_KNOWN', '3'))  # Consecutive known items before we stop reading, 0 never stops
+
+def hash_link(link: str) -> str:
+    """Short stable hash of an article link, used for the per-feed high-water mark"""
+    return hashlib.sha1(link.encode()).hexdigest()[:16]
 
 class RSSProcessor:
-    def __init__(self, newspaper_id: int, supabase_url: str, supabase_key: str, supabase_table: str):
+    def __init__(self, newspaper_id: int, supabase_url: str, supabase_key: str, supabase_table: str,
+                 rss_feed_url: str = None, host_semaphore: threading.Semaphore = None,
+                 feed_cache: Dict[str, Any] = None, store: Store = None):
         self.newspaper_id = newspaper_id
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
         self.supabase_table = supabase_table
+        self.store = store or SupabaseStore(supabase_url, supabase_key)  # Where newspapers and raw articles live
+        self.rss_feed_url = rss_feed_url  # Known up front when loaded in bulk by process_all_newspapers
+        self.host_semaphore = host_semaphore  # Limits concurrent fetches against the feed host
+        self.feed_cache = feed_cache or {}  # ETag, Last-Modified and content hash from the last fetch
+        self.pending_feed_cache = {}  # Validators of the current fetch, saved once the upload went through
+        self.feed_unchanged = False  # Set when the publisher reports (or we detect) an unchanged feed
+        self.feed_chunks = None  # Raw body of the feed being streamed
+        self.fetched_entries_count = 0  # Entries parsed from the feed so far
+        self.known_entries_count = 0  # Entries skipped because a previous run ingested them
+        self.invalid_date_entries_count = 0  # Entries rejected for an unreadable publication date
+        self.high_water_date = None  # Newest publication date seen in this run
+        self.recent_link_hashes = []  # Link hashes of the newest items of this run, feed order
+        self.entries_capped = False  # Set when MAX_ENTRIES_PER_FEED cut the feed short
         self.successful_entries_count = 0  # Track number of successfully processed entries
+        self.skipped_entries_count = 0  # Entries already stored by a previous run
+        self.failed_entries_count = 0  # Entries the upload could not store
         logger.info(f"RSSProcessor initialized with newspaper_id: {newspaper_id}")
 
     def get_rss_feed_url(self):
         logger.info(f"Getting RSS feed URL for newspaper ID: {self.newspaper_id}")
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json"
-        }
-    
-        query_url = f"{self.supabase_url}/rest/v1/newspapers?id=eq.{self.newspaper_id}&select=rss_feed_url"
-        logger.info(f"Requesting RSS feed URL from: {query_url}")
-        
-        req = urllib.request.Request(query_url, headers=headers, method="GET")
         try:
-            with urllib.request.urlopen(req) as response:
-                response_data = response.read().decode()
-                logger.info(f"Response status code: {response.status}")
-                json_response = json.loads(response_data)
-                logger.info(f"Response JSON: {json_response}")
-                
-                if not json_response:
-                    logger.error(f"Empty response when fetching RSS URL for newspaper ID: {self.newspaper_id}")
-                    return None
-                    
-                rss_url = json_response[0].get("rss_feed_url")
-                if not rss_url:
-                    logger.error(f"No RSS URL found for newspaper ID: {self.newspaper_id}")
-                else:
-                    logger.info(f"Successfully retrieved RSS URL: {rss_url}")
-                
-                return rss_url
+            json_response = self.store.select("newspapers", ["rss_feed_url"] + FEED_CACHE_COLUMNS,
+                                              {"id": f"eq.{self.newspaper_id}"})
+            logger.info(f"Response JSON: {json_response}")
+            
+            if not json_response:
+                logger.error(f"Empty response when fetching RSS URL for newspaper ID: {self.newspaper_id}")
+                return None
+                
+            rss_url = json_response[0].get("rss_feed_url")
+            self.feed_cache = {column: json_response[0].get(column) for column in FEED_CACHE_COLUMNS}
+            if not rss_url:
+                logger.error(f"No RSS URL found for newspaper ID: {self.newspaper_id}")
+            else:
+                logger.info(f"Successfully retrieved RSS URL: {rss_url}")
+            
+            return rss_url
         except urllib.error.HTTPError as e:
             logger.error(f"HTTP Error when fetching RSS URL: {e.code}, {e.reason}")
             error_body = e.read().decode() if hasattr(e, 'read') else 'No error body'
@@ -125,515 +153,437 @@ class RSSProcessor:
             # Default to RSS
             return 'RSS'
 
-    def fetch_rss_data(self, rss_feed_url) -> List[Dict[str, Any]]:
+    def fetch_rss_data(self, rss_feed_url) -> List[FeedEntry]:
         """Fetch and parse the RSS feed with support for multiple XML formats"""
+        try:
+            entries = list(self.stream_rss_data(rss_feed_url))
+            logger.info(f"Successfully fetched {len(entries)} entries")
+            return entries
+        finally:
+            self.close_feed()
+
+    def stream_rss_data(self, rss_feed_url) -> Iterator[FeedEntry]:
+        """
+        Fetch the feed and yield its entries as they are parsed.
+
+        The body is read in chunks and fed to a pull parser, so the first entries
+        reach the upload stage while the rest of the feed is still downloading and
+        the full document is never held in memory. Call close_feed() once done.
+        """
         logger.info(f"Fetching feed from {rss_feed_url}")
         
         if not rss_feed_url:
             logger.error("Feed URL is empty or None")
-            return []
+            return
 
+        self.feed_chunks = self.open_feed(rss_feed_url)
+        if self.feed_chunks is None:
+            return
+        yield from self.iter_feed_entries(self.feed_chunks)
+
+    def open_feed(self, rss_feed_url) -> Optional[Iterator[bytes]]:
+        """Open the feed with a conditional GET, returning its raw chunks or None if unchanged"""
+        logger.info(f"Opening URL: {rss_feed_url}")
+        # Ask the publisher to answer 304 when the feed did not change since the last fetch
+        request_headers = {}
+        if self.feed_cache.get("rss_etag"):
+            request_headers["If-None-Match"] = self.feed_cache["rss_etag"]
+        if self.feed_cache.get("rss_last_modified"):
+            request_headers["If-Modified-Since"] = self.feed_cache["rss_last_modified"]
+        req = urllib.request.Request(rss_feed_url, headers=request_headers, method="GET")
+
+        if self.host_semaphore is not None:
+            self.host_semaphore.acquire()
         try:
-            logger.info(f"Opening URL: {rss_feed_url}")
-            with urllib.request.urlopen(rss_feed_url) as response:
-                logger.info(f"Feed fetched, status: {response.status}")
-                xml_data = response.read().decode()
-                logger.info(f"XML data decoded, length: {len(xml_data)}")
-                
+            response = http_client.urlopen(req, timeout=FEED_TIMEOUT_SECONDS)
+        except Exception as e:
+            if self.host_semaphore is not None:
+                self.host_semaphore.release()
+            if isinstance(e, urllib.error.HTTPError) and e.code == 304:
+                logger.info(f"Feed not modified since last fetch: {rss_feed_url}")
+                self.feed_unchanged = True
+                return None
+            if isinstance(e, urllib.error.HTTPError):
+                logger.error(f"HTTP Error while fetching feed: {e.code}, {e.reason}")
+            elif isinstance(e, urllib.error.URLError):
+                logger.error(f"URL Error while fetching feed: {e.reason}")
+            else:
+                logger.error(f"Unexpected error fetching feed: {str(e)}")
+            raise
+
+        logger.info(f"Feed fetched, status: {response.status}")
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        content_hash = hashlib.sha256()
+
+        if self.feed_cache.get("rss_content_hash") and not (etag or last_modified):
+            # Without validators the body hash is the only way to spot an unchanged feed,
+            # so this publisher's feed has to be read completely before parsing
             try:
+                raw_data = response.read()
+            finally:
+                response.close()
+                if self.host_semaphore is not None:
+                    self.host_semaphore.release()
+            content_hash.update(raw_data)
+            if content_hash.hexdigest() == self.feed_cache["rss_content_hash"]:
+                logger.info(f"Feed content unchanged since last fetch: {rss_feed_url}")
+                self.feed_unchanged = True
+                return None
+            self.pending_feed_cache = {
+                "rss_etag": etag,
+                "rss_last_modified": last_modified,
+                "rss_content_hash": content_hash.hexdigest()
+            }
+            return self.buffered_chunks(raw_data)
+
+        return self.read_feed_chunks(response, content_hash, etag, last_modified)
+
+    @staticmethod
+    def buffered_chunks(raw_data: bytes) -> Iterator[bytes]:
+        """Yield a body already read in full in parser-sized chunks; a generator, so close_feed can close it"""
+        for start in range(0, len(raw_data), FEED_CHUNK_SIZE):
+            yield raw_data[start:start + FEED_CHUNK_SIZE]
+
+    def read_feed_chunks(self, response, content_hash, etag: str, last_modified: str) -> Iterator[bytes]:
+        """Yield the raw body in chunks, recording the feed cache when the reader is done"""
+        complete = False
+        try:
+            while True:
+                chunk = response.read(FEED_CHUNK_SIZE)
+                if not chunk:
+                    break
+                content_hash.update(chunk)
+                yield chunk
+            complete = True
+        finally:
+            response.close()
+            if self.host_semaphore is not None:
+                self.host_semaphore.release()
+            # When parsing stopped early the rest of the body is never downloaded; this feed
+            # sends validators, so those are enough for the next conditional GET
+            self.pending_feed_cache = {
+                "rss_etag": etag,
+                "rss_last_modified": last_modified,
+                "rss_content_hash": content_hash.hexdigest() if complete else None
+            }
+
+    def close_feed(self) -> None:
+        """Release the connection and host slot of the current feed"""
+        if self.feed_chunks is not None:
+            self.feed_chunks.close()
+            self.feed_chunks = None
+
+    def iter_feed_entries(self, chunks: Iterator[bytes]) -> Iterator[FeedEntry]:
+        """Incrementally parse RSS, RDF or Atom from raw chunks, yielding one entry per item"""
+        parser = ET.XMLPullParser(events=("start", "end"))
+        feed_type = None
+        item_tag = None
+        open_elements = []  # Ancestors of the element being parsed
+        head = b""  # Start of the document, for error reports
+        known_in_a_row = 0
+        
+        try:
+            for chunk in chunks:
+                if len(head) < 500:
+                    head += chunk[:500 - len(head)]
                 # Attempt to fix common XML issues before parsing
-                # Remove any invalid XML characters
-                xml_data = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', xml_data)
-                
-                # Register namespaces to make parsing easier
-                for prefix, uri in NAMESPACES.items():
-                    ET.register_namespace(prefix, uri)
-                
-                root = ET.fromstring(xml_data)
-                logger.info("XML parsed successfully")
-                
-                # Detect feed type to handle appropriately
-                feed_type = self.detect_feed_type(root)
-                logger.info(f"Detected feed type: {feed_type}")
-                
-                entries = []
-                
-                if feed_type == 'RSS':
-                    # Standard RSS format
-                    items = root.findall(".//item")
-                    logger.info(f"Found {len(items)} items in RSS feed")
-                    entries = self.process_rss_items(items)
+                # Remove any invalid XML characters (never part of a multi-byte UTF-8 sequence)
+                parser.feed(INVALID_XML_CHARS_RE.sub(b"", chunk))
+                
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        if feed_type is None:
+                            # Detect feed type from the root element to handle appropriately
+                            feed_type = self.detect_feed_type(elem)
+                            logger.info(f"Detected feed type: {feed_type}")
+                            item_tag = "entry" if feed_type == 'ATOM' else "item"
+                        open_elements.append(elem)
+                        continue
                     
-                elif feed_type == 'RDF':
-                    # RDF format (like the sample provided)
-                    # In RDF, items are usually direct children of the root
-                    items = root.findall(".//{http://purl.org/rss/1.0/}item") or root.findall(".//item")
+                    open_elements.pop()
+                    if elem.tag.rsplit("}", 1)[-1] != item_tag:
+                        continue
                     
-                    if not items:
-                        # Try with explicit namespace
-                        for prefix, uri in NAMESPACES.items():
-                            ns_items = root.findall(f".//{{{uri}}}item")
-                            if ns_items:
-                                items = ns_items
-                                break
-                                
-                    logger.info(f"Found {len(items)} items in RDF feed")
-                    entries = self.process_rdf_items(items)
+                    entry = self.process_item(elem, feed_type)
+                    # The item is complete: detach it so the tree never grows past one item
+                    if open_elements:
+                        open_elements[-1].remove(elem)
+                    if not entry:
+                        continue
                     
-                elif feed_type == 'ATOM':
-                    # Atom format
-                    items = root.findall(".//{http://www.w3.org/2005/Atom}entry") or root.findall(".//entry")
-                    logger.info(f"Found {len(items)} entries in Atom feed")
-                    entries = self.process_atom_items(items)
-                
-                logger.info(f"Successfully fetched {len(entries)} entries")
-                return entries
-                
-            except ET.ParseError as e:
-                logger.error(f"XML parsing error: {str(e)}")
-                logger.error(f"First 500 chars of XML: {xml_data[:500]}")
-                raise
-        except urllib.error.HTTPError as e:
-            logger.error(f"HTTP Error while fetching feed: {e.code}, {e.reason}")
-            raise
-        except urllib.error.URLError as e:
-            logger.error(f"URL Error while fetching feed: {e.reason}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error fetching feed: {str(e)}")
+                    known, settled = self.is_known_entry(entry)
+                    if known:
+                        self.known_entries_count += 1
+                        # A known item newer than the stored date was uploaded by a run the cap cut
+                        # short; items past it may still be missing, so it does not end the scan
+                        known_in_a_row = known_in_a_row + 1 if settled else 0
+                        if EARLY_STOP_AFTER_KNOWN and known_in_a_row >= EARLY_STOP_AFTER_KNOWN:
+                            logger.info(f"Reached items ingested by a previous run after "
+                                        f"{self.fetched_entries_count} new entries, stopping early")
+                            return
+                        continue
+                    known_in_a_row = 0
+                    self.fetched_entries_count += 1
+                    yield entry
+            parser.close()
+            logger.info(f"Parsed {self.fetched_entries_count} entries from {feed_type} feed")
+        except ET.ParseError as e:
+            logger.error(f"XML parsing error: {str(e)}")
+            logger.error(f"First 500 chars of XML: {head.decode(errors='replace')}")
             raise
-    
-    def process_rss_items(self, items):
-        """Process standard RSS items"""
-        entries = []
+
+    def is_known_entry(self, entry: FeedEntry) -> Tuple[bool, bool]:
+        """
+        Check an entry against the stored high-water mark, and advance the mark of this run.
+
+        Returns whether a previous run ingested the entry, matched on its exact link hash,
+        and whether it is also at or below the stored date, so it may count towards the
+        early stop.
+        """
+        link_hash = hash_link(entry.external_link)
+        if len(self.recent_link_hashes) < RECENT_LINK_HASHES_KEPT:
+            self.recent_link_hashes.append(link_hash)
         
-        for item in items:
-            try:
-                # Skip empty items
-                if len(list(item)) == 0:
-                    logger.info("Skipping empty item")
-                    continue
-                    
-                # Extract core fields with fallbacks for different formats
-                title = (
-                    item.findtext("title") or 
-                    ""
-                )
-                
-                # Skip items without title
-                if not title:
-                    logger.warning("Skipping item without title")
-                    continue
-                
-                description = (
-                    item.findtext("description") or 
-                    item.findtext("summary") or 
-                    item.findtext("content") or 
-                    ""
-                )
-                
-                link = (
-                    item.findtext("link") or 
-                    item.findtext("guid") or 
-                    ""
-                )
-                
-                # Skip items without link
-                if not link:
-                    logger.warning(f"Skipping item without link: {title}")
-                    continue
-                
-                # Parse publication date with multiple formats
-                pub_date = (
-                    item.findtext("pubDate") or 
-                    item.findtext("pubdate") or 
-                    item.findtext("published") or
-                    item.findtext("date") or
-                    ""
-                )
-                
-                # Look for images in multiple potential locations
-                image_url = None
-                
-                # Check for enclosure
-                if item.find("enclosure") is not None:
-                    image_url = item.find("enclosure").get("url")
-                
-                # Check for media:content
-                elif item.find(f"{{{NAMESPACES['media']}}}content") is not None:
-                    image_url = item.find(f"{{{NAMESPACES['media']}}}content").get("url")
-                
-                # Check for image in content
-                elif item.findtext("content"):
-                    image_url = extract_image_from_description(item.findtext("content"))
-                
-                # Check for image in description
-                elif description:
-                    image_url = extract_image_from_description(description)
-                    
-                # Extract additional fields if available
-                author = (
-                    item.findtext("author") or 
-                    item.findtext("AuthorName") or 
-                    item.findtext("creator") or 
-                    item.findtext(f"{{{NAMESPACES['dc']}}}creator") or
-                    ""
-                )
-                
-                category = (
-                    item.findtext("category") or 
-                    ""
-                )
-                
-                # Get content from various possible tags
-                content = (
-                    item.findtext("content") or 
-                    item.findtext(f"{{{NAMESPACES['content']}}}encoded") or 
-                    description
-                )
-                
-                # Create entry with standard fields
-                entry = {
-                    "title": title,
-                    "description": description,
-                    "external_link": link,
-                    "publication_date": pub_date,
-                    "image": image_url,
-                    "newspaper_id": self.newspaper_id,
-                    "author": author,
-                    "category": category,
-                    "content": content,
-                    "is_processed": False
-                }
-                
-                entries.append(entry)
-                logger.info(f"Processed RSS item: {entry['title']}")
-            except Exception as e:
-                logger.error(f"Error processing RSS item: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-                continue
-                
-        return entries
+        pub_date = parse_publication_date(entry.publication_date)
+        if pub_date and (self.high_water_date is None or pub_date > self.high_water_date):
+            self.high_water_date = pub_date
         
-    def process_rdf_items(self, items):
-        """Process RDF format items"""
-        entries = []
+        if link_hash not in (self.feed_cache.get("rss_recent_link_hashes") or ()):
+            return False, False
+        stored_date = parse_publication_date(self.feed_cache.get("rss_high_water_date"))
+        return True, bool(stored_date and (pub_date is None or pub_date <= stored_date))
+
+    def high_water_mark(self) -> Dict[str, Any]:
+        """Newest publication date and recent link hashes to store for the next run"""
+        if not self.recent_link_hashes:
+            return {}
         
-        for item in items:
-            try:
-                # Get item attributes - this often contains the URL in RDF format
-                item_about = item.get(f"{{{NAMESPACES['rdf']}}}about") or item.get("about")
-                
-                title = (
-                    item.findtext("title") or 
-                    item.findtext(f"{{{NAMESPACES['rss']}}}title") or
-                    ""
-                )
-                
-                # Skip items without title
-                if not title:
-                    logger.warning("Skipping RDF item without title")
-                    continue
-                
-                description = (
-                    item.findtext("description") or 
-                    item.findtext(f"{{{NAMESPACES['rss']}}}description") or
-                    ""
-                )
-                
-                # In RDF, the link might be the rdf:about attribute if not specified directly
-                link = (
-                    item.findtext("link") or 
-                    item.findtext(f"{{{NAMESPACES['rss']}}}link") or
-                    item_about or
-                    ""
-                )
-                
-                # Skip items without link
-                if not link:
-                    logger.warning(f"Skipping RDF item without link: {title}")
-                    continue
-                
-                # RDF often uses Dublin Core (dc) for dates
-                pub_date = (
-                    item.findtext(f"{{{NAMESPACES['dc']}}}date") or
-                    item.findtext("pubDate") or 
-                    ""
-                )
-                
-                # Look for images
-                image_url = None
-                
-                # Extract additional fields from Dublin Core
-                author = (
-                    item.findtext(f"{{{NAMESPACES['dc']}}}creator") or
-                    ""
-                )
-                
-                category = (
-                    item.findtext(f"{{{NAMESPACES['dc']}}}subject") or
-                    item.findtext("category") or
-                    ""
-                )
-                
-                # Get language if available
-                language = (
-                    item.findtext(f"{{{NAMESPACES['dc']}}}language") or
-                    ""
-                )
-                
-                # Create entry with standard fields
-                entry = {
-                    "title": title,
-                    "description": description,
-                    "external_link": link,
-                    "publication_date": pub_date,
-                    "image": image_url,
-                    "newspaper_id": self.newspaper_id,
-                    "author": author,
-                    "category": category,
-                    "language": language,
-                    "is_processed": False
-                }
-                
-                # Add image from description if available
-                if description:
-                    image_from_desc = extract_image_from_description(description)
-                    if image_from_desc:
-                        entry["image"] = image_from_desc
-                
-                entries.append(entry)
-                logger.info(f"Processed RDF item: {entry['title']}")
-            except Exception as e:
-                logger.error(f"Error processing RDF item: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-                continue
-                
-        return entries
+        stored_date = parse_publication_date(self.feed_cache.get("rss_high_water_date"))
+        newest = max(filter(None, [self.high_water_date, stored_date]), default=None)
+        if self.entries_capped:
+            # Entries past the cap were never read: the date stays where the last complete run left it
+            newest = stored_date
         
-    def process_atom_items(self, items):
-        """Process Atom format entries"""
+        # Newest links first, then the ones we remembered from earlier runs
+        link_hashes = list(dict.fromkeys(self.recent_link_hashes + list(self.feed_cache.get("rss_recent_link_hashes") or [])))
+        return {
+            "rss_high_water_date": newest.isoformat() if newest else None,
+            "rss_recent_link_hashes": link_hashes[:RECENT_LINK_HASHES_KEPT]
+        }
+
+    def process_items(self, items, feed_type: str) -> List[FeedEntry]:
+        """Process the items of a feed of the given type ('RSS', 'RDF' or 'ATOM')"""
         entries = []
         
         for item in items:
-            try:
-                title_elem = item.find(f"{{{NAMESPACES['atom']}}}title") or item.find("title")
-                title = title_elem.text if title_elem is not None else ""
-                
-                # Skip items without title
-                if not title:
-                    logger.warning("Skipping Atom entry without title")
-                    continue
-                
-                # Atom uses summary or content for description
-                summary_elem = item.find(f"{{{NAMESPACES['atom']}}}summary") or item.find("summary")
-                content_elem = item.find(f"{{{NAMESPACES['atom']}}}content") or item.find("content")
-                
-                description = ""
-                if summary_elem is not None:
-                    description = summary_elem.text or ""
-                elif content_elem is not None:
-                    description = content_elem.text or ""
-                
-                # Atom uses link elements with attributes
-                link = ""
-                link_elem = item.find(f"{{{NAMESPACES['atom']}}}link") or item.find("link")
-                if link_elem is not None:
-                    link = link_elem.get("href", "")
-                
-                # Skip items without link
-                if not link:
-                    logger.warning(f"Skipping Atom entry without link: {title}")
-                    continue
-                
-                # Atom uses updated or published elements for dates
-                updated_elem = item.find(f"{{{NAMESPACES['atom']}}}updated") or item.find("updated")
-                published_elem = item.find(f"{{{NAMESPACES['atom']}}}published") or item.find("published")
-                
-                pub_date = ""
-                if published_elem is not None:
-                    pub_date = published_elem.text or ""
-                elif updated_elem is not None:
-                    pub_date = updated_elem.text or ""
-                
-                # Atom uses author element with nested name
-                author = ""
-                author_elem = item.find(f"{{{NAMESPACES['atom']}}}author") or item.find("author")
-                if author_elem is not None:
-                    name_elem = author_elem.find(f"{{{NAMESPACES['atom']}}}name") or author_elem.find("name")
-                    if name_elem is not None:
-                        author = name_elem.text or ""
-                
-                # Atom may use category elements with term attribute
-                category = ""
-                category_elem = item.find(f"{{{NAMESPACES['atom']}}}category") or item.find("category")
-                if category_elem is not None:
-                    category = category_elem.get("term", "")
-                
-                # Create entry with standard fields
-                entry = {
-                    "title": title,
-                    "description": description,
-                    "external_link": link,
-                    "publication_date": pub_date,
-                    "image": None,  # Will be extracted from content if available
-                    "newspaper_id": self.newspaper_id,
-                    "author": author,
-                    "category": category,
-                    "is_processed": False
-                }
-                
-                # Extract image from content if available
-                if content_elem is not None and content_elem.text:
-                    image_from_content = extract_image_from_description(content_elem.text)
-                    if image_from_content:
-                        entry["image"] = image_from_content
-                
+            entry = self.process_item(item, feed_type)
+            if entry:
                 entries.append(entry)
-                logger.info(f"Processed Atom entry: {entry['title']}")
-            except Exception as e:
-                logger.error(f"Error processing Atom entry: {str(e)}")
-                import traceback
-                logger.error(traceback.format_exc())
-                continue
                 
         return entries
 
-    def upload_to_supabase(self, data: List[Dict[str, Any]]) -> None:
-        """Upload processed data to Supabase, skipping duplicates"""
-        if not data:
-            logger.warning("No data to upload to Supabase")
-            return
+    def process_item(self, item, feed_type: str) -> Optional[FeedEntry]:
+        """Process a single item of any feed type, returning None when it is skipped"""
+        try:
+            entry = parse_feed_item(item, feed_type, self.newspaper_id)
+            
+            # Skip empty items
+            if entry is None:
+                logger.info(f"Skipping empty {feed_type} item")
+                return None
+            
+            # Skip items without title
+            if not entry.title:
+                logger.warning(f"Skipping {feed_type} item without title")
+                return None
+            
+            # Skip items without link
+            if not entry.external_link:
+                logger.warning(f"Skipping {feed_type} item without link: {entry.title}")
+                return None
+            
+            # Store dates as UTC ISO 8601; a row with an unreadable date would break the partitioned upsert
+            publication_date = normalize_publication_date(entry.publication_date)
+            if publication_date is None:
+                logger.warning(f"Skipping {feed_type} item with unreadable date {entry.publication_date!r}: {entry.title}")
+                self.invalid_date_entries_count += 1
+                return None
+            entry.publication_date = publication_date
+            
+            logger.info(f"Processed {feed_type} item: {entry.title}")
+            return entry
+        except Exception as e:
+            logger.error(f"Error processing {feed_type} item: {str(e)}")
+            import traceback
+            logger.error(traceback.format_exc())
+            return None
 
-        logger.info(f"Uploading {len(data)} entries to Supabase")
-        
-        supabase_endpoint = f"{self.supabase_url}/rest/v1/{self.supabase_table}"
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"
-        }
+    def get_table_columns(self) -> List[str]:
+        """Get the columns of the target table from the schema cache, discovering them on a miss"""
+        cache_key = (self.store.location, self.supabase_table)
+        # Holding the lock during discovery makes concurrent processors wait for one download
+        with _table_columns_lock:
+            cached = _table_columns_cache.get(cache_key)
+            if cached and cached[1] > time.monotonic():
+                return list(cached[0])
+            
+            table_columns, discovered = self.fetch_table_columns()
+            ttl = SCHEMA_CACHE_TTL_SECONDS if discovered else SCHEMA_FALLBACK_TTL_SECONDS
+            _table_columns_cache[cache_key] = (tuple(table_columns), time.monotonic() + ttl)
+            return table_columns
+
+    def forget_table_column(self, column: str) -> None:
+        """Drop a column PostgREST rejected from the schema cache so later uploads stop sending it"""
+        cache_key = (self.store.location, self.supabase_table)
+        with _table_columns_lock:
+            cached = _table_columns_cache.get(cache_key)
+            if cached:
+                columns = tuple(c for c in cached[0] if c != column)
+                _table_columns_cache[cache_key] = (columns, cached[1])
+
+    def fetch_table_columns(self):
+        """Get the actual columns of the target table so we only send valid fields"""
+        table_columns = []
         
-        # First, let's get the actual columns from the table to ensure we only include valid fields
         try:
-            # Query table structure
-            schema_endpoint = f"{self.supabase_url}/rest/v1/?table={self.supabase_table}"
-            req = urllib.request.Request(schema_endpoint, headers=headers, method="GET")
-            table_columns = []
+            # This may or may not work depending on your Supabase version/configuration
+            discovered_columns = self.store.table_columns(self.supabase_table)
+            if discovered_columns is not None:
+                table_columns = discovered_columns
+                logger.info(f"Retrieved table columns: {table_columns}")
+        except Exception as e:
+            logger.warning(f"Could not fetch table schema, will use default columns: {e}")
+            # If schema fetch fails, use these common columns
+            return list(DEFAULT_TABLE_COLUMNS), False
+        return table_columns, True
+
+    def filter_entry(self, entry: FeedEntry, table_columns: List[str]) -> Dict[str, Any]:
+        """Keep only the non-empty fields of an entry that exist in the table, or None if it can't be stored"""
+        filtered_entry = {}
+        
+        # First include the standard columns (defined above)
+        for key in table_columns:
+            value = entry.get(key)
+            if value:  # Only include non-empty values
+                filtered_entry[key] = value
+        
+        # Allow a few essential columns that should be there
+        for key in ['title', 'description', 'external_link', 'publication_date', 'newspaper_id']:
+            value = entry.get(key)
+            if value and key not in filtered_entry:
+                filtered_entry[key] = value
+        
+        # Extra check to ensure critical fields are present
+        if not filtered_entry.get('title') or not filtered_entry.get('external_link'):
+            logger.warning(f"Entry missing critical fields, skipping: {filtered_entry}")
+            return None
+        
+        # Add metadata
+        if 'is_processed' in table_columns:
+            filtered_entry['is_processed'] = False
+        if 'ai_processed' in table_columns:
+            filtered_entry['ai_processed'] = False
+        return filtered_entry
+
+    def upload_to_supabase(self, data: Iterable[FeedEntry]) -> None:
+        """Upload processed data to the store in bulk, skipping duplicates"""
+        # Entries may come from a generator: batches are sent as soon as they fill up
+        table_columns = None
+        received = 0
+        rows = []
+        seen_links = set()
+        for entry in itertools.islice(data, MAX_ENTRIES_PER_FEED or None):
+            received += 1
+            # The next entry is not pulled, so reaching the cap is the only sign some were left
+            self.entries_capped = received == MAX_ENTRIES_PER_FEED
+            external_link = entry.get('external_link')
+            if not external_link:
+                logger.warning(f"Entry missing external_link, skipping: {entry}")
+                continue
+            if external_link in seen_links:
+                logger.info(f"Skipping duplicate entry with link: {external_link}")
+                self.skipped_entries_count += 1
+                continue
+            
+            if table_columns is None:
+                table_columns = self.get_table_columns()
+            filtered_entry = self.filter_entry(entry, table_columns)
+            if filtered_entry is None:
+                continue
+            seen_links.add(external_link)
+            rows.append(filtered_entry)
             
+            if len(rows) >= UPLOAD_BATCH_SIZE:
+                self.upload_batch(rows)
+                rows = []
+        
+        if rows:
+            self.upload_batch(rows)
+        
+        if received == 0:
+            if not self.feed_unchanged and not self.known_entries_count:
+                logger.warning("No data to upload to Supabase")
+            return
+        
+        logger.info(f"Uploaded {received} entries: inserted {self.successful_entries_count}, "
+                    f"skipped {self.skipped_entries_count} duplicates, "
+                    f"{self.failed_entries_count} failed")
+
+    def upload_batch(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch of rows with a single insert using ON CONFLICT DO NOTHING.
+
+        Columns PostgREST does not know about are dropped from every row and the
+        batch is retried. Any other error splits the batch in halves so one bad
+        row only costs itself, not its neighbours.
+        """
+        while True:
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+            conflict_target = _conflict_targets.get((self.store.location, self.supabase_table), RAW_CONFLICT_TARGET)
             try:
-                with urllib.request.urlopen(req) as response:
-                    # This may or may not work depending on your Supabase version/configuration
-                    schema_data = json.loads(response.read().decode())
-                    if isinstance(schema_data, dict) and 'definitions' in schema_data:
-                        # Extract column names if possible
-                        properties = schema_data.get('definitions', {}).get(self.supabase_table, {}).get('properties', {})
-                        table_columns = list(properties.keys())
-                        logger.info(f"Retrieved table columns: {table_columns}")
-            except Exception as e:
-                logger.warning(f"Could not fetch table schema, will use default columns: {e}")
-                # If schema fetch fails, use these common columns
-                table_columns = ['title', 'description', 'external_link', 'publication_date', 
-                                'image', 'newspaper_id', 'author', 'category', 'content', 'language']
-                
-            # Process each entry separately
-            for entry in data[:10]:  # Limit to 10 entries for development/testing
-                external_link = entry.get('external_link')
-                if not external_link:
-                    logger.warning(f"Entry missing external_link, skipping: {entry}")
+                # Let the unique key drop duplicates in the database; only the rows actually
+                # inserted come back, which gives us per-row inserted/skipped counts
+                inserted = self.store.insert(self.supabase_table, rows, on_conflict=conflict_target,
+                                             ignore_duplicates=True, returning=["external_link"])
+                inserted_count = len(inserted)
+                self.successful_entries_count += inserted_count
+                self.skipped_entries_count += len(rows) - inserted_count
+                logger.info(f"Inserted {inserted_count} of {len(rows)} entries, "
+                            f"{len(rows) - inserted_count} already existed")
+                return
+            except urllib.error.HTTPError as e:
+                error_body = e.read().decode() if hasattr(e, 'read') else 'No error body'
+                logger.error(f"HTTP Error {e.code} for batch of {len(rows)} entries: {e.reason}. Body: {error_body}")
+                
+                # If it's a bad request due to invalid columns, remove it and send the batch again
+                match = re.search(r"Could not find the '([^']+)' column", error_body)
+                if e.code == 400 and match and match.group(1) in columns:
+                    bad_column = match.group(1)
+                    logger.error(f"Removing invalid column '{bad_column}' from batch")
+                    self.forget_table_column(bad_column)
+                    for row in rows:
+                        row.pop(bad_column, None)
+                    continue
+
+                if e.code == 400 and '"42P10"' in error_body and conflict_target != PARTITIONED_CONFLICT_TARGET:
+                    logger.warning(f"No unique key on {conflict_target}, retrying on {PARTITIONED_CONFLICT_TARGET}")
+                    _conflict_targets[(self.store.location, self.supabase_table)] = PARTITIONED_CONFLICT_TARGET
                     continue
-                    
-                logger.info(f"Processing entry with link: {external_link}")
                 
-                # URL encode the external_link properly
-                encoded_link = urllib.parse.quote_plus(external_link)
-                query_url = f"{self.supabase_url}/rest/v1/{self.supabase_table}?external_link=eq.{encoded_link}"
+                if len(rows) == 1:
+                    logger.error(f"Failed to insert entry with link: {rows[0].get('external_link')}")
+                    self.failed_entries_count += 1
+                    return
                 
-                try:
-                    # Check if the entry already exists
-                    req = urllib.request.Request(query_url, headers=headers, method="GET")
-                    with urllib.request.urlopen(req) as response:
-                        existing_data = json.loads(response.read().decode())
-                        if existing_data and len(existing_data) > 0:
-                            logger.info(f"Skipping duplicate entry with link: {external_link}")
-                            continue
-                    
-                    # Filter the entry to only include valid columns
-                    filtered_entry = {}
-                    
-                    # First include the standard columns (defined above)
-                    for key in table_columns:
-                        if key in entry and entry[key]:  # Only include non-empty values
-                            filtered_entry[key] = entry[key]
-                    
-                    # Allow a few essential columns that should be there
-                    for key in ['title', 'description', 'external_link', 'publication_date', 'newspaper_id']:
-                        if key in entry and entry[key] and key not in filtered_entry:
-                            filtered_entry[key] = entry[key]
-                    
-                    # Extra check to ensure critical fields are present
-                    if not filtered_entry.get('title') or not filtered_entry.get('external_link'):
-                        logger.warning(f"Entry missing critical fields, skipping: {filtered_entry}")
-                        continue
-                    
-                    # Add metadata
-                    if 'is_processed' in table_columns:
-                        filtered_entry['is_processed'] = False
-                    if 'ai_processed' in table_columns:
-                        filtered_entry['ai_processed'] = False
-                        
-                    req = urllib.request.Request(
-                        supabase_endpoint, 
-                        data=json.dumps(filtered_entry).encode(), 
-                        headers=headers, 
-                        method="POST"
-                    )
-                    with urllib.request.urlopen(req) as response:
-                        logger.info(f"Insert response status: {response.status}")
-                        if response.status == 201:
-                            logger.info(f"Successfully inserted entry with link: {external_link}")
-                            self.successful_entries_count += 1  # Increment counter for successful entries
-                        else:
-                            logger.warning(f"Unexpected status {response.status} when inserting: {external_link}")
-                            
-                except urllib.error.HTTPError as e:
-                    error_body = e.read().decode() if hasattr(e, 'read') else 'No error body'
-                    logger.error(f"HTTP Error {e.code} for {external_link}: {e.reason}. Body: {error_body}")
-                    
-                    # If it's a bad request due to invalid columns, we can try to analyze the error
-                    if e.code == 400 and 'Could not find' in error_body and 'column' in error_body:
-                        # Try to extract the problematic column
-                        match = re.search(r"Could not find the '([^']+)' column", error_body)
-                        if match:
-                            bad_column = match.group(1)
-                            logger.error(f"Removing invalid column '{bad_column}' from entry")
-                            if bad_column in filtered_entry:
-                                del filtered_entry[bad_column]
-                                
-                                # Try again with the fixed entry
-                                try:
-                                    req = urllib.request.Request(
-                                        supabase_endpoint, 
-                                        data=json.dumps(filtered_entry).encode(), 
-                                        headers=headers, 
-                                        method="POST"
-                                    )
-                                    with urllib.request.urlopen(req) as response:
-                                        logger.info(f"Second attempt insert response status: {response.status}")
-                                        if response.status == 201:
-                                            logger.info(f"Successfully inserted entry with link: {external_link} (after fixing)")
-                                            self.successful_entries_count += 1  # Increment counter for successful entries
-                                except Exception as e2:
-                                    logger.error(f"Error on second attempt: {str(e2)}")
-                except Exception as e:
-                    logger.error(f"Error processing entry {external_link}: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error in upload_to_supabase: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+                middle = len(rows) // 2
+                self.upload_batch(rows[:middle])
+                self.upload_batch(rows[middle:])
+                return
+            except Exception as e:
+                logger.error(f"Error inserting batch of {len(rows)} entries: {str(e)}")
+                self.failed_entries_count += len(rows)
+                return
 
     def update_newspaper_integration_date(self) -> bool:
         """Update the newspaper record with the current integration date"""
@@ -643,69 +593,80 @@ class RSSProcessor:
             
         logger.info(f"Updating integration_date for newspaper ID: {self.newspaper_id}")
         
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"
-        }
-        
-        # Construct the endpoint for updating the newspaper
-        newspaper_endpoint = f"{self.supabase_url}/rest/v1/newspapers?id=eq.{self.newspaper_id}"
-        
         # Data to update - set integration_date to current timestamp
         update_data = {
             "integration_date": datetime.utcnow().isoformat()
         }
-        
+        # Piggyback the feed cache on the same request
+        update_data.update(self.pending_feed_cache)
+        return self.update_newspaper(update_data)
+
+    def save_feed_cache(self) -> bool:
+        """Persist the ETag, Last-Modified and content hash of the feed we just processed"""
+        if not self.pending_feed_cache:
+            return False
+
+        logger.info(f"Saving feed cache for newspaper ID: {self.newspaper_id}")
+        return self.update_newspaper(dict(self.pending_feed_cache))
+
+    def update_newspaper(self, update_data: Dict[str, Any]) -> bool:
+        """Update the newspaper record of this processor"""
         try:
-            # Make the PATCH request to update the record
-            req = urllib.request.Request(
-                newspaper_endpoint,
-                data=json.dumps(update_data).encode(),
-                headers=headers,
-                method="PATCH"
-            )
-            
-            with urllib.request.urlopen(req) as response:
-                status = response.status
-                logger.info(f"Newspaper update response status: {status}")
-                if status == 204:  # 204 No Content is the success response for PATCH
-                    logger.info(f"Successfully updated integration_date for newspaper ID: {self.newspaper_id}")
-                    return True
-                else:
-                    logger.warning(f"Unexpected status {status} when updating newspaper")
-                    return False
-                    
+            self.store.update("newspapers", {"id": f"eq.{self.newspaper_id}"}, update_data)
+            logger.info(f"Successfully updated {', '.join(update_data)} for newspaper ID: {self.newspaper_id}")
+            return True
         except urllib.error.HTTPError as e:
             error_body = e.read().decode() if hasattr(e, 'read') else 'No error body'
             logger.error(f"HTTP Error {e.code} when updating newspaper: {e.reason}. Body: {error_body}")
             return False
         except Exception as e:
-            logger.error(f"Error updating newspaper integration_date: {str(e)}")
+            logger.error(f"Error updating newspaper {', '.join(update_data)}: {str(e)}")
             return False
 
     def process(self) -> None:
         """Main processing method to fetch RSS and upload to Supabase"""
         logger.info("Starting process() method")
         try:
-            rss_feed_url = self.get_rss_feed_url()
+            rss_feed_url = self.rss_feed_url or self.get_rss_feed_url()
             if not rss_feed_url:
                 logger.error("Unable to get RSS feed URL, aborting process")
                 return
                 
-            logger.info(f"Got RSS feed URL: {rss_feed_url}, fetching data...")
-            entries = self.fetch_rss_data(rss_feed_url)
+            logger.info(f"Got RSS feed URL: {rss_feed_url}, streaming entries to Supabase...")
+            try:
+                self.upload_to_supabase(self.stream_rss_data(rss_feed_url))
+            finally:
+                self.close_feed()
+
+            if self.feed_unchanged:
+                logger.info("Feed unchanged since last run, nothing to upload")
+                return
+
+            if self.failed_entries_count > 0:
+                # Keep the old feed cache so the entries that failed are fetched again next run
+                logger.info(f"{self.failed_entries_count} entries failed, not saving feed cache")
+                self.pending_feed_cache = {}
+            else:
+                self.pending_feed_cache.update(self.high_water_mark())
+                if self.entries_capped:
+                    # Validators would turn the next fetch into a 304 before it reaches the rest
+                    logger.info(f"Stopped at {MAX_ENTRIES_PER_FEED} entries, not saving feed validators")
+                    self.pending_feed_cache.update(rss_etag=None, rss_last_modified=None, rss_content_hash=None)
 
-            if entries:
-                logger.info(f"Fetched {len(entries)} entries, uploading to Supabase...")
-                self.upload_to_supabase(entries)
-                logger.info(f"Successfully processed {self.successful_entries_count} out of {len(entries)} entries")
+            if self.fetched_entries_count:
+                logger.info(f"Successfully processed {self.successful_entries_count} out of {self.fetched_entries_count} entries")
+                if self.invalid_date_entries_count:
+                    logger.warning(f"{self.invalid_date_entries_count} entries skipped for an unreadable publication date")
                 
                 # If at least one entry was successfully processed, update the newspaper record
                 if self.successful_entries_count > 0:
                     logger.info("Updating newspaper integration_date...")
                     self.update_newspaper_integration_date()
+                else:
+                    self.save_feed_cache()
+            elif self.known_entries_count:
+                logger.info(f"No new entries, {self.known_entries_count} already ingested")
+                self.save_feed_cache()
             else:
                 logger.warning("No entries were successfully processed")
         except Exception as e:
@@ -715,33 +676,129 @@ class RSSProcessor:
             logger.error(traceback.format_exc())
             raise
 
+def fetch_all_newspapers(store: Store) -> List[Dict[str, Any]]:
+    """Load every newspaper that has an RSS feed URL in a single query"""
+    logger.info(f"Requesting all newspapers from: {store.location}")
+    try:
+        newspapers = store.select("newspapers", ["id", "rss_feed_url"] + FEED_CACHE_COLUMNS,
+                                  {"rss_feed_url": "not.is.null"}, order="id.asc")
+    except urllib.error.HTTPError as e:
+        error_body = e.read().decode() if hasattr(e, 'read') else 'No error body'
+        logger.error(f"HTTP Error when fetching newspapers: {e.code}, {e.reason}. Body: {error_body}")
+        raise
+
+    newspapers = [newspaper for newspaper in newspapers if newspaper.get("rss_feed_url")]
+    logger.info(f"Found {len(newspapers)} newspapers with an RSS feed URL")
+    return newspapers
+
+def process_all_newspapers(supabase_url: str, supabase_key: str, supabase_table: str,
+                           max_workers: int = DEFAULT_MAX_WORKERS,
+                           max_per_host: int = DEFAULT_MAX_PER_HOST, store: Store = None) -> List[Dict[str, Any]]:
+    """
+    Fetch, parse and upload every newspaper feed concurrently.
+
+    Feeds run on a bounded thread pool so the wall-clock time of a full refresh
+    is close to the slowest feed rather than the sum of all feeds. A semaphore
+    per feed host keeps us from opening too many connections to one publisher.
+    """
+    store = store or SupabaseStore(supabase_url, supabase_key)
+    newspapers = fetch_all_newspapers(store)
+    if not newspapers:
+        logger.warning("No newspapers with an RSS feed URL to process")
+        return []
+
+    host_semaphores = {}
+    for newspaper in newspapers:
+        host = urllib.parse.urlparse(newspaper["rss_feed_url"]).netloc.lower()
+        if host not in host_semaphores:
+            host_semaphores[host] = threading.Semaphore(max_per_host)
+
+    def run(newspaper):
+        host = urllib.parse.urlparse(newspaper["rss_feed_url"]).netloc.lower()
+        processor = RSSProcessor(
+            newspaper["id"], supabase_url, supabase_key, supabase_table,
+            rss_feed_url=newspaper["rss_feed_url"],
+            host_semaphore=host_semaphores[host],
+            feed_cache={column: newspaper.get(column) for column in FEED_CACHE_COLUMNS},
+            store=store
+        )
+        processor.process()
+        return processor.successful_entries_count
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, newspaper): newspaper for newspaper in newspapers}
+        for future in as_completed(futures):
+            newspaper_id = futures[future]["id"]
+            try:
+                entries_processed = future.result()
+                results.append({
+                    "newspaper_id": newspaper_id,
+                    "status": "success",
+                    "entries_processed": entries_processed
+                })
+            except Exception as e:
+                # One broken feed must not abort the whole refresh
+                logger.error(f"Processing failed for newspaper ID {newspaper_id}: {str(e)}")
+                results.append({
+                    "newspaper_id": newspaper_id,
+                    "status": "error",
+                    "message": str(e)
+                })
+
+    results.sort(key=lambda result: result["newspaper_id"])
+    logger.info(f"Processed {len(results)} newspapers, "
+                f"{sum(1 for r in results if r['status'] == 'error')} failed")
+    return results
+
 def lambda_handler(event, context):
     """AWS Lambda handler function"""
     logger.info(f"Lambda function started with event: {json.dumps(event)}")
     
     try:
         newspaper_id = event.get('newspaper_id')
+        process_all = bool(event.get('all_newspapers'))
         supabase_url = os.environ.get('SUPABASE_URL')
         supabase_key = os.environ.get('SUPABASE_KEY')
         supabase_table = os.environ.get('SUPABASE_TABLE_EVENTS_RAW')
+        # STORAGE_BACKEND=sqlite runs against a local database (storage.py), without Supabase
+        storage_backend = os.environ.get('STORAGE_BACKEND', 'supabase').lower()
 
         logger.info(f"Newspaper ID: {newspaper_id}")
+        logger.info(f"Process all newspapers: {'Yes' if process_all else 'No'}")
         logger.info(f"Supabase URL configured: {'Yes' if supabase_url else 'No'}")
         logger.info(f"Supabase Key configured: {'Yes' if supabase_key else 'No'}")
         logger.info(f"Supabase Table: {supabase_table}")
+        logger.info(f"Storage backend: {storage_backend}")
 
-        if not all([newspaper_id, supabase_url, supabase_key, supabase_table]):
-            missing = [k for k, v in {
-                'newspaper_id': newspaper_id,
-                'supabase_url': supabase_url,
-                'supabase_key': supabase_key,
-                'supabase_table': supabase_table,
-            }.items() if not v]
+        required = {
+            'newspaper_id': newspaper_id or process_all,
+            'supabase_url': supabase_url or storage_backend != 'supabase',
+            'supabase_key': supabase_key or storage_backend != 'supabase',
+            'supabase_table': supabase_table,
+        }
+        if not all(required.values()):
+            missing = [k for k, v in required.items() if not v]
             error_msg = f'Missing required parameters: {", ".join(missing)}'
             logger.error(error_msg)
             return {'statusCode': 400, 'body': json.dumps({'status': 'error', 'message': error_msg})}
+
+        store = open_store(supabase_url, supabase_key, storage_backend)
+
+        if process_all:
+            max_workers = int(event.get('max_workers') or os.environ.get('RSS_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+            max_per_host = int(event.get('max_per_host') or os.environ.get('RSS_MAX_PER_HOST', DEFAULT_MAX_PER_HOST))
+            logger.info(f"Processing all newspapers with {max_workers} workers, {max_per_host} per host")
+            results = process_all_newspapers(supabase_url, supabase_key, supabase_table, max_workers, max_per_host,
+                                             store=store)
+            return {'statusCode': 200, 'body': json.dumps({
+                'status': 'success',
+                'message': 'RSS feeds processed',
+                'entries_processed': sum(r.get('entries_processed', 0) for r in results),
+                'newspapers': results
+            })}
         
-        processor = RSSProcessor(newspaper_id, supabase_url, supabase_key, supabase_table)
+        processor = RSSProcessor(newspaper_id, supabase_url, supabase_key, supabase_table, store=store)
         logger.info("RSSProcessor initialized, starting processing")
         processor.process()
         
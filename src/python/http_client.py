@@ -0,0 +1,308 @@
+"""
+Shared HTTP client for the pipeline scripts.
+
+Every Supabase, OpenAI, DeepL and feed request goes through one process-wide
+client that keeps persistent connections per host, so consecutive requests to
+the same host reuse the TCP+TLS session instead of paying a new handshake.
+Responses are gzip-decoded transparently, every request gets a timeout, and
+transient failures (connection resets, 429, 5xx) are retried with backoff.
+
+`urlopen` mirrors urllib.request.urlopen: it takes a URL or a
+urllib.request.Request, returns a response usable as a context manager with
+`status`, `headers` and `read()`, and raises urllib.error.HTTPError /
+urllib.error.URLError, so the scripts keep their existing error handling.
+
+Deploy this file next to the Lambda scripts that import it.
+"""
+import email.utils
+import http.client
+import io
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from typing import Dict, Optional, Tuple, Union
+
+logger = logging.getLogger("http-client")
+
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30
+MAX_IDLE_CONNECTIONS_PER_HOST = 10
+IDLE_CONNECTION_TTL_SECONDS = 50  # Servers usually drop idle keep-alive connections after ~60s
+MAX_REDIRECTS = 5
+DRAIN_LIMIT_BYTES = 64 * 1024  # Unread bodies up to this size are drained to keep the connection
+USER_AGENT = "globnuz-pipeline/1.0"
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+RETRY_ALWAYS_STATUSES = {429, 503}  # The request was not processed
+RETRY_IDEMPOTENT_STATUSES = {500, 502, 504}  # The request may have been processed
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+PoolKey = Tuple[str, str, int]
+
+
+class PooledResponse:
+    """Response of a pooled connection; the connection goes back to the pool once the body is read"""
+
+    def __init__(self, client: "HTTPClient", key: PoolKey, conn: http.client.HTTPConnection,
+                 response: http.client.HTTPResponse, url: str):
+        self._client = client
+        self._key = key
+        self._conn = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self._buffer = b""
+        self._eof = False
+        self._done = False
+
+        encoding = (response.headers.get("Content-Encoding") or "").lower()
+        if encoding == "gzip":
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decoder = zlib.decompressobj()
+        else:
+            self._decoder = None
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """Read (and decode) up to amt bytes of the body, or all of it"""
+        if self._done:
+            return b""
+
+        if amt is None:
+            raw = self._response.read()
+            data = self._buffer + (self._decoder.decompress(raw) + self._decoder.flush() if self._decoder else raw)
+            self._buffer = b""
+            self._release()
+            return data
+
+        if self._decoder is None:
+            data = self._response.read(amt)
+            if not data:
+                self._release()
+            return data
+
+        while len(self._buffer) < amt and not self._eof:
+            raw = self._response.read(amt)
+            if raw:
+                self._buffer += self._decoder.decompress(raw)
+            else:
+                self._buffer += self._decoder.flush()
+                self._eof = True
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        if not data:
+            self._release()
+        return data
+
+    def _release(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        if self._response.will_close:
+            self._conn.close()
+        else:
+            self._client._release(self._key, self._conn)
+
+    def close(self) -> None:
+        """Close the response, keeping the connection when the unread body is small enough to drain"""
+        if self._done:
+            return
+        remaining = self._response.length
+        if remaining is not None and remaining <= DRAIN_LIMIT_BYTES:
+            try:
+                self._response.read()
+                self._release()
+                return
+            except (OSError, http.client.HTTPException):
+                pass
+        self._done = True
+        self._response.close()
+        self._conn.close()
+
+    def getcode(self) -> int:
+        return self.status
+
+    def geturl(self) -> str:
+        return self.url
+
+    def info(self):
+        return self.headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HTTPClient:
+    """Thread-safe HTTP client with per-host keep-alive pools, gzip decoding and retries"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT_SECONDS, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF_SECONDS, max_idle_per_host: int = MAX_IDLE_CONNECTIONS_PER_HOST):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_idle_per_host = max_idle_per_host
+        self._pools: Dict[PoolKey, list] = {}  # key -> [(connection, released_at)]
+        self._lock = threading.Lock()
+
+    def urlopen(self, req: Union[str, urllib.request.Request], data: Optional[bytes] = None,
+                timeout: Optional[float] = None) -> PooledResponse:
+        """Send a request like urllib.request.urlopen, over a pooled connection"""
+        if isinstance(req, str):
+            req = urllib.request.Request(req, data=data)
+        elif data is not None:
+            req.data = data
+
+        method = req.get_method()
+        url = req.full_url
+        body = req.data
+        headers = {name.title(): value for name, value in req.header_items()}
+        headers.setdefault("Accept-Encoding", "gzip")
+        headers.setdefault("User-Agent", USER_AGENT)
+        timeout = timeout or self.timeout
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request_with_retries(method, url, body, headers, timeout)
+            if response.status not in REDIRECT_STATUSES or not response.headers.get("Location"):
+                break
+            # Follow redirects like urllib does, turning POST into GET where browsers do
+            response.read()
+            url = urllib.parse.urljoin(url, response.headers["Location"])
+            if response.status == 303 or (response.status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+                headers.pop("Content-Type", None)
+        else:
+            raise urllib.error.HTTPError(url, response.status, "Too many redirects", response.headers, io.BytesIO(b""))
+
+        if response.status >= 300:
+            error_body = response.read()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, io.BytesIO(error_body))
+        return response
+
+    def _request_with_retries(self, method: str, url: str, body: Optional[bytes],
+                              headers: Dict[str, str], timeout: float) -> PooledResponse:
+        attempt = 0
+        while True:
+            try:
+                response = self._send(method, url, body, headers, timeout)
+            except (OSError, http.client.HTTPException) as e:
+                if attempt >= self.max_retries or method not in IDEMPOTENT_METHODS:
+                    raise urllib.error.URLError(e)
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                retryable = response.status in RETRY_ALWAYS_STATUSES or (
+                    response.status in RETRY_IDEMPOTENT_STATUSES and method in IDEMPOTENT_METHODS)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                response.read()
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                logger.warning(f"{method} {url} returned {response.status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, method: str, url: str, body: Optional[bytes],
+              headers: Dict[str, str], timeout: float) -> PooledResponse:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+        conn, reused = self._acquire(key, timeout)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            # The server closed the idle keep-alive connection; retry once on a fresh one
+            conn, _ = self._acquire(key, timeout, fresh=True)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                raise
+        return PooledResponse(self, key, conn, response, url)
+
+    def _acquire(self, key: PoolKey, timeout: float, fresh: bool = False):
+        """Take an idle connection for the host, or open a new one. Returns (connection, reused)"""
+        if not fresh:
+            now = time.monotonic()
+            with self._lock:
+                pool = self._pools.get(key, [])
+                while pool:
+                    conn, released_at = pool.pop()
+                    if now - released_at < IDLE_CONNECTION_TTL_SECONDS:
+                        conn.timeout = timeout
+                        if conn.sock is not None:
+                            conn.sock.settimeout(timeout)
+                        return conn, True
+                    conn.close()
+
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def _release(self, key: PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if len(pool) < self.max_idle_per_host:
+                pool.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _backoff_delay(self, attempt: int) -> float:
+        delay = min(self.backoff * (2 ** attempt), MAX_BACKOFF_SECONDS)
+        return delay + random.uniform(0, delay / 2)  # Jitter so parallel workers don't retry in lockstep
+
+    @staticmethod
+    def _retry_after(response: PooledResponse) -> Optional[float]:
+        """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return min(float(value), MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return min(max(retry_at.timestamp() - time.time(), 0), MAX_BACKOFF_SECONDS)
+
+    def close(self) -> None:
+        """Close every idle connection"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for conn, _ in pool:
+                conn.close()
+
+
+# Process-wide client: module globals survive warm Lambda invocations, and so do its connections
+default_client = HTTPClient()
+
+
+def urlopen(req: Union[str, urllib.request.Request], data: Optional[bytes] = None,
+            timeout: Optional[float] = None) -> PooledResponse:
+    """Drop-in replacement for urllib.request.urlopen using the shared pooled client"""
+    return default_client.urlopen(req, data=data, timeout=timeout)
@@ -9,6 +9,10 @@ import xml.etree.ElementTree as ET
 from datetime import datetime
 from typing import Dict, List, Any
 
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+from enrichment_cache import shared_cache  # Deploy enrichment_cache.py alongside
+from feed_model import normalize_publication_date, parse_feed_item  # Deploy feed_model.py alongside
+
 # Configure logging
 logging.basicConfig(
     level=logging.DEBUG,
@@ -16,6 +20,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger("rss-to-supabase")
 
+OPENAI_TIMEOUT_SECONDS = 120  # Completions for several articles take well over the default timeout
+OPENAI_MODEL = "gpt-4-turbo"
+PROMPT_VERSION = "rss-ingest-1"  # Bump whenever the prompt changes, so cached enrichments are not reused
+# Fields taken from the feed entry rather than from the model's rewrite
+SOURCE_FIELDS = ["external_link", "newspaper_id", "image", "publication_date"]
+# Fields of a feed entry sent to the model
+ENTRY_FIELDS = ["title", "external_link", "publication_date", "description", "image", "newspaper_id"]
+
 def extract_json_from_markdown(content):
     """Extract JSON data from Markdown-style content wrapped in ```json ... ```."""
     json_data_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
@@ -34,10 +46,6 @@ def extract_json_from_string(content):
     except json.JSONDecodeError:
         return None  # Return None if JSON is invalid
 
-def extract_image_from_description(description: str) -> str:
-    match = re.search(r'<img[^>]+src="([^">]+)"', description)
-    return match.group(1) if match else None
-
 class RSSProcessor:
     def __init__(self, rss_url: str, newspaper_id: int,openai_api_key: str, supabase_url: str, supabase_key: str, supabase_table: str):
         self.rss_url = rss_url
@@ -46,41 +54,29 @@ class RSSProcessor:
         self.supabase_key = supabase_key
         self.supabase_table = supabase_table
         self.openai_api_key = openai_api_key
-
+        self.enrichment_cache = shared_cache(PROMPT_VERSION, OPENAI_MODEL, supabase_url, supabase_key)
 
     def fetch_rss_data(self) -> List[Dict[str, Any]]:
         """Fetch and parse the RSS feed"""
         logger.info(f"Fetching RSS feed from {self.rss_url}")
         try:
-            with urllib.request.urlopen(self.rss_url) as response:
+            with http_client.urlopen(self.rss_url) as response:
                 xml_data = response.read().decode()
             root = ET.fromstring(xml_data)
             
             entries = []
-            # Define namespace mapping
-            namespaces = {"media": "http://search.yahoo.com/mrss/"}
 
             # LIMIT OF TWO NOT ON PRODUCTION [:2]
             for item in root.findall(".//item"):
-                description = item.findtext("description") or ""
-                # Extract image from different possible locations
-                image_url = (
-                    item.find("enclosure").get("url") if item.find("enclosure") is not None else None
-                ) or (
-                    item.find("media:content", namespaces).get("url") if item.find("media:content", namespaces) is not None else None
-                ) or (
-                    extract_image_from_description(description)
-                )
-
-                entry = {
-                    "title": item.findtext("title"),
-                    "external_link": item.findtext("link"),
-                    "publication_date": item.findtext("pubDate"),
-                    "description": item.findtext("description"),
-                    "image": image_url,
-                    "newspaper_id": self.newspaper_id,
-                    
-                }
+                feed_entry = parse_feed_item(item, 'RSS', self.newspaper_id)
+                if feed_entry is None or not feed_entry.external_link:
+                    continue
+                publication_date = normalize_publication_date(feed_entry.publication_date)
+                if publication_date is None:
+                    logger.warning(f"Skipping entry with unreadable date {feed_entry.publication_date!r}: {feed_entry.external_link}")
+                    continue
+                feed_entry.publication_date = publication_date
+                entry = feed_entry.to_dict(ENTRY_FIELDS)
                 logger.info(entry)
                 entries.append(entry)
             
@@ -92,6 +88,34 @@ class RSSProcessor:
             raise
 
     def process_entry_with_chatgpt(self, entries) -> List[Dict[str, Any]]:
+        """Enrich feed entries, sending only those missing from the enrichment cache"""
+        keys = [self.enrichment_cache.key(entry.get("title"), entry.get("description")) for entry in entries]
+        cached = self.enrichment_cache.get_many(keys)
+        misses = [entry for entry, key in zip(entries, keys) if key not in cached]
+        if len(misses) < len(entries):
+            logger.info(f"Enrichment cache: {len(entries) - len(misses)} hits, {len(misses)} entries sent to OpenAI")
+
+        results = self.request_enrichment(misses) if misses else []
+
+        # The model keeps external_link, which ties each result back to its entry
+        results_by_link = {result.get("external_link"): result for result in results if isinstance(result, dict)}
+        if len(results_by_link) != len(misses) and len(results) == len(misses):
+            results_by_link = {entry["external_link"]: result for entry, result in zip(misses, results)}
+
+        formatted = []
+        new_results = {}
+        for entry, key in zip(entries, keys):
+            result = cached.get(key)
+            if result is None:
+                result = results_by_link.get(entry["external_link"])
+                if result is None:
+                    continue
+                new_results[key] = {k: v for k, v in result.items() if k not in SOURCE_FIELDS}
+            formatted.append({**result, **{field: entry[field] for field in SOURCE_FIELDS if entry.get(field)}})
+        self.enrichment_cache.put_many(new_results)
+        return formatted
+
+    def request_enrichment(self, entries) -> List[Dict[str, Any]]:
         prompt = """I'm a developer who wants to feed it's news website with fresh newspaper articles from all around the world. I use RSS feed. Please get all that data and try to fit this data JSON model. Here's an example : 
             {
             "title": "Solidarité Congo",
@@ -126,7 +150,7 @@ class RSSProcessor:
         }
 
         data = json.dumps({
-            "model": "gpt-4-turbo",
+            "model": OPENAI_MODEL,
             "messages": [
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": json.dumps(entries)}
@@ -137,7 +161,7 @@ class RSSProcessor:
         req = urllib.request.Request(url, data=data, headers=headers, method="POST")
 
         try:
-            with urllib.request.urlopen(req) as response:
+            with http_client.urlopen(req, timeout=OPENAI_TIMEOUT_SECONDS) as response:
                 response_data = json.loads(response.read().decode('utf-8'))  # Convert string to JSON
 
                 if not response_data:
@@ -198,7 +222,7 @@ class RSSProcessor:
         
         req = urllib.request.Request(supabase_endpoint, data=json.dumps(data).encode(), headers=headers, method="POST")
         try:
-            with urllib.request.urlopen(req) as response:
+            with http_client.urlopen(req) as response:
                 logger.debug("Successfully uploaded data to Supabase")
         except urllib.error.HTTPError as e:
             error_response = e.read().decode()
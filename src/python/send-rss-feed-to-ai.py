@@ -3,11 +3,19 @@ import json
 import re
 import os
 import logging
+import threading
+import time
+import uuid
 import urllib.request
-import urllib.parse
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+from enrichment_cache import EnrichmentCache, shared_cache  # Deploy enrichment_cache.py alongside
+from story_dedup import DEFAULT_SIMILARITY_THRESHOLD, cluster_stories  # Deploy story_dedup.py alongside
+from storage import Store, SupabaseStore, open_store  # Deploy storage.py alongside
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +24,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger("supabase-news-processor")
 
+OPENAI_TIMEOUT_SECONDS = 120  # Completions for several articles take well over the default timeout
+OPENAI_MODEL = "gpt-4-turbo"
+OPENAI_API_URL = os.environ.get("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")  # Overridden by the benchmarks' stub
+PROMPT_VERSION = "news-processor-3"  # Bump whenever the prompt changes, so cached enrichments are not reused
+
+# Batching: as many raw articles per OpenAI request as fit the token budget, so the
+# fixed cost of the long system prompt is spread over more articles
+DEFAULT_FETCH_LIMIT = 100  # Raw articles loaded per run
+DEFAULT_BATCH_TOKEN_BUDGET = 6000  # Input tokens per request for the articles, on top of the prompt
+MAX_OUTPUT_TOKENS = 4096  # Completion limit of the model
+OUTPUT_TOKENS_PER_ARTICLE = 350  # Rough size of one enriched article in the completion
+ARTICLE_OVERHEAD_TOKENS = 80  # JSON keys, link, image URL and date of one article
+CHARS_PER_TOKEN = 4
+
+# Worker mode: several OpenAI requests in flight, paced by a token bucket that follows
+# the x-ratelimit-* headers OpenAI returns
+DEFAULT_WORKERS = 4
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 30000
+DEFAULT_MAX_ARTICLES_PER_RUN = 2000
+OPENAI_MAX_ATTEMPTS = 4  # Attempts per batch when OpenAI answers 429 or 503
+DEADLINE_MARGIN_SECONDS = 60  # Stop starting batches this long before the Lambda times out
+
+# Raw articles marked processed per PATCH; keeps the id=in.(...) filter well under URL limits
+UPDATE_CHUNK_SIZE = 200
+
+# Inserts enriched articles and marks their raw rows in one transaction (sql/migrations/003)
+ENRICHMENT_RPC = "insert_enriched_articles"
+
+# Work queue over news_articles_raw (sql/migrations/008): rows are claimed with a lease so
+# concurrent invocations never enrich the same article
+CLAIM_RPC = "claim_raw_articles"
+CLAIM_LEASE_SECONDS = int(os.environ.get("AI_CLAIM_LEASE_SECONDS", "900"))  # The longest a Lambda run can last
+
+# OpenAI requests are retried by the rate limiter, not by the HTTP client
+OPENAI_CLIENT = http_client.HTTPClient(timeout=OPENAI_TIMEOUT_SECONDS, max_retries=0)
+
+# Columns of news_articles_raw the model needs; the rest only costs tokens
+RAW_ARTICLE_COLUMNS = ["id", "title", "description", "author", "image", "external_link", "publication_date", "newspaper_id"]
+# Fields that must come from the source row rather than from the model's rewrite
+SOURCE_FIELDS = ["external_link", "newspaper_id", "image", "publication_date"]
+
 def extract_json_from_markdown(content):
     """Extract JSON data from Markdown-style content wrapped in ```json ... ```."""
     json_data_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
@@ -38,38 +88,230 @@ def extract_image_from_description(description: str) -> str:
     match = re.search(r'<img[^>]+src="([^">]+)"', description)
     return match.group(1) if match else None
 
+def parse_rate_limit_duration(value: str) -> float:
+    """Parse OpenAI reset durations like "20ms", "1s" or "6m0s" into seconds"""
+    seconds = 0.0
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value or ""):
+        seconds += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds
+
+class RateLimiter:
+    """
+    Token bucket for OpenAI requests and tokens, shared by the worker threads.
+
+    Buckets refill continuously at the per-minute limits. Every response
+    resyncs them with the x-ratelimit-remaining-* headers, and a 429 stops
+    all workers until its retry-after has passed.
+    """
+
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE):
+        self.request_limit = float(requests_per_minute)
+        self.token_limit = float(tokens_per_minute)
+        self.requests = self.request_limit
+        self.tokens = self.token_limit
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.condition = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.requests = min(self.request_limit, self.requests + elapsed * self.request_limit / 60)
+        self.tokens = min(self.token_limit, self.tokens + elapsed * self.token_limit / 60)
+        self.updated = now
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request and the given number of tokens can be spent"""
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                needed = min(tokens, self.token_limit)
+                if now >= self.blocked_until and self.requests >= 1 and self.tokens >= needed:
+                    self.requests -= 1
+                    self.tokens -= needed
+                    return
+                wait = max(
+                    self.blocked_until - now,
+                    (1 - self.requests) * 60 / self.request_limit,
+                    (needed - self.tokens) * 60 / self.token_limit
+                )
+                self.condition.wait(timeout=max(wait, 0.05))
+
+    def update(self, headers) -> None:
+        """Resync the buckets with the rate limit headers of an OpenAI response"""
+        with self.condition:
+            self._refill(time.monotonic())
+            if headers.get("x-ratelimit-limit-requests"):
+                self.request_limit = float(headers["x-ratelimit-limit-requests"])
+            if headers.get("x-ratelimit-limit-tokens"):
+                self.token_limit = float(headers["x-ratelimit-limit-tokens"])
+            # Other requests may be in flight since the server counted, so never raise our level
+            if headers.get("x-ratelimit-remaining-requests"):
+                self.requests = min(self.requests, float(headers["x-ratelimit-remaining-requests"]))
+            if headers.get("x-ratelimit-remaining-tokens"):
+                self.tokens = min(self.tokens, float(headers["x-ratelimit-remaining-tokens"]))
+
+    def back_off(self, headers) -> float:
+        """Pause every worker after a 429, returning the pause in seconds"""
+        delay = None
+        if headers.get("retry-after"):
+            try:
+                delay = float(headers["retry-after"])
+            except ValueError:
+                delay = None
+        if delay is None:
+            delay = max(parse_rate_limit_duration(headers.get("x-ratelimit-reset-requests")),
+                        parse_rate_limit_duration(headers.get("x-ratelimit-reset-tokens"))) or 1.0
+        with self.condition:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.condition.notify_all()
+        return delay
+
+def estimate_article_tokens(article: Dict[str, Any]) -> int:
+    """Estimate the prompt tokens of one article from its title and description length"""
+    text_length = len(article.get("title") or "") + len(article.get("description") or "")
+    return text_length // CHARS_PER_TOKEN + ARTICLE_OVERHEAD_TOKENS
+
+def pack_articles(articles: List[Dict[str, Any]], token_budget: int,
+                  max_output_tokens: int = MAX_OUTPUT_TOKENS) -> List[List[Dict[str, Any]]]:
+    """
+    Greedily pack articles into batches that fit both the input token budget and
+    the completion limit. An article too large for any budget gets a batch of its own.
+    """
+    max_per_batch = max(1, max_output_tokens // OUTPUT_TOKENS_PER_ARTICLE)
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for article in articles:
+        tokens = estimate_article_tokens(article)
+        if batch and (batch_tokens + tokens > token_budget or len(batch) >= max_per_batch):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(article)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def map_results_to_sources(results: List[Dict[str, Any]], articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Attach each enriched article to its source row through the raw_id the model echoes back"""
+    sources = {article["id"]: article for article in articles}
+    mapped = []
+    for position, result in enumerate(results):
+        if not isinstance(result, dict):
+            continue
+        raw_id = result.get("raw_id")
+        if raw_id not in sources and len(results) == len(articles):
+            # The model dropped the id but kept one result per article, in order
+            raw_id = articles[position]["id"]
+        if raw_id not in sources:
+            logger.warning(f"Dropping result that does not map to a source article: {result.get('title')}")
+            continue
+        result["raw_id"] = raw_id
+        for field in SOURCE_FIELDS:
+            if sources[raw_id].get(field):
+                result[field] = sources[raw_id][field]
+        mapped.append(result)
+    return mapped
+
+class RawArticleQueue:
+    """
+    Claim/lease queue over news_articles_raw, backed by the claim_raw_articles
+    function. A claim atomically leases up to N unprocessed rows, newest first,
+    skipping rows locked or leased by other workers (FOR UPDATE SKIP LOCKED).
+    Storing the enriched articles marks the rows processed; a lease that is
+    neither completed nor released expires after lease_seconds.
+    """
+
+    def __init__(self, supabase_url: str, supabase_key: str, raw_table: str = "news_articles_raw",
+                 lease_seconds: int = CLAIM_LEASE_SECONDS, worker_id: str = None, store: Store = None):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.raw_table = raw_table
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or uuid.uuid4().hex[:12]
+        self.store = store or SupabaseStore(supabase_url, supabase_key)
+
+    def claim(self, limit: int, exclude_ids: List[int] = None) -> List[Dict[str, Any]]:
+        """Lease up to limit unprocessed raw articles for this worker"""
+        payload = {
+            "batch_size": limit,
+            "worker": self.worker_id,
+            "lease_seconds": self.lease_seconds,
+            "exclude_ids": exclude_ids or []
+        }
+        articles = self.store.rpc(CLAIM_RPC, payload, RAW_ARTICLE_COLUMNS)
+        logger.debug(f"Worker {self.worker_id} claimed {len(articles)} raw articles")
+        return articles
+
+    def release(self, article_ids: List[int]) -> None:
+        """Give up this worker's leases on articles it could not process, so others can retry them"""
+        if not article_ids:
+            return
+        filters = {
+            "id": f"in.({','.join(str(article_id) for article_id in article_ids)})",
+            "ai_claimed_by": f"eq.{self.worker_id}"
+        }
+        try:
+            self.store.update(self.raw_table, filters, {"ai_claimed_at": None, "ai_claimed_by": None})
+            logger.debug(f"Worker {self.worker_id} released {len(article_ids)} raw articles")
+        except Exception as e:
+            # The leases simply expire
+            logger.warning(f"Error releasing raw articles {article_ids}: {str(e)}")
+
 class NewsProcessor:
-    def __init__(self, openai_api_key: str, supabase_url: str, supabase_key: str, raw_table: str, processed_table: str):
+    def __init__(self, openai_api_key: str, supabase_url: str, supabase_key: str, raw_table: str, processed_table: str,
+                 fetch_limit: int = DEFAULT_FETCH_LIMIT, token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+                 workers: int = DEFAULT_WORKERS, max_articles: int = DEFAULT_MAX_ARTICLES_PER_RUN,
+                 rate_limiter: RateLimiter = None, enrichment_cache: EnrichmentCache = None,
+                 dedup_threshold: float = DEFAULT_SIMILARITY_THRESHOLD, queue: RawArticleQueue = None,
+                 store: Store = None):
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
+        self.store = store or SupabaseStore(supabase_url, supabase_key)  # Where raw and enriched articles live
         self.raw_table = raw_table
         self.processed_table = processed_table
         self.openai_api_key = openai_api_key
+        self.fetch_limit = fetch_limit
+        self.token_budget = token_budget
+        self.workers = workers
+        self.max_articles = max_articles
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.enrichment_cache = enrichment_cache
+        self.dedup_threshold = dedup_threshold  # 0 disables near-duplicate clustering
+        # The claim function is written against the default raw table
+        if queue is None and raw_table == 'news_articles_raw':
+            queue = RawArticleQueue(supabase_url, supabase_key, raw_table, store=self.store)
+        self.queue = queue
+        # The RPC is written against the default tables
+        self.use_enrichment_rpc = (raw_table, processed_table) == ('news_articles_raw', 'news_articles')
 
-    def fetch_unprocessed_news(self) -> List[Dict[str, Any]]:
-        """Fetch unprocessed news articles from Supabase"""
+    def fetch_unprocessed_news(self, exclude_ids: List[int] = None, limit: int = None) -> List[Dict[str, Any]]:
+        """Claim (or, without the queue, fetch) up to limit unprocessed news articles, skipping the given ids"""
+        limit = limit or self.fetch_limit
         logger.info(f"Fetching unprocessed news from {self.raw_table}")
+        if self.queue is not None:
+            try:
+                return self.queue.claim(limit, exclude_ids)
+            except urllib.error.HTTPError as e:
+                error_response = e.read().decode()
+                if e.code != 404:
+                    logger.error(f"Supabase API Error claiming raw articles {e.code}: {error_response}")
+                    raise
+                # Migration 008 not applied yet: read without leases, as a single worker
+                logger.warning(f"RPC {CLAIM_RPC} not found, fetching raw articles without claiming them")
+                self.queue = None
         try:
-            supabase_endpoint = f"{self.supabase_url}/rest/v1/{self.raw_table}"
-            headers = {
-                "apikey": self.supabase_key,
-                "Authorization": f"Bearer {self.supabase_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # Build query parameters to get 5 unprocessed rows
-            query_params = {
-                "select": "*",
-                "ai_processed": "eq.false",
-                "limit": "5",
-                "order": "publication_date.desc"
-            }
+            # Filters to get the next unprocessed rows
+            filters = {"ai_processed": "eq.false"}
+            if exclude_ids:
+                # Articles that failed earlier in this run would otherwise come back on every page
+                filters["id"] = f"not.in.({','.join(str(article_id) for article_id in exclude_ids)})"
             
-            url = f"{supabase_endpoint}?{urllib.parse.urlencode(query_params)}"
-            req = urllib.request.Request(url, headers=headers, method="GET")
-            
-            with urllib.request.urlopen(req) as response:
-                articles = json.loads(response.read().decode())
+            articles = self.store.select(self.raw_table, RAW_ARTICLE_COLUMNS, filters,
+                                         order="publication_date.desc", limit=limit)
             
             logger.debug(f"Successfully fetched {len(articles)} unprocessed articles")
             return articles
@@ -78,8 +320,32 @@ class NewsProcessor:
             raise
 
     def process_articles_with_chatgpt(self, articles) -> List[Dict[str, Any]]:
+        """Enrich a batch of raw articles, sending only those missing from the enrichment cache"""
+        if self.enrichment_cache is None:
+            return self.request_enrichment(articles)
+        
+        keys = {article["id"]: self.enrichment_cache.key(article.get("title"), article.get("description"))
+                for article in articles}
+        cached = self.enrichment_cache.get_many(keys.values())
+        hits = [{**cached[keys[article["id"]]], "raw_id": article["id"]}
+                for article in articles if keys[article["id"]] in cached]
+        misses = [article for article in articles if keys[article["id"]] not in cached]
+        if hits:
+            logger.info(f"Enrichment cache: {len(hits)} hits, {len(misses)} articles sent to OpenAI")
+        
+        results = self.request_enrichment(misses) if misses else []
+        # Cache the model's rewrite only; source fields are reattached from the row on every hit
+        self.enrichment_cache.put_many({
+            keys[result["raw_id"]]: {k: v for k, v in result.items() if k != "raw_id" and k not in SOURCE_FIELDS}
+            for result in results
+        })
+        return map_results_to_sources(hits, articles) + results
+
+    def request_enrichment(self, articles) -> List[Dict[str, Any]]:
+        """Enrich a batch of raw articles in one request; each result carries the raw_id of its source row"""
         prompt = """I'm a developer who wants to feed it's news website with fresh newspaper articles from all around the world. I use RSS feed. Please get all that data and try to fit this data JSON model. Here's an example : 
             {
+            "raw_id": 42,
             "title": "Solidarité Congo",
             "subtitle": "Un concert caritatif fait polémique",
             "description": "En France, l'événement caritatif \"Solidarité Congo\" prévu le 7 avril à Paris suscite des tensions. En cause, la date choisie par les organisateurs qui correspond à la Journée de commémoration du génocide des Tutsi",
@@ -101,60 +367,69 @@ class NewsProcessor:
             Try to guess location from title, create a subtitle from title if not exists and content or summary, description or other indices found. When do so, add latitude and longitude coordinates from what you find on the net. If title is in one part, try to slice it with big title in title JSON field, the other part in subtitle. Remove all escapes at the beginning and at the end, remove caracters like : or -
             If you find any article that seems like copyright alert, please remove it. Get me JSON like API result format.
             Once you've done that, add a theme in minimal letters singular english like geopolitic, economy, society, culture, science, health, environment. Then add theme_tags : ia, nuclear fusion, ukraine war, conflict, drugs, medicins, etc. Add multiple tags if needed from 5 to 10. Guess the minimal age the readers should have to read the content and add the language of the title and description.
+            Every article has a "raw_id": copy it unchanged into its result so each result can be matched to its source article.
 
-            And now the JSON I need you to process at least 5 articles with all that steps :"""
+            And now the JSON I need you to process all the articles with all that steps :"""
 
-        url = "https://api.openai.com/v1/chat/completions"
+        url = OPENAI_API_URL
 
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.openai_api_key}"
         }
 
+        # Send the source row id as raw_id so the model does not mistake it for a field to rewrite
+        payload = [
+            {"raw_id": article["id"], **{k: v for k, v in article.items() if k != "id"}}
+            for article in articles
+        ]
+
         data = json.dumps({
-            "model": "gpt-4-turbo",
+            "model": OPENAI_MODEL,
             "messages": [
                 {"role": "system", "content": prompt},
-                {"role": "user", "content": json.dumps(articles)}
+                {"role": "user", "content": json.dumps(payload)}
             ],
             "temperature": 0.7
         }).encode("utf-8")
 
         req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+        # Rate limits count the prompt and the completion we expect back
+        estimated_tokens = (len(prompt) // CHARS_PER_TOKEN
+                            + sum(estimate_article_tokens(article) for article in articles)
+                            + len(articles) * OUTPUT_TOKENS_PER_ARTICLE)
 
         try:
-            with urllib.request.urlopen(req) as response:
-                response_data = json.loads(response.read().decode('utf-8'))  # Convert string to JSON
-
-                if not response_data:
-                    logger.error("OpenAI returned an empty response.")
-                    return []
+            response_data = self.send_openai_request(req, estimated_tokens)
+            if not response_data:
+                logger.error("OpenAI returned an empty response.")
+                return []
 
-                # Extract the content from OpenAI's response
-                chatgpt_content = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
+            # Extract the content from OpenAI's response
+            chatgpt_content = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
 
-                logger.warning(f"ChatGPT content : {chatgpt_content}")
-                if not chatgpt_content:
-                    logger.error("No valid content found in OpenAI response.")
-                    return []
+            logger.warning(f"ChatGPT content : {chatgpt_content}")
+            if not chatgpt_content:
+                logger.error("No valid content found in OpenAI response.")
+                return []
 
-                # Extract JSON from Markdown-style content (if present)
-                extracted_json = extract_json_from_markdown(chatgpt_content)
-                if extracted_json is None:
-                    extracted_json = extract_json_from_string(chatgpt_content)
+            # Extract JSON from Markdown-style content (if present)
+            extracted_json = extract_json_from_markdown(chatgpt_content)
+            if extracted_json is None:
+                extracted_json = extract_json_from_string(chatgpt_content)
 
-                if not extracted_json:
-                    logger.error("No valid JSON found in OpenAI response.")
-                    return []
+            if not extracted_json:
+                logger.error("No valid JSON found in OpenAI response.")
+                return []
 
-                print(f"Extracted JSON: {extracted_json}")
-                logger.debug(f"Extracted JSON: {extracted_json}")
+            print(f"Extracted JSON: {extracted_json}")
+            logger.debug(f"Extracted JSON: {extracted_json}")
 
-                # Ensure extracted_json is a list
-                if isinstance(extracted_json, dict):
-                    extracted_json = [extracted_json]  # Convert single object to list if needed
+            # Ensure extracted_json is a list
+            if isinstance(extracted_json, dict):
+                extracted_json = [extracted_json]  # Convert single object to list if needed
 
-                return extracted_json
+            return map_results_to_sources(extracted_json, articles)
         except urllib.error.HTTPError as e:
             error_response = e.read().decode()
             logger.error(f"OpenAI HTTP Error {e.code}: {error_response}")
@@ -163,6 +438,20 @@ class NewsProcessor:
             logger.error(f"Error processing articles with ChatGPT: {str(e)}")
             raise
 
+    def send_openai_request(self, req: urllib.request.Request, estimated_tokens: int) -> Dict[str, Any]:
+        """Send a completion request through the rate limiter, waiting out 429 and 503 answers"""
+        for attempt in range(1, OPENAI_MAX_ATTEMPTS + 1):
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                with OPENAI_CLIENT.urlopen(req) as response:
+                    self.rate_limiter.update(response.headers)
+                    return json.loads(response.read().decode('utf-8'))  # Convert string to JSON
+            except urllib.error.HTTPError as e:
+                if e.code not in (429, 503) or attempt == OPENAI_MAX_ATTEMPTS:
+                    raise
+                delay = self.rate_limiter.back_off(e.headers)
+                logger.warning(f"OpenAI answered {e.code}, pausing workers for {delay:.1f}s (attempt {attempt})")
+
     def insert_processed_articles(self, processed_articles: List[Dict[str, Any]]) -> None:
         """Insert processed articles into the news_articles table"""
         if not processed_articles:
@@ -170,19 +459,13 @@ class NewsProcessor:
             return
         
         logger.info(f"Inserting {len(processed_articles)} processed articles into {self.processed_table}")
-        supabase_endpoint = f"{self.supabase_url}/rest/v1/{self.processed_table}"
-        headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=minimal"
-        }
         
-        req = urllib.request.Request(supabase_endpoint, data=json.dumps(processed_articles).encode(), headers=headers, method="POST")
+        # raw_id only links a result to its source row, it is not a news_articles column
+        rows = [{k: v for k, v in article.items() if k != "raw_id"} for article in processed_articles]
         try:
-            with urllib.request.urlopen(req) as response:
-                logger.debug(f"Successfully inserted processed articles into {self.processed_table}")
-                return True
+            self.store.insert(self.processed_table, rows)
+            logger.debug(f"Successfully inserted processed articles into {self.processed_table}")
+            return True
         except urllib.error.HTTPError as e:
             error_response = e.read().decode()
             logger.error(f"Supabase API Error {e.code}: {error_response}")
@@ -192,109 +475,251 @@ class NewsProcessor:
             raise
 
     def update_raw_articles(self, article_ids: List[int]) -> None:
-        """Update the original articles to mark them as processed"""
+        """Mark the original articles as processed, with one PATCH per chunk of ids"""
         if not article_ids:
             logger.warning("No article IDs to update")
             return
         
         logger.info(f"Updating {len(article_ids)} articles in {self.raw_table} as processed")
         
-        current_time = datetime.utcnow().isoformat()
+        # Data to update
+        update_data = {
+            "ai_processed": True,
+            "ai_processed_date": datetime.utcnow().isoformat()
+        }
         
-        for article_id in article_ids:
-            supabase_endpoint = f"{self.supabase_url}/rest/v1/{self.raw_table}"
-            headers = {
-                "apikey": self.supabase_key,
-                "Authorization": f"Bearer {self.supabase_key}",
-                "Content-Type": "application/json",
-                "Prefer": "return=minimal"
-            }
-            
-            # Build query parameters to target the specific article
-            query_params = {
-                "id": f"eq.{article_id}"
+        for start in range(0, len(article_ids), UPDATE_CHUNK_SIZE):
+            chunk = article_ids[start:start + UPDATE_CHUNK_SIZE]
+            filters = {
+                "id": f"in.({','.join(str(article_id) for article_id in chunk)})"
             }
             
-            # Data to update
+            try:
+                self.store.update(self.raw_table, filters, update_data)
+                logger.debug(f"Successfully marked {len(chunk)} articles as processed")
+            except urllib.error.HTTPError as e:
+                error_response = e.read().decode()
+                logger.error(f"Supabase API Error updating articles {chunk}: {e.code}: {error_response}")
+                raise
+            except Exception as e:
+                logger.error(f"Error updating articles {chunk}: {str(e)}")
+                raise
+
+    def store_enriched_articles(self, processed_articles: List[Dict[str, Any]], raw_ids: List[int]) -> Optional[int]:
+        """
+        Insert enriched articles and mark their raw rows processed in one transaction,
+        through the insert_enriched_articles RPC. Returns the number of articles inserted,
+        which leaves out those whose raw row another run processed first, or None when
+        the RPC is not available, so the caller falls back to separate insert and update requests.
+        """
+        if not self.use_enrichment_rpc:
+            return None
+        
+        # raw_id stays in: the function only inserts articles whose raw row is still unprocessed
+        try:
+            inserted = self.store.rpc(ENRICHMENT_RPC, {"articles": processed_articles, "raw_ids": raw_ids}) or 0
+            logger.debug(f"{ENRICHMENT_RPC} inserted {inserted} articles and marked {len(raw_ids)} raw articles")
+            return inserted
+        except urllib.error.HTTPError as e:
+            error_response = e.read().decode()
+            if e.code == 404:
+                # Migration 003 not applied yet: keep working with two requests
+                logger.warning(f"RPC {ENRICHMENT_RPC} not found, falling back to insert then update")
+                self.use_enrichment_rpc = False
+                return None
+            logger.error(f"Supabase API Error {e.code}: {error_response}")
+            raise
+
+    def process_batch(self, raw_articles: List[Dict[str, Any]]) -> int:
+        """Enrich, insert and mark one batch of raw articles, returning the number of articles inserted"""
+        # Step 2: Process articles with ChatGPT
+        processed_articles = self.process_articles_with_chatgpt(raw_articles)
+        return self.store_batch(raw_articles, processed_articles)
+
+    def store_batch(self, raw_articles: List[Dict[str, Any]], processed_articles: List[Dict[str, Any]]) -> int:
+        """Insert the enriched articles of a batch and mark its raw articles, returning the number inserted"""
+        if not processed_articles:
+            logger.warning("No articles were successfully processed")
+            return 0
+        
+        article_ids = [article['id'] for article in raw_articles]
+        
+        # Steps 3 and 4 in one transaction when the database has the RPC
+        inserted = self.store_enriched_articles(processed_articles, article_ids)
+        if inserted is not None:
+            if inserted < len(processed_articles):
+                logger.info(f"{len(processed_articles) - inserted} articles were already stored by another run")
+            logger.info(f"Successfully processed and updated {inserted} articles")
+            return inserted
+        
+        # Step 3: Insert processed articles into news_articles table
+        insert_success = self.insert_processed_articles(processed_articles)
+        
+        if not insert_success:
+            logger.warning("Failed to insert processed articles, skipping update of raw articles")
+            return 0
+        
+        # Step 4: Update original articles as processed
+        self.update_raw_articles(article_ids)
+        
+        logger.info(f"Successfully processed and updated {len(processed_articles)} articles")
+        return len(processed_articles)
+
+    def deduplicate(self, raw_articles: List[Dict[str, Any]]):
+        """
+        Split raw articles into canonical articles and their near-duplicates.
+        Returns (canonical articles, {canonical id: [duplicate ids]}).
+        """
+        if not self.dedup_threshold:
+            return raw_articles, {}
+        
+        clusters = cluster_stories(raw_articles, self.dedup_threshold)
+        canonical_articles = [cluster[0] for cluster in clusters]
+        duplicates = {cluster[0]['id']: [article['id'] for article in cluster[1:]]
+                      for cluster in clusters if len(cluster) > 1}
+        if duplicates:
+            logger.info(f"Clustered {len(raw_articles)} raw articles into {len(clusters)} stories")
+        return canonical_articles, duplicates
+
+    def link_duplicates(self, duplicates: Dict[int, List[int]]) -> List[int]:
+        """Point near-duplicates at their canonical article and mark them processed, returning the ids left unlinked"""
+        current_time = datetime.utcnow().isoformat()
+        
+        unlinked = []
+        for canonical_id, duplicate_ids in duplicates.items():
             update_data = {
+                "canonical_raw_id": canonical_id,
                 "ai_processed": True,
                 "ai_processed_date": current_time
             }
-            
-            url = f"{supabase_endpoint}?{urllib.parse.urlencode(query_params)}"
-            req = urllib.request.Request(
-                url, 
-                data=json.dumps(update_data).encode(), 
-                headers=headers, 
-                method="PATCH"
-            )
-            
+            filters = {"id": f"in.({','.join(str(article_id) for article_id in duplicate_ids)})"}
             try:
-                with urllib.request.urlopen(req) as response:
-                    logger.debug(f"Successfully updated article ID {article_id} as processed")
+                self.store.update(self.raw_table, filters, update_data)
+                logger.debug(f"Linked {len(duplicate_ids)} duplicates to raw article {canonical_id}")
             except urllib.error.HTTPError as e:
+                # The canonical article is stored; its duplicates are simply enriched on a later run
                 error_response = e.read().decode()
-                logger.error(f"Supabase API Error updating article {article_id}: {e.code}: {error_response}")
-                raise
+                logger.error(f"Supabase API Error linking duplicates of {canonical_id}: {e.code}: {error_response}")
+                unlinked.extend(duplicate_ids)
             except Exception as e:
-                logger.error(f"Error updating article {article_id}: {str(e)}")
-                raise
+                logger.error(f"Error linking duplicates of {canonical_id}: {str(e)}")
+                unlinked.extend(duplicate_ids)
+        return unlinked
+
+    def process(self, deadline: float = None) -> int:
+        """
+        Main processing method to fetch news, process them, and update databases.
 
-    def process(self) -> None:
-        """Main processing method to fetch news, process them, and update databases"""
+        Near-duplicate stories in a page are collapsed to their canonical
+        article, and the canonical articles are packed into batches that run on a pool of
+        workers, so several OpenAI requests are in flight while the main thread
+        stores the batches that already came back. Pages are fetched until no
+        unprocessed article is left, max_articles is reached, or the monotonic
+        deadline is near. Returns the number of articles inserted.
+        """
+        processed_count = 0
+        attempted = 0
+        failed_ids = []
+        last_error = None
         try:
-            # Step 1: Fetch unprocessed news articles
-            raw_articles = self.fetch_unprocessed_news()
-            
-            if not raw_articles:
-                logger.info("No unprocessed articles found")
-                return
-            
-            # Step 2: Process articles with ChatGPT
-            processed_articles = self.process_articles_with_chatgpt(raw_articles)
-            
-            if processed_articles:
-                # Step 3: Insert processed articles into news_articles table
-                insert_success = self.insert_processed_articles(processed_articles)
-                
-                if insert_success:
-                    # Step 4: Update original articles as processed
-                    article_ids = [article['id'] for article in raw_articles]
-                    self.update_raw_articles(article_ids)
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+                while attempted < self.max_articles:
+                    if deadline is not None and time.monotonic() > deadline - DEADLINE_MARGIN_SECONDS:
+                        logger.info("Stopping before the invocation deadline")
+                        break
+                    
+                    # Step 1: Fetch unprocessed news articles, claiming no more than this run will process
+                    page_limit = min(self.fetch_limit, self.max_articles - attempted)
+                    raw_articles = self.fetch_unprocessed_news(exclude_ids=failed_ids, limit=page_limit)
+                    if not raw_articles:
+                        logger.info("No unprocessed articles found")
+                        break
+                    attempted += len(raw_articles)
                     
-                    logger.info(f"Successfully processed and updated {len(processed_articles)} articles")
-                else:
-                    logger.warning("Failed to insert processed articles, skipping update of raw articles")
-            else:
-                logger.warning("No articles were successfully processed")
+                    # Only the canonical article of each near-duplicate cluster goes to OpenAI
+                    canonical_articles, duplicates = self.deduplicate(raw_articles)
+                    
+                    batches = pack_articles(canonical_articles, self.token_budget)
+                    logger.info(f"Packed {len(canonical_articles)} articles into {len(batches)} OpenAI requests")
+                    
+                    futures = {executor.submit(self.process_articles_with_chatgpt, batch): batch for batch in batches}
+                    for future in as_completed(futures):
+                        batch = futures[future]
+                        batch_duplicates = {article['id']: duplicates[article['id']]
+                                            for article in batch if article['id'] in duplicates}
+                        batch_ids = [article['id'] for article in batch]
+                        batch_ids += [dup_id for dup_ids in batch_duplicates.values() for dup_id in dup_ids]
+                        try:
+                            stored = self.store_batch(batch, future.result())
+                        except Exception as e:
+                            # Keep going: the articles of a failed batch stay unprocessed for the next run
+                            logger.error(f"Error processing batch of {len(batch)} articles: {str(e)}")
+                            last_error = e
+                            stored = 0
+                        if not stored:
+                            failed_ids.extend(batch_ids)
+                            if self.queue is not None:
+                                self.queue.release(batch_ids)
+                            continue
+                        processed_count += stored
+                        failed_ids.extend(self.link_duplicates(batch_duplicates))
+                    
+                    if len(raw_articles) < page_limit:
+                        break  # That was the last page
+            
+            logger.info(f"Processed {processed_count} articles from {attempted} raw articles")
+            if last_error is not None and processed_count == 0:
+                raise last_error
+            return processed_count
         except Exception as e:
             logger.error(f"Error in main processing flow: {str(e)}")
             raise
 
-
 def lambda_handler(event, context):
     """AWS Lambda handler function"""
     try:
         supabase_url = os.environ.get('SUPABASE_URL')
         supabase_key = os.environ.get('SUPABASE_KEY')
+        # STORAGE_BACKEND=sqlite runs against a local database (storage.py), without Supabase
+        storage_backend = os.environ.get('STORAGE_BACKEND', 'supabase').lower()
         raw_table = os.environ.get('SUPABASE_RAW_TABLE', 'news_articles_raw')
         processed_table = os.environ.get('SUPABASE_PROCESSED_TABLE', 'news_articles')
         openai_api_key = os.environ.get('OPENAI_API_KEY')
+        fetch_limit = int(os.environ.get('AI_FETCH_LIMIT', DEFAULT_FETCH_LIMIT))
+        token_budget = int(os.environ.get('AI_BATCH_TOKEN_BUDGET', DEFAULT_BATCH_TOKEN_BUDGET))
+        workers = int(event.get('workers') or os.environ.get('AI_WORKERS', DEFAULT_WORKERS))
+        max_articles = int(event.get('max_articles') or os.environ.get('AI_MAX_ARTICLES_PER_RUN', DEFAULT_MAX_ARTICLES_PER_RUN))
+        dedup_threshold = float(os.environ.get('AI_DEDUP_THRESHOLD', DEFAULT_SIMILARITY_THRESHOLD))
+        rate_limiter = RateLimiter(
+            int(os.environ.get('AI_REQUESTS_PER_MINUTE', DEFAULT_REQUESTS_PER_MINUTE)),
+            int(os.environ.get('AI_TOKENS_PER_MINUTE', DEFAULT_TOKENS_PER_MINUTE))
+        )
         
-        if not all([supabase_url, supabase_key, openai_api_key]):
-            missing = [k for k, v in {
-                'supabase_url': supabase_url,
-                'supabase_key': supabase_key,
-                'openai_api_key': openai_api_key
-            }.items() if not v]
+        required = {
+            'supabase_url': supabase_url or storage_backend != 'supabase',
+            'supabase_key': supabase_key or storage_backend != 'supabase',
+            'openai_api_key': openai_api_key
+        }
+        if not all(required.values()):
+            missing = [k for k, v in required.items() if not v]
             return {'statusCode': 400, 'body': json.dumps({'status': 'error', 'message': f'Missing required parameters: {", ".join(missing)}'})}
         
-        logger.info("Starting news processing from Supabase")
+        logger.info(f"Starting news processing from {storage_backend}")
 
-        processor = NewsProcessor(openai_api_key, supabase_url, supabase_key, raw_table, processed_table)
-        processor.process()
+        store = open_store(supabase_url, supabase_key, storage_backend)
+        # The enrichment cache falls back to its own local file without Supabase
+        cache_url, cache_key = (supabase_url, supabase_key) if isinstance(store, SupabaseStore) else (None, None)
+        processor = NewsProcessor(openai_api_key, supabase_url, supabase_key, raw_table, processed_table,
+                                  fetch_limit=fetch_limit, token_budget=token_budget,
+                                  workers=workers, max_articles=max_articles, rate_limiter=rate_limiter,
+                                  enrichment_cache=shared_cache(PROMPT_VERSION, OPENAI_MODEL, cache_url, cache_key),
+                                  dedup_threshold=dedup_threshold, store=store)
+        deadline = None
+        if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+            deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000
+        processed_count = processor.process(deadline=deadline)
         
-        return {'statusCode': 200, 'body': json.dumps({'status': 'success', 'message': 'News articles processed successfully'})}
+        return {'statusCode': 200, 'body': json.dumps({'status': 'success', 'message': f'{processed_count} news articles processed successfully'})}
     except Exception as e:
         logger.error(f"Lambda execution error: {str(e)}")
         return {'statusCode': 500, 'body': json.dumps({'status': 'error', 'message': str(e)})}
@@ -302,19 +727,38 @@ def lambda_handler(event, context):
 def main():
     """Main entry point function to process unprocessed news articles"""
     parser = argparse.ArgumentParser(description='Process news articles from Supabase')
-    parser.add_argument('--supabase-url', required=True, help='Supabase project URL')
-    parser.add_argument('--supabase-key', required=True, help='Supabase API key')
+    parser.add_argument('--supabase-url', help='Supabase project URL')
+    parser.add_argument('--supabase-key', help='Supabase API key')
+    parser.add_argument('--storage', choices=['supabase', 'sqlite'], default=os.environ.get('STORAGE_BACKEND', 'supabase'),
+                        help='Where the articles are stored')
+    parser.add_argument('--sqlite-path', help='Local database of the sqlite storage')
     parser.add_argument('--raw-table', default='news_articles_raw', help='Supabase raw articles table name')
     parser.add_argument('--processed-table', default='news_articles', help='Supabase processed articles table name')
     parser.add_argument('--openai-api-key', required=True, help='OpenAI API key')
+    parser.add_argument('--fetch-limit', type=int, default=DEFAULT_FETCH_LIMIT, help='Raw articles loaded per run')
+    parser.add_argument('--token-budget', type=int, default=DEFAULT_BATCH_TOKEN_BUDGET, help='Article tokens per OpenAI request')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='OpenAI requests in flight at once')
+    parser.add_argument('--max-articles', type=int, default=DEFAULT_MAX_ARTICLES_PER_RUN, help='Raw articles processed per run')
+    parser.add_argument('--dedup-threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                        help='Similarity above which raw articles count as the same story (0 disables)')
     
     args = parser.parse_args()
+    if args.storage == 'supabase' and not (args.supabase_url and args.supabase_key):
+        parser.error('--supabase-url and --supabase-key are required with the supabase storage')
+    store = open_store(args.supabase_url, args.supabase_key, args.storage, args.sqlite_path)
     processor = NewsProcessor(
         args.openai_api_key,
         args.supabase_url, 
         args.supabase_key, 
         args.raw_table,
-        args.processed_table
+        args.processed_table,
+        fetch_limit=args.fetch_limit,
+        token_budget=args.token_budget,
+        workers=args.workers,
+        max_articles=args.max_articles,
+        enrichment_cache=shared_cache(PROMPT_VERSION, OPENAI_MODEL, args.supabase_url, args.supabase_key),
+        dedup_threshold=args.dedup_threshold,
+        store=store
     )
     processor.process()
     
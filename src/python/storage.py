@@ -0,0 +1,478 @@
+"""
+Storage backends of the pipeline scripts.
+
+The scripts talk to their tables through a Store instead of building
+PostgREST URLs themselves:
+  - SupabaseStore sends the requests the scripts always sent (/rest/v1/...),
+  - SQLiteStore keeps the same tables in a local SQLite file, created from
+    SQLITE_SCHEMA, a copy of sql/create_tables.sql without partitioning,
+    foreign keys or server-side functions.
+
+Both take PostgREST-style filters ({"ai_processed": "eq.false", "id": "in.(1,2)"})
+and orders ("publication_date.desc"), so the calling code is the same for
+either. The database functions the scripts call (claim_raw_articles,
+insert_enriched_articles) are reimplemented by SQLiteStore.
+
+The local store lets the ingestion and enrichment paths run, be profiled and be
+bulk loaded without Supabase or any HTTP. open_store picks the backend from
+STORAGE_BACKEND ("supabase", the default, or "sqlite") and STORAGE_SQLITE_PATH.
+
+Deploy this file next to the Lambda scripts that import it.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+
+logger = logging.getLogger("storage")
+
+DEFAULT_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase")
+DEFAULT_SQLITE_PATH = os.environ.get("STORAGE_SQLITE_PATH", "/tmp/globnuz.sqlite3")  # /tmp is writable on Lambda
+
+# sql/create_tables.sql for SQLite: arrays are JSON columns, booleans 0/1, timestamps ISO 8601 text
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS newspapers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    country_id TEXT NOT NULL,
+    image_url TEXT,
+    description TEXT NOT NULL,
+    rss_feed_url TEXT,
+    rss_etag TEXT,
+    rss_last_modified TEXT,
+    rss_content_hash TEXT,
+    rss_high_water_date TIMESTAMP,
+    rss_recent_link_hashes JSON,
+    integration_date TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS news_articles_raw (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    description TEXT NOT NULL,
+    newspaper_id INTEGER NOT NULL,
+    image TEXT,
+    external_link TEXT NOT NULL,
+    publication_date TIMESTAMP NOT NULL,
+    ai_processed BOOLEAN DEFAULT 0,
+    ai_processed_date TIMESTAMP,
+    canonical_raw_id INTEGER,
+    ai_claimed_at TIMESTAMP,
+    ai_claimed_by TEXT,
+    UNIQUE (external_link, publication_date)
+);
+CREATE INDEX IF NOT EXISTS idx_news_articles_raw_unprocessed ON news_articles_raw(publication_date DESC) WHERE NOT ai_processed;
+
+-- One row per raw link whatever its publication date (sql/migrations/013)
+CREATE TABLE IF NOT EXISTS raw_links (
+    external_link TEXT PRIMARY KEY,
+    raw_id INTEGER NOT NULL,
+    publication_date TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TRIGGER IF NOT EXISTS news_articles_raw_link_skip BEFORE INSERT ON news_articles_raw
+WHEN EXISTS (SELECT 1 FROM raw_links WHERE external_link = NEW.external_link)
+BEGIN
+    SELECT RAISE(IGNORE);
+END;
+CREATE TRIGGER IF NOT EXISTS news_articles_raw_link_record AFTER INSERT ON news_articles_raw
+BEGIN
+    INSERT INTO raw_links (external_link, raw_id, publication_date) VALUES (NEW.external_link, NEW.id, NEW.publication_date);
+END;
+
+CREATE TABLE IF NOT EXISTS news_articles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    description TEXT NOT NULL,
+    author TEXT,
+    newspaper_id INTEGER NOT NULL,
+    theme TEXT NOT NULL,
+    theme_tags JSON,
+    image TEXT,
+    external_link TEXT NOT NULL,
+    publication_date TIMESTAMP NOT NULL,
+    country_id TEXT NOT NULL,
+    location TEXT,
+    language TEXT NOT NULL,
+    minimal_age INTEGER,
+    latitude REAL,
+    longitude REAL,
+    translated BOOLEAN DEFAULT 0,
+    translated_date TIMESTAMP,
+    translation_claimed_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_news_articles_date ON news_articles(publication_date);
+CREATE INDEX IF NOT EXISTS idx_news_articles_untranslated ON news_articles(id) WHERE NOT translated;
+
+CREATE TABLE IF NOT EXISTS news_articles_translated (
+    id INTEGER PRIMARY KEY,
+    original_article_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT,
+    description TEXT NOT NULL,
+    location TEXT,
+    language_translated TEXT NOT NULL,
+    publication_date TIMESTAMP NOT NULL,
+    UNIQUE (original_article_id, language_translated, publication_date)
+);
+
+CREATE TABLE IF NOT EXISTS translation_memory (
+    text_hash TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    translated_text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (text_hash, target_lang)
+);
+
+CREATE TABLE IF NOT EXISTS theme_tags (
+    id INTEGER PRIMARY KEY,
+    article_id INTEGER NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_theme_tags_tag_article ON theme_tags(tag, article_id);
+"""
+
+# Columns insert_enriched_articles copies from an enriched article (sql/migrations/003)
+ENRICHED_ARTICLE_COLUMNS = ["title", "subtitle", "description", "author", "newspaper_id", "theme", "theme_tags",
+                            "image", "external_link", "publication_date", "country_id", "location", "language",
+                            "minimal_age", "latitude", "longitude"]
+
+FILTER_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class Store:
+    """
+    Tables of the pipeline, whatever holds them. Every method takes a table name and
+    PostgREST-style filters; errors are those of the backend (urllib.error.HTTPError
+    for Supabase, sqlite3.Error for SQLite).
+    """
+    location = None  # Identifies the database, for caches keyed by database and table
+
+    def select(self, table: str, columns: List[str], filters: Optional[Dict[str, str]] = None,
+               order: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def insert(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False, returning: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Insert rows, missing keys taking the column default. With on_conflict, rows
+        clashing on that key update the stored row, or are dropped with ignore_duplicates.
+        Returns the given columns of the rows actually written.
+        """
+        raise NotImplementedError
+
+    def update(self, table: str, filters: Dict[str, str], data: Dict[str, Any],
+               returning: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Update the matching rows, returning the given columns of the rows updated"""
+        raise NotImplementedError
+
+    def rpc(self, name: str, payload: Dict[str, Any], columns: Optional[List[str]] = None) -> Any:
+        """Call a database function of the schema"""
+        raise NotImplementedError
+
+    def table_columns(self, table: str) -> Optional[List[str]]:
+        """Columns of a table, or None when the backend can't tell"""
+        raise NotImplementedError
+
+
+class SupabaseStore(Store):
+    """Tables behind the PostgREST API of a Supabase project"""
+
+    def __init__(self, supabase_url: str, supabase_key: str):
+        self.supabase_url = supabase_url
+        self.supabase_key = supabase_key
+        self.location = supabase_url
+        self.headers = {
+            "apikey": supabase_key,
+            "Authorization": f"Bearer {supabase_key}",
+            "Content-Type": "application/json"
+        }
+
+    def request(self, path: str, query_params: Optional[Dict[str, Any]] = None, method: str = "GET",
+                payload: Any = None, prefer: Optional[str] = None) -> Any:
+        url = f"{self.supabase_url}/rest/v1/{path}"
+        if query_params:
+            url = f"{url}?{urllib.parse.urlencode(query_params)}"
+        headers = {**self.headers, "Prefer": prefer} if prefer else self.headers
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(url, data=data, headers=headers, method=method)
+        with http_client.urlopen(req) as response:
+            body = response.read().decode()
+        return json.loads(body) if body else None
+
+    def select(self, table, columns, filters=None, order=None, limit=None):
+        query_params = {"select": ",".join(columns), **(filters or {})}
+        if order:
+            query_params["order"] = order
+        if limit:
+            query_params["limit"] = str(limit)
+        return self.request(table, query_params)
+
+    def insert(self, table, rows, on_conflict=None, ignore_duplicates=False, returning=None):
+        # PostgREST needs the same keys on every object of a bulk insert; columns=
+        # lists them and missing=default fills the gaps with the column default
+        query_params = {"columns": ",".join(dict.fromkeys(key for row in rows for key in row))}
+        if on_conflict:
+            query_params["on_conflict"] = on_conflict
+        if returning:
+            query_params["select"] = ",".join(returning)
+        prefer = [f"resolution={'ignore' if ignore_duplicates else 'merge'}-duplicates"] if on_conflict else []
+        prefer += ["return=representation" if returning else "return=minimal", "missing=default"]
+        return self.request(table, query_params, "POST", rows, ",".join(prefer)) or []
+
+    def update(self, table, filters, data, returning=None):
+        if returning:
+            query_params = {**filters, "select": ",".join(returning)}
+            return self.request(table, query_params, "PATCH", data, "return=representation") or []
+        self.request(table, filters, "PATCH", data, "return=minimal")
+        return []
+
+    def rpc(self, name, payload, columns=None):
+        query_params = {"select": ",".join(columns)} if columns else None
+        return self.request(f"rpc/{name}", query_params, "POST", payload)
+
+    def table_columns(self, table):
+        # The OpenAPI document lists the columns of every table; depends on the Supabase configuration
+        schema_data = self.request("", {"table": table})
+        if isinstance(schema_data, dict) and "definitions" in schema_data:
+            return list(schema_data["definitions"].get(table, {}).get("properties", {}).keys())
+        return None
+
+
+class SQLiteStore(Store):
+    """Tables in a local SQLite file, for offline runs, profiling and bulk loads; thread-safe"""
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        self.path = path
+        self.location = f"sqlite:{path}"
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SQLITE_SCHEMA)
+        self.column_types = {}  # table -> {column: declared type}
+
+    def _types(self, table: str) -> Dict[str, str]:
+        if table not in self.column_types:
+            if not IDENTIFIER_RE.match(table):
+                raise ValueError(f"Invalid table name: {table}")
+            rows = self.db.execute(f"PRAGMA table_info({table})").fetchall()
+            if not rows:
+                raise sqlite3.OperationalError(f"no such table: {table}")
+            self.column_types[table] = {row["name"]: row["type"].upper() for row in rows}
+        return self.column_types[table]
+
+    def _columns(self, table: str, columns) -> List[str]:
+        types = self._types(table)
+        columns = list(types) if list(columns) == ["*"] else list(columns)
+        unknown = [column for column in columns if column not in types]
+        if unknown:
+            raise sqlite3.OperationalError(f"table {table} has no column named {unknown[0]}")
+        return columns
+
+    @staticmethod
+    def _to_sql(value: Any) -> Any:
+        if isinstance(value, (list, dict, set, tuple)):
+            return json.dumps(list(value) if isinstance(value, (set, tuple)) else value)
+        if isinstance(value, bool):
+            return int(value)
+        return value
+
+    def _from_sql(self, table: str, row: sqlite3.Row) -> Dict[str, Any]:
+        types = self._types(table)
+        result = {}
+        for column in row.keys():
+            value = row[column]
+            if value is not None:
+                if types.get(column) == "JSON":
+                    value = json.loads(value)
+                elif types.get(column) == "BOOLEAN":
+                    value = bool(value)
+            result[column] = value
+        return result
+
+    @staticmethod
+    def _literal(value: str) -> Any:
+        """A PostgREST filter value as an SQL parameter"""
+        if value in ("true", "false"):
+            return int(value == "true")
+        return value
+
+    def _where(self, table: str, filters: Optional[Dict[str, str]]):
+        """Translate PostgREST filters (eq, neq, gt, gte, lt, lte, is, in, each optionally negated, and or)"""
+        clauses = []
+        params = []
+        for column, condition in (filters or {}).items():
+            if column == "or":
+                # or=(column.operator.value,...), values without commas or parentheses
+                alternatives = [self._where(table, dict([term.split(".", 1)]))
+                                for term in condition.strip("()").split(",")]
+                clauses.append(f"({' OR '.join(clause[7:] for clause, _ in alternatives)})")
+                params.extend(param for _, alternative_params in alternatives for param in alternative_params)
+                continue
+            self._columns(table, [column])
+            negate = condition.startswith("not.")
+            if negate:
+                condition = condition[4:]
+            operator, _, value = condition.partition(".")
+            if operator == "is":
+                clause = f"{column} IS {'NULL' if value == 'null' else int(value == 'true')}"
+            elif operator == "in":
+                values = [self._literal(item.strip().strip('"')) for item in value.strip("()").split(",") if item.strip()]
+                clause = f"{column} IN ({','.join('?' * len(values))})"
+                params.extend(values)
+            elif operator in FILTER_OPERATORS:
+                clause = f"{column} {FILTER_OPERATORS[operator]} ?"
+                params.append(self._literal(value))
+            else:
+                raise ValueError(f"Unsupported filter {column}={condition}")
+            clauses.append(f"NOT ({clause})" if negate else clause)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def _order(self, table: str, order: Optional[str]) -> str:
+        if not order:
+            return ""
+        terms = []
+        for term in order.split(","):
+            column, _, direction = term.partition(".")
+            self._columns(table, [column])
+            terms.append(f"{column} {'DESC' if direction.startswith('desc') else 'ASC'}")
+        return f" ORDER BY {', '.join(terms)}"
+
+    def select(self, table, columns, filters=None, order=None, limit=None):
+        with self.lock:
+            columns = self._columns(table, columns)
+            where, params = self._where(table, filters)
+            sql = f"SELECT {', '.join(columns)} FROM {table}{where}{self._order(table, order)}"
+            if limit:
+                sql += f" LIMIT {int(limit)}"
+            return [self._from_sql(table, row) for row in self.db.execute(sql, params)]
+
+    def insert(self, table, rows, on_conflict=None, ignore_duplicates=False, returning=None):
+        if not rows:
+            return []
+        with self.lock, self.db:
+            returning = self._columns(table, returning) if returning else None
+            inserted = []
+            # Rows with the same keys share one statement, so a bulk load is one executemany per shape
+            for columns, shaped_rows in self._group_by_columns(table, rows).items():
+                sql = self._insert_sql(table, columns, on_conflict, ignore_duplicates)
+                values = [[self._to_sql(row[column]) for column in columns] for row in shaped_rows]
+                if not returning:
+                    self.db.executemany(sql, values)
+                    continue
+                sql += f" RETURNING {', '.join(returning)}"
+                for row_values in values:
+                    inserted.extend(self._from_sql(table, row) for row in self.db.execute(sql, row_values))
+            return inserted
+
+    def _group_by_columns(self, table: str, rows: List[Dict[str, Any]]) -> Dict[tuple, List[Dict[str, Any]]]:
+        groups = {}
+        for row in rows:
+            columns = tuple(column for column, value in row.items() if value is not None)
+            groups.setdefault(tuple(self._columns(table, columns)), []).append(row)
+        return groups
+
+    def _insert_sql(self, table: str, columns: tuple, on_conflict: Optional[str], ignore_duplicates: bool) -> str:
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        if ignore_duplicates:
+            # Any unique key, not only on_conflict: the raw table's key differs from Postgres' once partitioned
+            return sql.replace("INSERT INTO", "INSERT OR IGNORE INTO", 1)
+        if on_conflict:
+            conflict_columns = self._columns(table, on_conflict.split(","))
+            updates = [f"{column} = excluded.{column}" for column in columns if column not in conflict_columns]
+            sql += f" ON CONFLICT ({', '.join(conflict_columns)}) DO "
+            sql += f"UPDATE SET {', '.join(updates)}" if updates else "NOTHING"
+        return sql
+
+    def update(self, table, filters, data, returning=None):
+        with self.lock, self.db:
+            columns = self._columns(table, data)
+            where, params = self._where(table, filters)
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            sql = f"UPDATE {table} SET {assignments}{where}"
+            if returning:
+                sql += f" RETURNING {', '.join(self._columns(table, returning))}"
+            cursor = self.db.execute(sql, [self._to_sql(data[column]) for column in columns] + params)
+            return [self._from_sql(table, row) for row in cursor] if returning else []
+
+    def rpc(self, name, payload, columns=None):
+        function = getattr(self, f"rpc_{name}", None)
+        if function is None:
+            raise NotImplementedError(f"Database function {name} has no SQLite implementation")
+        with self.lock, self.db:
+            result = function(**payload)
+        if columns and isinstance(result, list):
+            result = [{column: row.get(column) for column in columns} for row in result]
+        return result
+
+    def rpc_claim_raw_articles(self, batch_size: int, worker: str, lease_seconds: int = 900,
+                               exclude_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """claim_raw_articles of sql/create_tables.sql; the connection lock stands in for SKIP LOCKED"""
+        now = datetime.now(timezone.utc)
+        expired = (now - timedelta(seconds=lease_seconds)).isoformat()
+        exclude_ids = list(exclude_ids or [])
+        rows = self.db.execute(
+            f"SELECT id FROM news_articles_raw WHERE NOT ai_processed "
+            f"AND (ai_claimed_at IS NULL OR ai_claimed_at < ?) "
+            f"AND id NOT IN ({','.join('?' * len(exclude_ids))}) "
+            f"ORDER BY publication_date DESC LIMIT ?",
+            [expired, *exclude_ids, batch_size]
+        ).fetchall()
+        ids = [row["id"] for row in rows]
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        self.db.execute(f"UPDATE news_articles_raw SET ai_claimed_at = ?, ai_claimed_by = ? WHERE id IN ({placeholders})",
+                        [now.isoformat(), worker, *ids])
+        claimed = self.db.execute(f"SELECT * FROM news_articles_raw WHERE id IN ({placeholders}) "
+                                  f"ORDER BY publication_date DESC", ids)
+        return [self._from_sql("news_articles_raw", row) for row in claimed]
+
+    def rpc_insert_enriched_articles(self, articles: List[Dict[str, Any]], raw_ids: List[int]) -> int:
+        """insert_enriched_articles of sql/migrations/014: only articles whose raw row is still unprocessed"""
+        placeholders = ",".join("?" * len(raw_ids))
+        pending = {row["id"] for row in self.db.execute(
+            f"SELECT id FROM news_articles_raw WHERE id IN ({placeholders}) AND NOT ai_processed", raw_ids)}
+        if not pending:
+            return 0
+        articles = [article for article in articles if article.get("raw_id") is None or article["raw_id"] in pending]
+        self.db.executemany(
+            f"INSERT INTO news_articles ({', '.join(ENRICHED_ARTICLE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(ENRICHED_ARTICLE_COLUMNS))})",
+            [[self._to_sql(article.get(column)) for column in ENRICHED_ARTICLE_COLUMNS] for article in articles]
+        )
+        self.db.execute(f"UPDATE news_articles_raw SET ai_processed = 1, ai_processed_date = ? "
+                        f"WHERE id IN ({','.join('?' * len(pending))})",
+                        [datetime.now(timezone.utc).isoformat(), *pending])
+        return len(articles)
+
+    def table_columns(self, table):
+        with self.lock:
+            return list(self._types(table))
+
+
+def open_store(supabase_url: Optional[str] = None, supabase_key: Optional[str] = None,
+               backend: Optional[str] = None, sqlite_path: Optional[str] = None) -> Store:
+    """The store a script should use: backend defaults to STORAGE_BACKEND, sqlite_path to STORAGE_SQLITE_PATH"""
+    backend = (backend or DEFAULT_BACKEND).lower()
+    if backend == "sqlite":
+        path = sqlite_path or DEFAULT_SQLITE_PATH
+        logger.info(f"Using the local SQLite store {path}")
+        return SQLiteStore(path)
+    if backend != "supabase":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    if not (supabase_url and supabase_key):
+        raise ValueError("The supabase storage backend needs SUPABASE_URL and SUPABASE_KEY")
+    return SupabaseStore(supabase_url, supabase_key)
@@ -0,0 +1,113 @@
+"""
+Near-duplicate story clustering for raw articles.
+
+Wire stories (Reuters, AP, AFP...) reach news_articles_raw through several
+newspapers' feeds with slightly different titles and descriptions. Before
+enrichment, articles are grouped by the similarity of their word shingles:
+each article gets a one-permutation MinHash signature (a single 64-bit hash
+per shingle, spread over bins), and an LSH index over signature bands proposes
+candidate pairs. The signature overestimates the similarity of short texts, so
+a candidate pair is only merged into one cluster once the exact Jaccard
+similarity of its shingle sets reaches the threshold.
+
+Only the canonical article of a cluster is sent to OpenAI; the others are
+linked to it through news_articles_raw.canonical_raw_id (sql/migrations/005).
+
+Deploy this file next to the Lambda scripts that import it.
+"""
+import hashlib
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from enrichment_cache import normalize_text  # Same normalization as the cache keys
+
+SIGNATURE_BINS = 64
+LSH_BANDS = 32  # 32 bands of 2 bins: pairs above ~0.4 similarity almost always share a band
+SHINGLE_SIZE = 3  # Words per shingle
+# Exact Jaccard of the shingle sets: a copy keeping a ~25-word description under a rewritten
+# ~9-word title scores ~0.65, two different headlines over unrelated descriptions near 0
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+
+_BIN_BITS = SIGNATURE_BINS.bit_length() - 1
+_EMPTY_BIN = 1 << 64
+
+
+def shingles(article: Dict[str, Any]) -> set:
+    """64-bit hashes of the word shingles of the article's title and description"""
+    words = normalize_text(f"{article.get('title') or ''} {article.get('description') or ''}").split()
+    texts = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))]
+    return {
+        int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+        for text in texts if text
+    }
+
+
+def minhash(shingle_hashes: set) -> tuple:
+    """
+    One-permutation MinHash signature of a set of shingle hashes: the low bits
+    of a hash pick a bin, the bin keeps its minimum. Empty bins borrow the next
+    filled bin's value (offset by the distance), so short texts stay comparable.
+    """
+    signature = [_EMPTY_BIN] * SIGNATURE_BINS
+    for value in shingle_hashes:
+        slot = value & (SIGNATURE_BINS - 1)
+        value >>= _BIN_BITS
+        if value < signature[slot]:
+            signature[slot] = value
+    if _EMPTY_BIN in signature:
+        for slot in range(SIGNATURE_BINS):
+            if signature[slot] == _EMPTY_BIN:
+                distance = next(d for d in range(1, SIGNATURE_BINS)
+                                if signature[(slot + d) % SIGNATURE_BINS] < _EMPTY_BIN)
+                signature[slot] = _EMPTY_BIN + distance * _EMPTY_BIN + signature[(slot + distance) % SIGNATURE_BINS]
+    return tuple(signature)
+
+
+def jaccard_similarity(shingle_hashes: set, other: set) -> float:
+    """Exact Jaccard similarity of two shingle sets"""
+    shared = len(shingle_hashes & other)
+    return shared / (len(shingle_hashes) + len(other) - shared)
+
+
+def cluster_stories(articles: List[Dict[str, Any]],
+                    threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[List[Dict[str, Any]]]:
+    """
+    Group near-duplicate articles. Every cluster is a list whose first element
+    is the canonical article, the one with the lowest id; articles without
+    text, or without a near-duplicate, form clusters of their own.
+    """
+    rows = SIGNATURE_BINS // LSH_BANDS
+    article_shingles: List[set] = []
+    buckets = defaultdict(list)
+    for index, article in enumerate(articles):
+        article_shingles.append(shingles(article))
+        if not article_shingles[index]:
+            continue
+        signature = minhash(article_shingles[index])
+        for band in range(LSH_BANDS):
+            buckets[(band, signature[band * rows:(band + 1) * rows])].append(index)
+
+    parent = list(range(len(articles)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    checked = set()
+    for members in buckets.values():
+        for position, first in enumerate(members):
+            for second in members[position + 1:]:
+                if (first, second) in checked:
+                    continue
+                checked.add((first, second))
+                # LSH only proposes the pair; the shingle sets decide
+                if find(first) != find(second) and \
+                        jaccard_similarity(article_shingles[first], article_shingles[second]) >= threshold:
+                    parent[find(second)] = find(first)
+
+    clusters = defaultdict(list)
+    for index, article in enumerate(articles):
+        clusters[find(index)].append(article)
+    return [sorted(cluster, key=lambda article: article["id"]) for cluster in clusters.values()]
@@ -1,15 +1,62 @@
 import os
 import json
+import hashlib
+import time
 import urllib.request
 import urllib.parse
+from datetime import datetime, timedelta, timezone
 
-def supabase_request(endpoint, method="GET", data=None):
+import http_client  # Shared pooled HTTP client (deploy http_client.py alongside)
+
+TARGET_LANGUAGES = ["EN", "FR", "HI", "ES", "ZH"]
+TRANSLATED_FIELDS = ["title", "subtitle", "description", "location"]
+DEEPL_BATCH_SIZE = 50  # DeepL accepts at most 50 text parameters per request
+DEEPL_API_URL = os.getenv("DEEPL_API_URL", "https://api.deepl.com/v2/translate")  # api-free.deepl.com on the free plan
+MEMORY_LOOKUP_CHUNK_SIZE = 100  # Hashes per text_hash=in.(...) query
+UPDATE_CHUNK_SIZE = 200  # Article ids per id=in.(...) PATCH
+
+# Backlog paging: pages of untranslated articles by ascending id, each claimed with a lease
+# (translation_claimed_at) so concurrent invocations split the backlog instead of sharing it
+PAGE_SIZE = int(os.getenv("TRANSLATION_PAGE_SIZE", "50"))
+LEASE_SECONDS = int(os.getenv("TRANSLATION_LEASE_SECONDS", "900"))  # Longer than one Lambda run
+DEADLINE_MARGIN_SECONDS = 30  # No new page this close to the Lambda timeout
+ARTICLE_COLUMNS = ["id", "language", "title", "subtitle", "description", "location", "publication_date"]
+
+# news_articles_translated is partitioned by publication_date (sql/migrations/010), which
+# every unique key, and so the upsert's conflict target, has to include
+TRANSLATED_CONFLICT_TARGET = os.getenv("SUPABASE_TRANSLATED_CONFLICT_TARGET",
+                                       "original_article_id,language_translated,publication_date")
+
+# The enrichment model writes the language as "FR", "fr-FR", "French", "français"...
+LANGUAGE_ALIASES = {
+    "english": "EN", "anglais": "EN",
+    "french": "FR", "francais": "FR", "français": "FR",
+    "hindi": "HI",
+    "spanish": "ES", "espagnol": "ES", "español": "ES", "espanol": "ES",
+    "chinese": "ZH", "chinois": "ZH", "mandarin": "ZH", "中文": "ZH",
+    "german": "DE", "allemand": "DE", "deutsch": "DE",
+    "italian": "IT", "italien": "IT", "italiano": "IT",
+    "portuguese": "PT", "portugais": "PT", "português": "PT",
+    "russian": "RU", "russe": "RU",
+    "arabic": "AR", "arabe": "AR",
+    "japanese": "JA", "japonais": "JA",
+    "ukrainian": "UK", "ukrainien": "UK",
+}
+
+# Translation memory: (source text hash, target language) -> translation. The dict lives
+# in module globals so it survives warm invocations; the translation_memory table is
+# shared by every run. Location names like "Paris" are then translated once, ever.
+translation_memory = {}
+
+def supabase_request(endpoint, method="GET", data=None, prefer=None):
     url = f"{os.getenv('SUPABASE_URL')}/rest/v1/{endpoint}"
     headers = {
         "apikey": os.getenv("SUPABASE_API_KEY"),
         "Authorization": f"Bearer {os.getenv('SUPABASE_API_KEY')}",
         "Content-Type": "application/json"
     }
+    if prefer:
+        headers["Prefer"] = prefer
     
     req_data = None
     if data:
@@ -18,76 +65,291 @@ def supabase_request(endpoint, method="GET", data=None):
     req = urllib.request.Request(url, data=req_data, headers=headers, method=method)
     
     try:
-        with urllib.request.urlopen(req) as response:
-            return json.loads(response.read().decode("utf-8"))
+        with http_client.urlopen(req) as response:
+            body = response.read().decode("utf-8")
+            return json.loads(body) if body else {}  # Empty success body; errors return None
     except Exception as e:
         print("Supabase API Error:", e)
         return None
 
-def translate_text(text, source_lang, target_lang):
-    if not text or source_lang.upper() == target_lang.upper():
-        return text  # No translation needed
-    
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def load_translation_memory(hashes, target_lang):
+    """Copy the stored translations of the given hashes into the in-process memory"""
+    for start in range(0, len(hashes), MEMORY_LOOKUP_CHUNK_SIZE):
+        chunk = hashes[start:start + MEMORY_LOOKUP_CHUNK_SIZE]
+        query = urllib.parse.urlencode({
+            "select": "text_hash,translated_text",
+            "target_lang": f"eq.{target_lang}",
+            "text_hash": f"in.({','.join(chunk)})"
+        })
+        rows = supabase_request(f"translation_memory?{query}", "GET") or []
+        for row in rows:
+            translation_memory[(row["text_hash"], target_lang)] = row["translated_text"]
+
+def save_translation_memory(translations, target_lang):
+    """Store new translations, keyed by source text hash"""
+    rows = [
+        {"text_hash": text_hash(text), "target_lang": target_lang, "translated_text": translated}
+        for text, translated in translations.items()
+    ]
+    if rows:
+        supabase_request("translation_memory?on_conflict=text_hash,target_lang", "POST", rows,
+                         prefer="resolution=ignore-duplicates,return=minimal")
+
+def deepl_translate(texts, target_lang):
+    """Translate a list of texts in one DeepL request, in order; None if the request fails"""
     api_key = os.getenv("DEEPL_API_KEY")
     if not api_key:
         print("Error: DeepL API key is missing!")
-        return text  # Avoid calling API with missing key
+        return None  # Avoid calling API with missing key
     
-    url = "https://api.deepl.com/v2/translate"  # Change if using paid API
+    url = DEEPL_API_URL
     headers = {
         "Content-Type": "application/x-www-form-urlencoded"
     }
     
-    data = urllib.parse.urlencode({
-        'auth_key': api_key,
-        'text': text,
-        'target_lang': target_lang.upper()
-        # Removed source_lang to allow auto-detection
-    }).encode("utf-8")
+    # One text parameter per string; source_lang is left out to allow auto-detection
+    params = [('auth_key', api_key), ('target_lang', target_lang.upper())]
+    params += [('text', text) for text in texts]
+    data = urllib.parse.urlencode(params).encode("utf-8")
     
     req = urllib.request.Request(url, data=data, headers=headers, method="POST")
     
     try:
-        with urllib.request.urlopen(req) as response:
+        with http_client.urlopen(req) as response:
             result = json.loads(response.read().decode("utf-8"))
-            print("DeepL Response:", result)  # Debugging
-            return result["translations"][0]["text"]
+            return [translation["text"] for translation in result["translations"]]
     except Exception as e:
         print("DeepL Error:", e)
-        return text  # Return original if error occurs
+        return None
 
-def lambda_handler(event, context):
-    # Get articles that have not been translated
-    articles = supabase_request("news_articles?translated=eq.false", "GET")
-    if not articles:
-        return {"statusCode": 200, "body": json.dumps("No articles to translate.")}
+def translate_texts(texts, target_lang):
+    """
+    Translate many texts into one language: translation memory first, then
+    batched DeepL requests for the rest. Returns ({text: translation}, failed),
+    where failed is the set of texts whose DeepL batch failed; they are left
+    out of the translations.
+    """
+    target_lang = target_lang.upper()
+    unique_texts = list(dict.fromkeys(text for text in texts if text))
+    hashes = {text: text_hash(text) for text in unique_texts}
+    
+    missing = [hashes[text] for text in unique_texts if (hashes[text], target_lang) not in translation_memory]
+    if missing:
+        load_translation_memory(missing, target_lang)
+    
+    to_translate = [text for text in unique_texts if (hashes[text], target_lang) not in translation_memory]
+    print(f"Translating into {target_lang}: {len(unique_texts) - len(to_translate)} from memory, {len(to_translate)} sent to DeepL")
     
+    new_translations = {}
+    failed = set()
+    for start in range(0, len(to_translate), DEEPL_BATCH_SIZE):
+        batch = to_translate[start:start + DEEPL_BATCH_SIZE]
+        translated = deepl_translate(batch, target_lang)
+        if translated is None or len(translated) != len(batch):
+            failed.update(batch)  # Retried once the caller releases their articles
+            continue
+        for text, translation in zip(batch, translated):
+            translation_memory[(hashes[text], target_lang)] = translation
+            new_translations[text] = translation
+    save_translation_memory(new_translations, target_lang)
+    
+    translations = {text: translation_memory[(hashes[text], target_lang)] for text in unique_texts if text not in failed}
+    return translations, failed
+
+def translate_text(text, source_lang, target_lang):
+    if not text or source_lang.upper() == target_lang.upper():
+        return text  # No translation needed
+    translations, _ = translate_texts([text], target_lang)
+    return translations.get(text, text)
+
+def normalize_language(language):
+    """Two-letter upper-case code of a language as written by the model, or None if unknown"""
+    if not language:
+        return None
+    value = language.strip().lower()
+    if value in LANGUAGE_ALIASES:
+        return LANGUAGE_ALIASES[value]
+    code = value.replace("_", "-").split("-")[0]  # en-US, zh-Hans, pt_BR
+    if len(code) == 2 and code.isalpha():
+        return code.upper()
+    return None
+
+def plan_translations(articles):
+    """
+    Decide per article which target languages need DeepL. Returns
+    {article id: (source language, [targets to translate])}; the source
+    language, when it is a target, gets an identity row instead.
+    """
+    plan = {}
+    for article in articles:
+        source_lang = normalize_language(article.get("language"))
+        plan[article["id"]] = (source_lang, [lang for lang in TARGET_LANGUAGES if lang != source_lang])
+    return plan
+
+def translation_row(article, target_lang, translated):
+    return {
+        "original_article_id": article["id"],
+        "title": translated.get(article["title"], article["title"]),
+        "subtitle": translated.get(article["subtitle"], article["subtitle"]) if article["subtitle"] else None,
+        "description": translated.get(article["description"], article["description"]),
+        "location": translated.get(article["location"], article["location"]),
+        "language_translated": target_lang,
+        "publication_date": article["publication_date"]
+    }
+
+def fetch_page_ids(after_id):
+    """Ids of the next untranslated articles after the keyset cursor, leased or not"""
+    query = urllib.parse.urlencode({
+        "select": "id",
+        "translated": "eq.false",
+        "id": f"gt.{after_id}",
+        "order": "id.asc",
+        "limit": str(PAGE_SIZE)
+    })
+    rows = supabase_request(f"news_articles?{query}", "GET")
+    return None if rows is None else [row["id"] for row in rows]
+
+def claim_articles(article_ids):
+    """
+    Lease the given articles and return the ones this invocation won, or None if
+    Supabase failed. The PATCH only matches rows still untranslated whose lease is
+    free or expired, so two invocations can never claim the same article.
+    """
+    now = datetime.now(timezone.utc)
+    expired = (now - timedelta(seconds=LEASE_SECONDS)).isoformat()
+    query = urllib.parse.urlencode({
+        "id": f"in.({','.join(str(article_id) for article_id in article_ids)})",
+        "translated": "eq.false",
+        "or": f"(translation_claimed_at.is.null,translation_claimed_at.lt.{expired})",
+        "select": ",".join(ARTICLE_COLUMNS)
+    })
+    claimed = supabase_request(f"news_articles?{query}", "PATCH", {"translation_claimed_at": now.isoformat()},
+                               prefer="return=representation")
+    if claimed is None:
+        return None  # An error, not a page held by another invocation
+    return claimed or []
+
+def translate_articles(articles):
+    """
+    Translate a page of articles, store their rows and mark them translated.
+    Returns the number of articles translated, or None if storing failed.
+    Articles with a text DeepL failed on are not written at all; their lease
+    is released so the next run translates them again.
+    """
+    plan = plan_translations(articles)
+    
+    # One batch of DeepL requests per target language, covering the articles that need it
+    translations = {}
+    failed_ids = set()
+    for target_lang in TARGET_LANGUAGES:
+        needing = [article for article in articles if target_lang in plan[article["id"]][1]]
+        texts = [article[field] for article in needing for field in TRANSLATED_FIELDS if article[field]]
+        translations[target_lang], failed = translate_texts(texts, target_lang) if texts else ({}, set())
+        failed_ids.update(article["id"] for article in needing
+                          if any(article[field] in failed for field in TRANSLATED_FIELDS if article[field]))
+    
+    if failed_ids:
+        print(f"DeepL failed on {len(failed_ids)} of {len(articles)} articles, releasing them for the next run")
+        release_articles(sorted(failed_ids))
+        articles = [article for article in articles if article["id"] not in failed_ids]
+        if not articles:
+            return 0
+    
+    # Source-language rows reuse the article as is; the others take the translations
+    rows = []
     for article in articles:
-        original_id = article["id"]
-        source_lang = article["language"].upper()
+        source_lang, targets = plan[article["id"]]
+        for target_lang in TARGET_LANGUAGES:
+            translated = translations[target_lang] if target_lang in targets else {}
+            rows.append(translation_row(article, target_lang, translated))
+    identity_rows = len(articles) * len(TARGET_LANGUAGES) - sum(len(plan[article["id"]][1]) for article in articles)
+    print(f"Writing {len(rows)} translation rows for {len(articles)} articles ({identity_rows} in the source language)")
+    
+    inserted = supabase_request(
+        f"news_articles_translated?on_conflict={TRANSLATED_CONFLICT_TARGET}", "POST", rows,
+        prefer="resolution=merge-duplicates,return=minimal"
+    )
+    if inserted is None:
+        return None
+    
+    # Mark articles as translated: this is the checkpoint a timed-out run resumes from
+    update_data = {
+        "translated": True,
+        "translated_date": datetime.now(timezone.utc).isoformat(),
+        "translation_claimed_at": None
+    }
+    article_ids = [str(article["id"]) for article in articles]
+    for start in range(0, len(article_ids), UPDATE_CHUNK_SIZE):
+        chunk = article_ids[start:start + UPDATE_CHUNK_SIZE]
+        if supabase_request(f"news_articles?id=in.({','.join(chunk)})", "PATCH", update_data) is None:
+            return None
+    
+    refresh_globe_cards([article["id"] for article in articles])
+    return len(articles)
+
+def release_articles(article_ids):
+    """Give up the lease of untranslated articles so the next run claims them without waiting for it to expire"""
+    for start in range(0, len(article_ids), UPDATE_CHUNK_SIZE):
+        chunk = [str(article_id) for article_id in article_ids[start:start + UPDATE_CHUNK_SIZE]]
+        if supabase_request(f"news_articles?id=in.({','.join(chunk)})", "PATCH", {"translation_claimed_at": None}) is None:
+            print(f"Could not release {len(chunk)} articles; their lease expires in {LEASE_SECONDS}s")
+
+def refresh_globe_cards(article_ids):
+    """Rebuild the globe cards of freshly translated articles (sql/migrations/011)"""
+    written = supabase_request("rpc/refresh_globe_cards", "POST", {"article_ids": article_ids})
+    if written is None:
+        # The translations are stored; the cards are rebuilt by any later refresh covering these ids
+        print(f"Could not refresh the globe cards of {len(article_ids)} articles")
+    else:
+        print(f"Refreshed {written} globe cards")
+
+def lambda_handler(event, context):
+    deadline = None
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000
+    
+    # Walk the untranslated articles by id, claiming and translating one page at a time
+    last_id = 0
+    translated_count = 0
+    failed_pages = 0
+    released_count = 0
+    while True:
+        if deadline is not None and time.monotonic() > deadline - DEADLINE_MARGIN_SECONDS:
+            print(f"Stopping before the Lambda timeout after article {last_id}; the next run resumes from there")
+            break
         
-        for target_lang in ["EN", "FR", "HI", "ES", "ZH"]:
-            print(f"Original Subtitle: {article['subtitle']}")
-            print(f"Original Description: {article['description']}")
-
-            translated_title = translate_text(article["title"], source_lang, target_lang)
-            translated_subtitle = translate_text(article["subtitle"], source_lang, target_lang) if article["subtitle"] else None
-            translated_description = translate_text(article["description"], source_lang, target_lang)
-            translated_location = translate_text(article["location"], source_lang, target_lang)
-                
-            translation_data = {
-                "original_article_id": original_id,
-                "title": translated_title,
-                "subtitle": translated_subtitle,
-                "description": translated_description,
-                "location": translated_location,
-                "language_translated": target_lang
-            }
-            print(f"Translation data: {translation_data}")
-            supabase_request("news_articles_translated", "POST", translation_data)
+        page_ids = fetch_page_ids(last_id)
+        if page_ids is None:
+            # Supabase is failing: the cursor can't move past a page it never read
+            failed_pages += 1
+            break
+        if not page_ids:
+            break
+        last_id = page_ids[-1]
         
-        # Mark article as translated and set translated_date
-        update_data = {"translated": True, "translated_date": "now()"}
-        supabase_request(f"news_articles?id=eq.{original_id}", "PATCH", update_data)
+        articles = claim_articles(page_ids)
+        if articles is None:
+            # Stop rather than walk the rest of the backlog without claiming anything
+            failed_pages += 1
+            break
+        if not articles:
+            continue  # Another invocation holds this page
+        
+        translated = translate_articles(articles)
+        if translated is None:
+            # Left untranslated; the lease expires and a later run picks the page up again
+            failed_pages += 1
+        else:
+            translated_count += translated
+            released_count += len(articles) - translated
     
-    return {"statusCode": 200, "body": json.dumps("Translation process completed successfully.")}
+    if released_count:
+        print(f"{released_count} articles left untranslated after DeepL errors")
+    if translated_count == 0 and (failed_pages or released_count):
+        return {"statusCode": 500, "body": json.dumps("Failed to read, claim or store translations.")}
+    if translated_count == 0:
+        return {"statusCode": 200, "body": json.dumps("No articles to translate.")}
+    return {"statusCode": 200, "body": json.dumps(f"Translated {translated_count} articles successfully.")}
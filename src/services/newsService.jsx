@@ -17,6 +17,66 @@ if (!supabaseUrl || !supabaseAnonKey) {
 // Create client
 const supabase = createClient(supabaseUrl, supabaseAnonKey);
 
+// Country codes of each region filter, mirrored by the country_regions table (sql/migrations/011)
+const REGION_COUNTRY_CODES = {
+  africa: ['DZ', 'AO', 'BJ', 'BW', 'BF', 'BI', 'CM', 'CV', 'CF', 'TD', 'KM', 'CG', 'CD', 'DJ', 'EG', 'GQ', 'ER', 'ET', 'GA', 'GM', 'GH', 'GN', 'GW', 'CI', 'KE', 'LS', 'LR', 'LY', 'MG', 'MW', 'ML', 'MR', 'MU', 'MA', 'MZ', 'NA', 'NE', 'NG', 'RW', 'ST', 'SN', 'SC', 'SL', 'SO', 'ZA', 'SS', 'SD', 'SZ', 'TZ', 'TG', 'TN', 'UG', 'ZM', 'ZW'],
+  americas: ['AI', 'AG', 'AR', 'AW', 'BS', 'BB', 'BZ', 'BM', 'BO', 'BR', 'CA', 'KY', 'CL', 'CO', 'CR', 'CU', 'DM', 'DO', 'EC', 'SV', 'FK', 'GF', 'GL', 'GD', 'GP', 'GT', 'GY', 'HT', 'HN', 'JM', 'MQ', 'MX', 'MS', 'NI', 'PA', 'PY', 'PE', 'PR', 'BL', 'KN', 'LC', 'MF', 'PM', 'VC', 'SR', 'TT', 'TC', 'US', 'UY', 'VE', 'VG', 'VI'],
+  asia: ['AF', 'AM', 'AZ', 'BH', 'BD', 'BT', 'BN', 'KH', 'CN', 'CY', 'GE', 'HK', 'IN', 'ID', 'IR', 'IQ', 'IL', 'JP', 'JO', 'KZ', 'KP', 'KR', 'KW', 'KG', 'LA', 'LB', 'MO', 'MY', 'MV', 'MN', 'MM', 'NP', 'OM', 'PK', 'PS', 'PH', 'QA', 'SA', 'SG', 'LK', 'SY', 'TW', 'TJ', 'TH', 'TL', 'TR', 'TM', 'AE', 'UZ', 'VN', 'YE'],
+  europe: ['AL', 'AD', 'AT', 'BY', 'BE', 'BA', 'BG', 'HR', 'CZ', 'DK', 'EE', 'FO', 'FI', 'FR', 'DE', 'GI', 'GR', 'GG', 'VA', 'HU', 'IS', 'IE', 'IM', 'IT', 'JE', 'LV', 'LI', 'LT', 'LU', 'MT', 'MD', 'MC', 'ME', 'NL', 'MK', 'NO', 'PL', 'PT', 'RO', 'RU', 'SM', 'RS', 'SK', 'SI', 'ES', 'SJ', 'SE', 'CH', 'UA', 'GB'],
+  oceania: ['AS', 'AU', 'CK', 'FJ', 'PF', 'GU', 'KI', 'MH', 'FM', 'NR', 'NC', 'NZ', 'NU', 'NF', 'MP', 'PW', 'PG', 'PN', 'WS', 'SB', 'TK', 'TO', 'TV', 'VU', 'WF']
+};
+
+const REGIONS = Object.keys(REGION_COUNTRY_CODES);
+
+// Columns of globe_cards that GlobeDynamic and NewsScroll render
+const GLOBE_CARD_COLUMNS = 'article_id, title, subtitle, description, location, theme, image, external_link, ' +
+  'publication_date, country_id, newspaper_id, newspaper_name, source_country_id, latitude, longitude';
+
+// Themes matched by each category filter
+const activeThemes = (filters) => {
+  const themes = [];
+  if (filters.environment) themes.push('environment');
+  if (filters.politics) themes.push('politics', 'politic', 'geopolitics', 'geopolitic');
+  if (filters.health) themes.push('health');
+  if (filters.science) themes.push('science');
+  if (filters.technology) themes.push('technology');
+  return themes;
+};
+
+const activeRegions = (filters) => REGIONS.filter(region => filters[region]);
+
+const activeSourceCountries = (filters) => Object.entries(filters.sourceFilters || {})
+  .filter(([_, isActive]) => isActive)
+  .map(([countryId]) => countryId);
+
+// Whether any filter narrows the news; the precomputed globe clusters cover unfiltered news only
+export const hasActiveFilters = (filters) =>
+  activeThemes(filters).length > 0 || activeRegions(filters).length > 0 || activeSourceCountries(filters).length > 0;
+
+// globe_cards and globe_card_counts don't exist until migration 011 is applied
+const isMissingTable = (error) => error && (error.code === '42P01' || error.code === 'PGRST205');
+
+const newsEventFromCard = (card) => ({
+  id: card.article_id,
+  title: card.title,
+  subtitle: card.subtitle,
+  description: card.description,
+  newspaper_id: card.newspaper_id,
+  newspaper: card.newspaper_name ? {
+    id: card.newspaper_id,
+    name: card.newspaper_name,
+    country_id: card.source_country_id,
+  } : null,
+  theme: card.theme,
+  image: card.image,
+  external_link: card.external_link,
+  publication_date: card.publication_date,
+  country_id: card.country_id,
+  location: card.location,
+  latitude: parseFloat(card.latitude),
+  longitude: parseFloat(card.longitude)
+});
+
 /**
  * Fetches news events from Supabase with comprehensive filter support and pagination
  * @param {Object} filters - Optional filters for news content
@@ -37,106 +97,28 @@ export const fetchNewsFromSupabase = async (filters = {}, page = 1, pageSize = 1
     const fromIndex = (page - 1) * pageSize;
     const toIndex = fromIndex + pageSize - 1;
     
-    // Start building the query
+    // One indexed read of the denormalized cards, newest first
     let query = supabase
-      .from('news_articles_translated')
-      .select('*, news_articles!inner(*, newspapers(*))')
-      .eq('language_translated', 'FR')
+      .from('globe_cards')
+      .select(GLOBE_CARD_COLUMNS)
+      .eq('language', 'FR')
+      .order('publication_date', { ascending: false })
       .range(fromIndex, toIndex);  // Apply pagination
     
-    // Extract filter categories
-    const { 
-      // Categories
-      environment, politics, health, science, technology, other,
-      // Regions
-      africa, americas, asia, europe, oceania,
-      // Source filters (country-specific)
-      sourceFilters = {}
-    } = filters;
-    
-    // Check if any category filter is active
-    const hasActiveCategoryFilter = environment || politics || health || science || technology || other;
-    
-    // Apply category filters if any are active
-    if (hasActiveCategoryFilter) {
-      const activeCategories = [];
-      if (environment) activeCategories.push('environment');
-      if (politics) {
-        activeCategories.push('politics', 'politic', 'geopolitics', 'geopolitic');
-      }
-      if (health) activeCategories.push('health');
-      if (science) activeCategories.push('science');
-      if (technology) activeCategories.push('technology');
-      
-      // Only apply if we have active categories
-      if (activeCategories.length > 0) {
-        // Filter to match any of the active categories
-        query = query.filter('news_articles.theme', 'in', `(${activeCategories.join(',')})`);
-      }
-    }
-    
-    // Define country codes by region for filtering
-    const regionCountryCodes = {
-      africa: ['DZ', 'AO', 'BJ', 'BW', 'BF', 'BI', 'CM', 'CV', 'CF', 'TD', 'KM', 'CG', 'CD', 'DJ', 'EG', 'GQ', 'ER', 'ET', 'GA', 'GM', 'GH', 'GN', 'GW', 'CI', 'KE', 'LS', 'LR', 'LY', 'MG', 'MW', 'ML', 'MR', 'MU', 'MA', 'MZ', 'NA', 'NE', 'NG', 'RW', 'ST', 'SN', 'SC', 'SL', 'SO', 'ZA', 'SS', 'SD', 'SZ', 'TZ', 'TG', 'TN', 'UG', 'ZM', 'ZW'],
-      americas: ['AI', 'AG', 'AR', 'AW', 'BS', 'BB', 'BZ', 'BM', 'BO', 'BR', 'CA', 'KY', 'CL', 'CO', 'CR', 'CU', 'DM', 'DO', 'EC', 'SV', 'FK', 'GF', 'GL', 'GD', 'GP', 'GT', 'GY', 'HT', 'HN', 'JM', 'MQ', 'MX', 'MS', 'NI', 'PA', 'PY', 'PE', 'PR', 'BL', 'KN', 'LC', 'MF', 'PM', 'VC', 'SR', 'TT', 'TC', 'US', 'UY', 'VE', 'VG', 'VI'],
-      asia: ['AF', 'AM', 'AZ', 'BH', 'BD', 'BT', 'BN', 'KH', 'CN', 'CY', 'GE', 'HK', 'IN', 'ID', 'IR', 'IQ', 'IL', 'JP', 'JO', 'KZ', 'KP', 'KR', 'KW', 'KG', 'LA', 'LB', 'MO', 'MY', 'MV', 'MN', 'MM', 'NP', 'OM', 'PK', 'PS', 'PH', 'QA', 'SA', 'SG', 'LK', 'SY', 'TW', 'TJ', 'TH', 'TL', 'TR', 'TM', 'AE', 'UZ', 'VN', 'YE'],
-      europe: ['AL', 'AD', 'AT', 'BY', 'BE', 'BA', 'BG', 'HR', 'CZ', 'DK', 'EE', 'FO', 'FI', 'FR', 'DE', 'GI', 'GR', 'GG', 'VA', 'HU', 'IS', 'IE', 'IM', 'IT', 'JE', 'LV', 'LI', 'LT', 'LU', 'MT', 'MD', 'MC', 'ME', 'NL', 'MK', 'NO', 'PL', 'PT', 'RO', 'RU', 'SM', 'RS', 'SK', 'SI', 'ES', 'SJ', 'SE', 'CH', 'UA', 'GB'],
-      oceania: ['AS', 'AU', 'CK', 'FJ', 'PF', 'GU', 'KI', 'MH', 'FM', 'NR', 'NC', 'NZ', 'NU', 'NF', 'MP', 'PW', 'PG', 'PN', 'WS', 'SB', 'TK', 'TO', 'TV', 'VU', 'WF']
-    };
-    
-    // Check if any region filter is active
-    const hasActiveRegionFilter = africa || americas || asia || europe || oceania;
-    
-    // Create a combined list of country codes from selected regions
-    if (hasActiveRegionFilter) {
-      let countryCodes = [];
-      if (africa) countryCodes = [...countryCodes, ...regionCountryCodes.africa];
-      if (americas) countryCodes = [...countryCodes, ...regionCountryCodes.americas];
-      if (asia) countryCodes = [...countryCodes, ...regionCountryCodes.asia];
-      if (europe) countryCodes = [...countryCodes, ...regionCountryCodes.europe];
-      if (oceania) countryCodes = [...countryCodes, ...regionCountryCodes.oceania];
-      
-      if (countryCodes.length > 0) {
-        // Apply as IN filter to country_id using the proper syntax
-        query = query.filter('news_articles.country_id', 'in', `(${countryCodes.map(code => `'${code}'`).join(',')})`);
-      }
-    }
-    
-    // Check for source country filters
-    const sourceCountryIds = Object.entries(sourceFilters)
-      .filter(([_, isActive]) => isActive)
-      .map(([countryId]) => countryId);
+    const themes = activeThemes(filters);
+    if (themes.length > 0) query = query.in('theme', themes);
     
-    if (sourceCountryIds.length > 0) {
-      // Filter by newspaper country using the proper syntax
-      query = query.filter('news_articles.newspapers.country_id', 'in', 
-        `(${sourceCountryIds.map(id => `'${id}'`).join(',')})`);
-    }
+    const regions = activeRegions(filters);
+    if (regions.length > 0) query = query.in('region', regions);
     
-    // Sort by publication date (newest first)
-    query = query.order('publication_date', { foreignTable: 'news_articles', ascending: false });
+    const sourceCountryIds = activeSourceCountries(filters);
+    if (sourceCountryIds.length > 0) query = query.in('source_country_id', sourceCountryIds);
     
-    // Execute the query
-    let data, error;
+    let { data, error } = await query;
     
-    try {
-      const response = await query;
-      data = response.data;
-      error = response.error;
-    } catch (e) {
-      console.error("Filter query failed, trying fallback approach:", e);
-      
-      // Fallback: If complex filtering fails, try a simple query
-      const fallbackQuery = supabase
-        .from('news_articles_translated')
-        .select('*, news_articles!inner(*, newspapers(*))')
-        .eq('language_translated', 'FR')
-        .order('publication_date', { foreignTable: 'news_articles', ascending: false })
-        .range(fromIndex, toIndex);  // Apply pagination to fallback query
-        
-      const fallbackResponse = await fallbackQuery;
-      data = fallbackResponse.data;
-      error = fallbackResponse.error;
+    if (isMissingTable(error)) {
+      console.warn("globe_cards not available, falling back to the joined tables");
+      ({ data, error } = await fetchJoinedNews(filters, fromIndex, toIndex));
     }
     
     if (error) {
@@ -151,71 +133,131 @@ export const fetchNewsFromSupabase = async (filters = {}, page = 1, pageSize = 1
       return [];
     }
     
-    // Transform the data to the expected format
-    return data.map(item => ({
-      id: item.news_articles.id,
+    return data.map(newsEventFromCard);
+    
+  } catch (error) {
+    console.error('Error fetching news from Supabase:', error);
+    throw error;
+  }
+};
+
+// Pre-migration read path: translations joined to their article and newspaper, as cards
+const fetchJoinedNews = async (filters, fromIndex, toIndex) => {
+  let query = supabase
+    .from('news_articles_translated')
+    .select('*, news_articles!inner(*, newspapers(*))')
+    .eq('language_translated', 'FR')
+    .order('publication_date', { foreignTable: 'news_articles', ascending: false })
+    .range(fromIndex, toIndex);
+  
+  const themes = activeThemes(filters);
+  if (themes.length > 0) {
+    query = query.filter('news_articles.theme', 'in', `(${themes.join(',')})`);
+  }
+  
+  const countryCodes = activeRegions(filters).flatMap(region => REGION_COUNTRY_CODES[region]);
+  if (countryCodes.length > 0) {
+    query = query.filter('news_articles.country_id', 'in', `(${countryCodes.map(code => `'${code}'`).join(',')})`);
+  }
+  
+  const sourceCountryIds = activeSourceCountries(filters);
+  if (sourceCountryIds.length > 0) {
+    query = query.filter('news_articles.newspapers.country_id', 'in',
+      `(${sourceCountryIds.map(id => `'${id}'`).join(',')})`);
+  }
+  
+  const { data, error } = await query;
+  return {
+    error,
+    data: data && data.map(item => ({
+      article_id: item.news_articles.id,
       title: item.title,
       subtitle: item.subtitle,
       description: item.description,
-      author: item.news_articles.author,
-      newspaper_id: item.news_articles.newspaper_id,
-      newspaper: item.news_articles.newspapers ? {
-        id: item.news_articles.newspapers.id,
-        name: item.news_articles.newspapers.name,
-        description: item.news_articles.newspapers.description,
-        country_id: item.news_articles.newspapers.country_id,
-      } : null,
+      location: item.location || item.news_articles.location,
       theme: item.news_articles.theme,
-      theme_tags: Array.isArray(item.news_articles.theme_tags) ? 
-                 item.news_articles.theme_tags : 
-                 (item.news_articles.theme_tags ? JSON.parse(item.news_articles.theme_tags) : []),
       image: item.news_articles.image,
       external_link: item.news_articles.external_link,
       publication_date: item.news_articles.publication_date,
       country_id: item.news_articles.country_id,
-      location: item.location || item.news_articles.location,
-      latitude: parseFloat(item.news_articles.latitude),
-      longitude: parseFloat(item.news_articles.longitude)
-    }));
-    
-  } catch (error) {
-    console.error('Error fetching news from Supabase:', error);
-    throw error;
-  }
+      newspaper_id: item.news_articles.newspaper_id,
+      newspaper_name: item.news_articles.newspapers?.name,
+      source_country_id: item.news_articles.newspapers?.country_id,
+      latitude: item.news_articles.latitude,
+      longitude: item.news_articles.longitude
+    }))
+  };
 };
 
 // Function to fetch total count of news articles matching filters (for pagination)
 export const fetchNewsCount = async (filters = {}) => {
   try {
-    // Build a query to count records with the same filters
+    // Sum the precomputed counts of the filter combinations that match
     let query = supabase
-      .from('news_articles_translated')
-      .select('id', { count: 'exact' })
-      .eq('language_translated', 'FR');
+      .from('globe_card_counts')
+      .select('card_count')
+      .eq('language', 'FR');
+    
+    const themes = activeThemes(filters);
+    if (themes.length > 0) query = query.in('theme', themes);
     
-    // Extract filter categories
-    const { 
-      environment, politics, health, science, technology, other,
-      africa, americas, asia, europe, oceania,
-      sourceFilters = {}
-    } = filters;
+    const regions = activeRegions(filters);
+    if (regions.length > 0) query = query.in('region', regions);
     
-    // Apply the same filters as in fetchNewsFromSupabase
-    // (Duplicate the filter logic from above, keeping it in sync)
+    const sourceCountryIds = activeSourceCountries(filters);
+    if (sourceCountryIds.length > 0) query = query.in('source_country_id', sourceCountryIds);
     
-    const { count, error } = await query;
+    const { data, error } = await query;
+    
+    if (isMissingTable(error)) {
+      const fallback = await supabase
+        .from('news_articles_translated')
+        .select('id', { count: 'exact', head: true })
+        .eq('language_translated', 'FR');
+      if (fallback.error) throw new Error(fallback.error.message);
+      return fallback.count || 0;
+    }
     
     if (error) {
       throw new Error(error.message);
     }
     
-    return count || 0;
+    return (data || []).reduce((total, row) => total + row.card_count, 0);
   } catch (error) {
     console.error('Error fetching news count:', error);
     return 0;
   }
 };
 
+/**
+ * Fetches the precomputed globe clusters of a zoom level inside a viewport
+ * @param {Number} zoomLevel - Geohash precision of the cells (2 far away to 5 close up)
+ * @param {Object} bounds - { south, north, west, east } in degrees; west > east crosses the antimeridian
+ * @returns {Promise<Array>} - Clusters with their centroid, article count and top theme
+ */
+export const fetchGlobeClusters = async (zoomLevel, bounds) => {
+  let query = supabase
+    .from('globe_clusters')
+    .select('geohash, latitude, longitude, article_count, top_theme, theme_counts, latest_article_id, latest_title')
+    .eq('zoom_level', zoomLevel)
+    .gte('latitude', bounds.south)
+    .lte('latitude', bounds.north);
+  
+  if (bounds.west <= bounds.east) {
+    query = query.gte('longitude', bounds.west).lte('longitude', bounds.east);
+  } else {
+    query = query.or(`longitude.gte.${bounds.west},longitude.lte.${bounds.east}`);
+  }
+  
+  const { data, error } = await query;
+  
+  if (error) {
+    throw new Error(error.message);
+  }
+  
+  return data || [];
+};
+
 // Function to fetch countries from Supabase - enhanced with caching
 export const fetchCountriesFromSupabase = async () => {
   try {